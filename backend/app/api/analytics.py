@@ -1,28 +1,49 @@
 """
 Analytics and dashboard API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from app.core.database import get_db
+from typing import List, Optional
+from app.core.database import get_db, SessionLocal
+from app.api.deps import get_current_staff, get_current_student, is_staff
 from app.models.models import Student, LearningSession, StudentKnowledge
 from app.models.schemas import DashboardData, StudentResponse, KnowledgeState, ProgressData
 from app.services.student_model import StudentModelService
 from app.services.rl_agent import agent
-from datetime import datetime, timedelta
+from app.services.streak_service import current_streak
+from app.services.performance_rollup import daily_rollups
+from app.services.session_aggregates import session_totals
+from app.services.response_cache import cached_response
+from app.services.cohort_analytics import cohort_summary, export_cohort, EXPORT_FORMATS
+from app.services import session_export
+from datetime import date, datetime, timedelta
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
 @router.get("/dashboard")
-def get_dashboard(username: str, db: Session = Depends(get_db)):
-    """Get complete dashboard analytics for student"""
+def get_dashboard(username: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    Get complete dashboard analytics for student.
+    Cached until the student's state changes (or the day does); supports ETag/304.
+    """
     
     # Get student
     student = db.query(Student).filter(Student.username == username).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
+    return cached_response(
+        request, response, "analytics.dashboard", student.id,
+        lambda: build_dashboard(db, student),
+        scope=datetime.now().date()
+    )
+
+
+def build_dashboard(db: Session, student: Student) -> dict:
+    """Dashboard analytics for a student, computed from the database"""
     # Get knowledge state
     knowledge = db.query(StudentKnowledge).filter(
         StudentKnowledge.student_id == student.id
@@ -35,7 +56,10 @@ def get_dashboard(username: str, db: Session = Depends(get_db)):
     progress = StudentModelService.get_progress_summary(db, student.id)
     
     # Get recent sessions
-    recent_sessions = db.query(LearningSession).filter(
+    recent_sessions = db.query(
+        LearningSession.id, LearningSession.content_id, LearningSession.is_correct,
+        LearningSession.reward, LearningSession.time_spent, LearningSession.timestamp
+    ).filter(
         LearningSession.student_id == student.id
     ).order_by(LearningSession.timestamp.desc()).limit(10).all()
     
@@ -50,11 +74,7 @@ def get_dashboard(username: str, db: Session = Depends(get_db)):
     
     # Calculate time spent today
     today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_sessions = db.query(LearningSession).filter(
-        LearningSession.student_id == student.id,
-        LearningSession.timestamp >= today_start
-    ).all()
-    time_spent_today = sum(s.time_spent for s in today_sessions) / 60  # Convert to minutes
+    time_spent_today = session_totals(db, student.id, start=today_start)["time_spent"] / 60  # Convert to minutes
     
     # Calculate skill improvements (JEE topics)
     skill_improvements = {
@@ -74,7 +94,7 @@ def get_dashboard(username: str, db: Session = Depends(get_db)):
     }
     
     # Calculate streak
-    streak_days = calculate_streak(db, student.id)
+    streak_days = current_streak(db, student.id)
     
     return {
         'student': {
@@ -127,72 +147,105 @@ def get_rl_statistics():
 
 @router.get("/performance-chart")
 def get_performance_chart(username: str, days: int = 7, db: Session = Depends(get_db)):
-    """Get performance data for charting"""
+    """Get performance data for charting, one point per active day from the daily rollups"""
     
     student = db.query(Student).filter(Student.username == username).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    # Get sessions from last N days
-    start_date = datetime.now() - timedelta(days=days)
-    sessions = db.query(LearningSession).filter(
-        LearningSession.student_id == student.id,
-        LearningSession.timestamp >= start_date
-    ).order_by(LearningSession.timestamp).all()
-    
-    # Group by day
-    daily_data = {}
-    for session in sessions:
-        day = session.timestamp.date().isoformat()
-        if day not in daily_data:
-            daily_data[day] = {
-                'date': day,
-                'attempts': 0,
-                'correct': 0,
-                'accuracy': 0.0,
-                'avg_reward': 0.0,
-                'total_time': 0.0
-            }
-        
-        daily_data[day]['attempts'] += 1
-        if session.is_correct:
-            daily_data[day]['correct'] += 1
-        daily_data[day]['total_time'] += session.time_spent / 60  # minutes
-    
-    # Calculate averages
-    for day_data in daily_data.values():
-        day_data['accuracy'] = day_data['correct'] / day_data['attempts'] if day_data['attempts'] > 0 else 0
-        day_data['avg_time'] = day_data['total_time'] / day_data['attempts'] if day_data['attempts'] > 0 else 0
-    
-    return list(daily_data.values())
+    today = datetime.now().date()
+    rollups = daily_rollups(db, student.id, today - timedelta(days=days), today)
+    db.commit()
+    
+    return [metrics.to_chart_point() for metrics in rollups]
 
 
-def calculate_streak(db: Session, student_id: int) -> int:
-    """Calculate consecutive days of activity"""
-    
-    # Get all unique session dates
-    sessions = db.query(
-        func.date(LearningSession.timestamp).label('session_date')
-    ).filter(
-        LearningSession.student_id == student_id
-    ).distinct().order_by(func.date(LearningSession.timestamp).desc()).all()
-    
-    if not sessions:
-        return 0
-    
-    # Check for consecutive days
-    streak = 0
-    expected_date = datetime.now().date()
-    
-    for session in sessions:
-        session_date = session.session_date
-        if isinstance(session_date, str):
-            session_date = datetime.fromisoformat(session_date).date()
-        
-        if session_date == expected_date or session_date == expected_date - timedelta(days=1):
-            streak += 1
-            expected_date = session_date - timedelta(days=1)
-        else:
-            break
-    
-    return streak
+@router.get("/cohort")
+def get_cohort_analytics(
+    student_ids: List[int] = Query(...),
+    days: int = 30,
+    current_staff: Student = Depends(get_current_staff),
+    db: Session = Depends(get_db)
+):
+    """
+    Class-level analytics for a set of students over the last N days:
+    topic mastery distributions, daily accuracy and time-on-task, per-student totals.
+    Staff only.
+    """
+    if days < 1:
+        raise HTTPException(status_code=400, detail="days must be positive")
+    today = datetime.now().date()
+    try:
+        summary = cohort_summary(db, student_ids, today - timedelta(days=days - 1), today)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    return summary
+
+
+@router.get("/cohort/export")
+def export_cohort_analytics(
+    student_ids: List[int] = Query(...),
+    days: int = 30,
+    format: str = "arrow",
+    table: str = "rollups",
+    current_staff: Student = Depends(get_current_staff)
+):
+    """
+    Stream a cohort's daily rollups (table=rollups) or knowledge vectors
+    (table=knowledge) as Arrow IPC (format=arrow) or Parquet (format=parquet).
+    Staff only.
+    """
+    if days < 1:
+        raise HTTPException(status_code=400, detail="days must be positive")
+    today = datetime.now().date()
+    try:
+        stream = export_cohort(
+            SessionLocal, student_ids, today - timedelta(days=days - 1), today, fmt=format, table=table
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    extension = "arrows" if format == "arrow" else "parquet"
+    return StreamingResponse(
+        stream,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="cohort_{table}.{extension}"'}
+    )
+
+
+@router.get("/sessions/export")
+def export_learning_sessions(
+    request: Request,
+    student_ids: Optional[List[int]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    topic: Optional[str] = None,
+    format: str = "ndjson",
+    current_student: Student = Depends(get_current_student)
+):
+    """
+    Stream learning sessions as NDJSON (format=ndjson) or CSV (format=csv),
+    optionally filtered by students, days in [start, end] and topic.
+    The state columns are flattened to numbers; gzipped when the client accepts it.
+    Staff may export any students; everyone else only their own sessions.
+    """
+    if not is_staff(current_student):
+        if student_ids is not None and set(student_ids) != {current_student.id}:
+            raise HTTPException(status_code=403, detail="Not authorized to export other students' sessions")
+        student_ids = [current_student.id]
+    
+    gzip = "gzip" in request.headers.get("accept-encoding", "")
+    try:
+        stream = session_export.export_sessions(
+            SessionLocal, student_ids, start, end, topic, fmt=format, gzip=gzip
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = {"Content-Disposition": f'attachment; filename="learning_sessions.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(stream, media_type=session_export.EXPORT_FORMATS[format], headers=headers)
@@ -41,3 +41,18 @@ def get_current_student(
         raise credentials_exception
 
     return student
+
+
+def is_staff(student: Student) -> bool:
+    """Whether the student is a teacher/admin account (listed in STAFF_USERNAMES)"""
+    return student.username in settings.STAFF_USERNAMES
+
+
+def get_current_staff(current_student: Student = Depends(get_current_student)) -> Student:
+    """Current authenticated student, who must be staff"""
+    if not is_staff(current_student):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Staff access required"
+        )
+    return current_student
@@ -10,38 +10,30 @@ from datetime import datetime, timedelta
 import statistics
 
 from app.core.database import get_db
-from app.models.models import Student, LearningSession
-from app.models.learning_pace import LearningPace, ConceptTimeLog
+from app.models.models import Student
+from app.models.learning_pace import LearningPace, ConceptTimeLog, PaceBaseline
 from app.api.auth import get_current_student
+from app.services.event_log import pace_materializer
+from app.services.pace_baselines import baseline_seconds, get_pace_baselines
+from app.services.performance_rollup import daily_rollups
+from app.services.session_aggregates import aggregate_sessions
 
 router = APIRouter(prefix="/learning-pace", tags=["learning-pace"])
 
 
-# Baseline concept completion times (in seconds)
-BASELINE_TIMES = {
-    "algebra": 180,  # 3 minutes
-    "calculus": 240,  # 4 minutes
-    "geometry": 200,  # 3.3 minutes
-    "statistics": 220,  # 3.7 minutes
-    "default": 200
-}
-
-
 def calculate_pace_metrics(student_id: int, db: Session) -> Dict[str, Any]:
     """
-    Calculate learning pace metrics from session history
+    Calculate learning pace metrics from the running per-concept statistics
     
     Returns:
         Dict with avg_speed, avg_time, completion_rate, time_by_concept
     """
-    # Get all sessions for student
-    sessions = db.query(LearningSession).filter(
-        LearningSession.student_id == student_id,
-        LearningSession.time_spent_seconds.isnot(None),
-        LearningSession.time_spent_seconds > 0
-    ).all()
-    
-    if not sessions:
+    # Fold any answers not yet counted into LearningPace.time_on_task_data
+    pace_materializer.catch_up(db, student_id=student_id)
+    pace = db.query(LearningPace).filter(LearningPace.student_id == student_id).first()
+    stats = pace.concept_stats() if pace else {}
+    
+    if not stats:
         return {
             "avg_speed": 1.0,
             "avg_time_per_concept": 0,
@@ -50,44 +42,29 @@ def calculate_pace_metrics(student_id: int, db: Session) -> Dict[str, Any]:
             "time_by_concept": {}
         }
     
-    # Calculate time by concept
-    time_by_concept = {}
-    for session in sessions:
-        concept = session.concept_name or "general"
-        if concept not in time_by_concept:
-            time_by_concept[concept] = []
-        time_by_concept[concept].append(session.time_spent_seconds)
-    
-    # Calculate average time per concept
-    avg_times = {}
-    for concept, times in time_by_concept.items():
-        avg_times[concept] = statistics.mean(times)
-    
-    # Calculate overall average speed compared to baseline
+    # Calculate overall average speed compared to the population baselines
+    baselines = get_pace_baselines(db)
     speed_ratios = []
-    for concept, avg_time in avg_times.items():
-        baseline = BASELINE_TIMES.get(concept, BASELINE_TIMES["default"])
+    for concept, concept_stats in stats.items():
+        baseline = baseline_seconds(baselines, concept)
         # Speed = baseline / actual (faster students have higher values)
-        speed = baseline / avg_time if avg_time > 0 else 1.0
-        speed_ratios.append(speed)
-    
-    avg_speed = statistics.mean(speed_ratios) if speed_ratios else 1.0
+        avg_time = concept_stats["mean"]
+        speed_ratios.append(baseline / avg_time if avg_time > 0 else 1.0)
     
-    # Calculate completion rate
-    total_sessions = len(sessions)
-    correct_sessions = sum(1 for s in sessions if s.is_correct)
-    completion_rate = (correct_sessions / total_sessions * 100) if total_sessions > 0 else 0
+    avg_speed = statistics.mean(speed_ratios)
     
-    # Calculate overall average time
-    all_times = [s.time_spent_seconds for s in sessions if s.time_spent_seconds]
-    avg_time = statistics.mean(all_times) if all_times else 0
+    # Completion rate and overall average time, weighted by answers per concept
+    total_sessions = sum(s["count"] for s in stats.values())
+    correct_sessions = sum(s["correct"] for s in stats.values())
+    completion_rate = correct_sessions / total_sessions * 100
+    avg_time = sum(s["mean"] * s["count"] for s in stats.values()) / total_sessions
     
     return {
         "avg_speed": round(avg_speed, 2),
         "avg_time_per_concept": round(avg_time, 1),
         "completion_rate": round(completion_rate, 1),
         "total_concepts": total_sessions,
-        "time_by_concept": {k: round(v, 1) for k, v in avg_times.items()}
+        "time_by_concept": {concept: round(s["mean"], 1) for concept, s in stats.items()}
     }
 
 
@@ -122,7 +99,6 @@ async def analyze_learning_pace(
     pace.avg_time_per_concept_seconds = metrics["avg_time_per_concept"]
     pace.completion_rate = metrics["completion_rate"]
     pace.total_concepts_completed = metrics["total_concepts"]
-    pace.time_on_task_data = metrics["time_by_concept"]
     pace.last_analyzed = datetime.utcnow()
     
     # Determine if difficulty should be adjusted
@@ -165,7 +141,7 @@ async def analyze_learning_pace(
         "recommended_difficulty": pace.get_recommended_difficulty(),
         "adjustment_made": old_difficulty != pace.difficulty_preference,
         "adjustment_reason": adjustment_reason,
-        "time_by_concept": pace.time_on_task_data,
+        "time_by_concept": metrics["time_by_concept"],
         "last_analyzed": pace.last_analyzed.isoformat()
     }
 
@@ -243,7 +219,7 @@ async def get_learning_pace(
         "total_concepts_completed": pace.total_concepts_completed,
         "avg_time_per_concept_seconds": pace.avg_time_per_concept_seconds,
         "recommended_difficulty": pace.get_recommended_difficulty(),
-        "time_by_concept": pace.time_on_task_data or {},
+        "time_by_concept": pace.time_by_concept(),
         "adjustment_history": pace.adjustment_history or [],
         "last_analyzed": pace.last_analyzed.isoformat() if pace.last_analyzed else None,
         "created_at": pace.created_at.isoformat(),
@@ -429,15 +405,16 @@ async def get_time_analytics(
         - time_by_difficulty
         - peak_learning_hours
     """
-    # Get sessions from last N days
+    # Concept x difficulty x hour buckets of the window in one joined GROUP BY
     cutoff_date = datetime.utcnow() - timedelta(days=days)
-    sessions = db.query(LearningSession).filter(
-        LearningSession.student_id == current_student.id,
-        LearningSession.timestamp >= cutoff_date,
-        LearningSession.time_spent_seconds.isnot(None)
-    ).all()
+    buckets = [
+        row for row in aggregate_sessions(
+            db, current_student.id, start=cutoff_date, by=("concept", "difficulty", "hour")
+        )
+        if row["timed_attempts"]
+    ]
     
-    if not sessions:
+    if not buckets:
         return {
             "daily_time_spent": [],
             "time_by_concept": {},
@@ -446,44 +423,31 @@ async def get_time_analytics(
             "total_time_seconds": 0
         }
     
-    # Calculate daily time spent
-    daily_time = {}
-    for session in sessions:
-        date_key = session.timestamp.date().isoformat()
-        if date_key not in daily_time:
-            daily_time[date_key] = 0
-        daily_time[date_key] += session.time_spent_seconds or 0
+    # Daily time spent from the daily rollups (days are local, like the event log)
+    today = datetime.now().date()
+    daily_time = {
+        metrics.date.date().isoformat(): round((metrics.total_time_spent or 0) * 60)
+        for metrics in daily_rollups(db, current_student.id, cutoff_date.date(), today)
+    }
+    db.commit()
     
-    # Calculate time by concept
+    # Time by concept and difficulty, session counts by hour: one pass over the buckets
     time_by_concept = {}
-    for session in sessions:
-        concept = session.concept_name or "general"
-        if concept not in time_by_concept:
-            time_by_concept[concept] = 0
-        time_by_concept[concept] += session.time_spent_seconds or 0
-    
-    # Calculate time by difficulty
     time_by_difficulty = {}
-    for session in sessions:
-        if session.content:
-            diff = session.content.difficulty or 3
-            if diff not in time_by_difficulty:
-                time_by_difficulty[diff] = 0
-            time_by_difficulty[diff] += session.time_spent_seconds or 0
-    
-    # Find peak learning hours
     hour_counts = {}
-    for session in sessions:
-        hour = session.timestamp.hour
-        if hour not in hour_counts:
-            hour_counts[hour] = 0
-        hour_counts[hour] += 1
+    total_time = 0
+    for row in buckets:
+        seconds = row["time_spent_seconds"]
+        concept = row["concept"] or "general"
+        time_by_concept[concept] = time_by_concept.get(concept, 0) + seconds
+        if row["difficulty"] is not None:
+            time_by_difficulty[row["difficulty"]] = time_by_difficulty.get(row["difficulty"], 0) + seconds
+        hour_counts[row["hour"]] = hour_counts.get(row["hour"], 0) + row["timed_attempts"]
+        total_time += seconds
     
     peak_hours = sorted(hour_counts.items(), key=lambda x: x[1], reverse=True)[:3]
     peak_hours_list = [f"{hour:02d}:00" for hour, _ in peak_hours]
     
-    total_time = sum(s.time_spent_seconds or 0 for s in sessions)
-    
     return {
         "daily_time_spent": [
             {"date": date, "seconds": seconds, "minutes": round(seconds/60, 1)}
@@ -503,3 +467,32 @@ async def get_time_analytics(
         "total_time_hours": round(total_time / 3600, 2),
         "days_analyzed": days
     }
+
+
+@router.get("/baselines")
+async def get_pace_baselines_table(
+    current_student: Student = Depends(get_current_student),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the population time-on-task baselines students are compared against
+    
+    Returns:
+        Per-concept median and interquartile range of students' average
+        seconds per answer, from the nightly baseline job
+    """
+    rows = db.query(PaceBaseline).order_by(PaceBaseline.concept_name).all()
+    return {
+        "baselines": {
+            row.concept_name: {
+                "median_seconds": row.median_seconds,
+                "p25_seconds": row.p25_seconds,
+                "p75_seconds": row.p75_seconds,
+                "iqr_seconds": round(row.iqr_seconds, 1),
+                "student_count": row.student_count,
+                "answer_count": row.answer_count
+            }
+            for row in rows
+        },
+        "computed_at": max(row.computed_at for row in rows).isoformat() if rows else None
+    }
@@ -3,10 +3,10 @@ Mastery-Based Progression API
 Handles skills, badges, and study plans.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from pydantic import BaseModel
 
 from app.core.database import get_db
@@ -14,6 +14,10 @@ from app.api.deps import get_current_student
 from app.models.models import Student
 from app.models.mastery import MasterySkill, StudentMastery, Badge, StudentBadge, StudyPlan
 from app.services.mastery_service import MasteryService, BadgeService, StudyPlanService
+from app.services.badge_engine import invalidate_badge_rules
+from app.services.mastery_snapshot import get_mastery_snapshot
+from app.services.skill_graph import get_skill_graph, invalidate_skill_graph
+from app.services.response_cache import cached_response, invalidate_response_cache
 
 
 router = APIRouter(prefix="/mastery", tags=["mastery"])
@@ -105,7 +109,7 @@ def create_skill(
         )
     
     # Create skill
-    skill = Skill(
+    skill = MasterySkill(
         name=skill_data.name,
         description=skill_data.description,
         category=skill_data.category,
@@ -116,13 +120,16 @@ def create_skill(
     # Add prerequisites
     if skill_data.prerequisite_ids:
         prerequisites = db.query(MasterySkill).filter(
-            Skill.id.in_(skill_data.prerequisite_ids)
+            MasterySkill.id.in_(skill_data.prerequisite_ids)
         ).all()
         skill.prerequisites = prerequisites
     
     db.add(skill)
     db.commit()
     db.refresh(skill)
+    invalidate_skill_graph()
+    # Cached dashboards count and list skills
+    invalidate_response_cache()
     
     return {
         "skill": skill.to_dict(include_prerequisites=True),
@@ -139,27 +146,25 @@ def get_skill(
     """
     Get details for a specific skill including student progress.
     """
-    skill = db.query(MasterySkill).filter(MasterySkill.id == skill_id).first()
-    if not skill:
+    graph = get_skill_graph(db)
+    if skill_id not in graph.index:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Skill {skill_id} not found"
         )
+    i = graph.index[skill_id]
     
     # Get student mastery
-    mastery = db.query(StudentMastery).filter(
-        StudentMastery.student_id == current_student.id,
-        StudentMastery.skill_id == skill_id
-    ).first()
-    
-    # Check if unlocked
-    is_unlocked = skill.is_unlocked_for_student(current_student.id, db)
+    snapshot = get_mastery_snapshot(db, current_student.id)
     
     return {
-        "skill": skill.to_dict(include_prerequisites=True),
-        "mastery": mastery.to_dict() if mastery else None,
-        "is_unlocked": is_unlocked,
-        "unlocks": [{"id": s.id, "name": s.name} for s in skill.unlocks]
+        "skill": graph.skill_dict(i, include_prerequisites=True),
+        "mastery": snapshot.record(skill_id),
+        "is_unlocked": bool(snapshot.unlocked[i]),
+        "unlocks": [
+            {"id": int(graph.ids[j]), "name": graph.skill_dict(j)["name"]}
+            for j in graph.unlocks(i).tolist()
+        ]
     }
 
 
@@ -317,6 +322,9 @@ def create_badge(
     db.add(badge)
     db.commit()
     db.refresh(badge)
+    invalidate_badge_rules()
+    # Cached dashboards embed badge definitions
+    invalidate_response_cache()
     
     return {
         "badge": badge.to_dict(),
@@ -349,7 +357,7 @@ def check_badge_eligibility(
     Returns list of newly awarded badges.
     """
     service = BadgeService(db)
-    new_badges = service.check_and_award_badges(current_student.id)
+    new_badges = service.check_and_award_badges(current_student.id, full=True)
     
     return {
         "newly_earned": new_badges,
@@ -470,7 +478,7 @@ def get_study_plan(
     db.commit()
     
     return {
-        "plan": plan.to_dict(),
+        "plan": {**plan.to_dict(), "schedule": plan.export_schedule()},
         "expected_progress": plan.expected_progress(),
         "performance_trend": plan.performance_trend
     }
@@ -526,6 +534,46 @@ def get_today_tasks(
     return tasks
 
 
+@router.get("/study-plans/week/tasks")
+def get_week_tasks(
+    db: Session = Depends(get_db),
+    current_student: Student = Depends(get_current_student)
+):
+    """
+    Get study tasks due in the next 7 days (including today) from all active plans.
+    """
+    service = StudyPlanService(db)
+    start = datetime.now().date()
+    end = start + timedelta(days=6)
+    tasks = service.get_tasks_between(current_student.id, start, end)
+    
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        **tasks
+    }
+
+
+@router.put("/study-plans/tasks/{task_id}/complete")
+def complete_study_task(
+    task_id: int,
+    db: Session = Depends(get_db),
+    current_student: Student = Depends(get_current_student)
+):
+    """
+    Mark a single study plan task as completed.
+    """
+    service = StudyPlanService(db)
+    
+    try:
+        return service.complete_task(current_student.id, task_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
 @router.delete("/study-plans/{plan_id}")
 def delete_study_plan(
     plan_id: int,
@@ -600,25 +648,30 @@ def complete_study_plan(
 
 @router.get("/stats")
 def get_mastery_stats(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_student: Student = Depends(get_current_student)
 ):
     """
     Get comprehensive mastery statistics for student dashboard.
     Combines skills, badges, and study plan progress.
+    Cached until the student's state changes (or the day does); supports ETag/304.
     """
-    mastery_service = MasteryService(db)
-    badge_service = BadgeService(db)
-    study_plan_service = StudyPlanService(db)
-    
-    mastery_overview = mastery_service.get_student_mastery_overview(current_student.id)
-    badges = badge_service.get_student_badges(current_student.id)
-    today_tasks = study_plan_service.get_today_tasks(current_student.id)
+    def compute():
+        mastery_service = MasteryService(db)
+        badge_service = BadgeService(db)
+        study_plan_service = StudyPlanService(db)
+        
+        return {
+            "mastery": mastery_service.get_student_mastery_overview(current_student.id),
+            "badges": badge_service.get_student_badges(current_student.id),
+            "today_tasks": study_plan_service.get_today_tasks(current_student.id),
+            "student_id": current_student.id,
+            "username": current_student.username
+        }
     
-    return {
-        "mastery": mastery_overview,
-        "badges": badges,
-        "today_tasks": today_tasks,
-        "student_id": current_student.id,
-        "username": current_student.username
-    }
+    return cached_response(
+        request, response, "mastery.stats", current_student.id, compute,
+        scope=datetime.now().date()
+    )
@@ -2,7 +2,7 @@
 Recommendations API Endpoints
 Provides personalized content recommendations based on RL agent and learning style
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from app.core.database import get_db
@@ -11,19 +11,30 @@ from app.models.learning_style import LearningStyleProfile
 from app.api.deps import get_current_student
 from app.services.rl_agent import agent
 from app.services.student_model import StudentModelService
+from app.services.response_cache import cached_response
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
 
 @router.get("/dashboard")
 def get_dashboard_recommendations(
+    request: Request,
+    response: Response,
     current_student: Student = Depends(get_current_student),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
     Get personalized recommendations for dashboard
     Includes learning style-based tips and RL-recommended content
+    Cached until the student's state changes; supports ETag/304.
     """
+    return cached_response(
+        request, response, "recommendations.dashboard", current_student.id,
+        lambda: _build_dashboard_recommendations(db, current_student)
+    )
+
+
+def _build_dashboard_recommendations(db: Session, current_student: Student) -> Dict[str, Any]:
     # Get student's knowledge state
     knowledge_state = StudentModelService.get_knowledge_state(db, current_student.id)
     
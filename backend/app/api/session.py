@@ -10,6 +10,8 @@ from app.models.learning_style import LearningStyleProfile
 from app.models.schemas import SessionStart, AnswerSubmit, SessionResponse, ContentResponse
 from app.services.rl_agent import agent
 from app.services.student_model import StudentModelService
+from app.services.event_log import publish_event, EVENT_ANSWER
+from app.services.badge_engine import load_student_stats, record_session
 from typing import Optional
 import random
 import json
@@ -133,15 +135,18 @@ def submit_answer(answer_data: AnswerSubmit, username: str, db: Session = Depend
         student_level=state_before.get('accuracy_rate', 0.5)
     )
     
-    # Update student knowledge
-    updated_knowledge = StudentModelService.update_knowledge(
-        db=db,
-        student_id=student_id,
-        topic=content.topic,
-        is_correct=is_correct,
-        difficulty=content.difficulty,
-        time_spent=answer_data.time_spent
-    )
+    # Badge counters must exist before this answer is counted
+    stats = load_student_stats(db, student_id)
+    
+    # Record the answer; the knowledge materializer folds it into StudentKnowledge
+    publish_event(db, student_id, EVENT_ANSWER, {
+        "content_id": content.id,
+        "topic": content.topic,
+        "is_correct": is_correct,
+        "difficulty": content.difficulty,
+        "time_spent": answer_data.time_spent
+    })
+    db.commit()
     
     # Get state after update
     state_after = StudentModelService.get_knowledge_state(db, student_id)
@@ -153,6 +158,8 @@ def submit_answer(answer_data: AnswerSubmit, username: str, db: Session = Depend
         student_answer=answer_data.student_answer,
         is_correct=is_correct,
         time_spent=answer_data.time_spent,
+        time_spent_seconds=int(round(answer_data.time_spent or 0)),
+        concept_name=content.topic,
         attempts=1,
         state_before=state_before,
         action_taken={'content_id': content.id, 'difficulty': content.difficulty},
@@ -161,6 +168,7 @@ def submit_answer(answer_data: AnswerSubmit, username: str, db: Session = Depend
     )
     
     db.add(session)
+    record_session(stats)
     db.commit()
     
     # Update RL agent Q-table
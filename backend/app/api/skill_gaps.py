@@ -2,13 +2,14 @@
 Skill Gap Analysis API Endpoints
 Identifies learning gaps and provides targeted recommendations
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.core.database import get_db
-from app.models.models import Student, StudentKnowledge, LearningSession
+from app.models.models import Student
 from app.models.skill_gap import SkillGap, Skill, PreAssessmentResult
-from app.api.deps import get_current_student
+from app.api.deps import get_current_staff, get_current_student
+from app.services.skill_gap_service import analyze_cohort_gaps, detect_gaps
 from app.services.student_model import StudentModelService
 
 router = APIRouter(prefix="/skill-gaps", tags=["skill-gaps"])
@@ -20,71 +21,9 @@ def analyze_skill_gaps(
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
-    Analyze student's skill gaps based on performance history
+    Analyze student's skill gaps across every topic of the knowledge state
     """
-    # Get student's knowledge state
-    knowledge_state = StudentModelService.get_knowledge_state(db, current_student.id)
-    
-    # Get learning sessions to analyze performance patterns
-    sessions = db.query(LearningSession).filter(
-        LearningSession.student_id == current_student.id
-    ).order_by(LearningSession.timestamp.desc()).limit(50).all()
-    
-    # Analyze gaps
-    gaps = []
-    
-    # Check each topic
-    topics = ['algebra', 'calculus', 'geometry', 'statistics']
-    for topic in topics:
-        score_key = f'{topic}_score'
-        score = knowledge_state.get(score_key, 0.0)
-        
-        # Determine gap severity
-        if score < 0.3:
-            severity = "critical"
-        elif score < 0.5:
-            severity = "high"
-        elif score < 0.7:
-            severity = "medium"
-        else:
-            severity = "low"
-        
-        # Only report significant gaps
-        if score < 0.7:
-            # Check if gap already exists
-            existing_gap = db.query(SkillGap).filter(
-                SkillGap.student_id == current_student.id,
-                SkillGap.topic == topic
-            ).first()
-            
-            if existing_gap:
-                # Update existing gap
-                existing_gap.proficiency_level = score
-                existing_gap.gap_severity = severity
-            else:
-                # Create new gap
-                gap = SkillGap(
-                    student_id=current_student.id,
-                    topic=topic,
-                    proficiency_level=score,
-                    target_level=0.8,
-                    gap_severity=severity,
-                    assessment_method="session_analysis",
-                    priority=_calculate_priority(severity, score),
-                    estimated_time_hours=_estimate_time(score)
-                )
-                db.add(gap)
-            
-            gaps.append({
-                "topic": topic.capitalize(),
-                "current_level": score,
-                "target_level": 0.8,
-                "gap_percentage": (0.8 - score) * 100,
-                "severity": severity,
-                "estimated_hours": _estimate_time(score),
-                "priority": _calculate_priority(severity, score)
-            })
-    
+    gaps = detect_gaps(db, [current_student.id])[current_student.id]
     db.commit()
     
     # Get all stored gaps for this student
@@ -104,6 +43,20 @@ def analyze_skill_gaps(
     }
 
 
+@router.post("/cohort/analyze")
+def analyze_cohort_skill_gaps(
+    student_ids: Optional[List[int]] = Query(None),
+    current_staff: Student = Depends(get_current_staff),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Detect and store skill gaps for a cohort (default: every student) in
+    chunked batches, and report per-topic gap counts.
+    Staff only.
+    """
+    return analyze_cohort_gaps(db, student_ids)
+
+
 @router.get("/list")
 def list_skill_gaps(
     current_student: Student = Depends(get_current_student),
@@ -222,29 +175,6 @@ def get_knowledge_graph(
 
 
 # Helper functions
-def _calculate_priority(severity: str, score: float) -> int:
-    """Calculate priority (1-10) based on severity and score"""
-    base_priority = {
-        "critical": 10,
-        "high": 8,
-        "medium": 5,
-        "low": 3
-    }.get(severity, 5)
-    
-    # Adjust based on how far from target
-    gap_size = 0.8 - score
-    priority = base_priority + int(gap_size * 5)
-    
-    return min(10, max(1, priority))
-
-
-def _estimate_time(current_score: float) -> float:
-    """Estimate hours needed to close gap"""
-    gap = 0.8 - current_score
-    # Rough estimate: 10 hours per 0.1 gap
-    return round(gap * 100, 1)
-
-
 def _generate_recommendations(gaps: List[Dict]) -> List[str]:
     """Generate actionable recommendations"""
     recommendations = []
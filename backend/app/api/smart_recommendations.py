@@ -19,6 +19,16 @@ from app.models.smart_recommendations import (
 from app.api.auth import get_current_student
 from app.services.content_bandit import ContentBandit, calculate_content_reward
 from app.services.collaborative_filtering import CollaborativeFiltering
+from app.services.event_log import (
+    publish_event, interaction_matrix, EVENT_INTERACTION, EVENT_FLASHCARD_REVIEW
+)
+from app.services.review_queue import (
+    due_cards, count_due, upcoming_counts, schedule_card, unschedule_card, invalidate_review_queue
+)
+from app.services import fsrs
+from app.services.flashcard_service import submit_reviews
+from app.services.flashcard_pool import get_or_create_pool, add_pool_to_deck
+from app.services.retention_forecast import forecast
 from app.core.config import settings
 from app.services.llm.gemini_client import GeminiClient
 
@@ -221,6 +231,15 @@ async def record_content_interaction(
     )
     
     db.add(interaction)
+    publish_event(db, current_student.id, EVENT_INTERACTION, {
+        "content_id": content_id,
+        "interaction_type": interaction_type,
+        "rating": rating,
+        "implicit_rating": implicit_rating,
+        "time_spent": time_spent,
+        "completed": completed,
+        "score": score
+    })
     db.commit()
     db.refresh(interaction)
     
@@ -244,7 +263,7 @@ async def get_peer_based_recommendations(
     """
     # Initialize collaborative filtering
     cf = CollaborativeFiltering(db)
-    cf.build_interaction_matrix()
+    cf.load_matrix(interaction_matrix.refresh(db))
     
     # Get recommendations
     recommendations = cf.recommend_content(
@@ -294,7 +313,7 @@ async def find_similar_students(
     """Find students with similar learning patterns"""
     # Initialize collaborative filtering
     cf = CollaborativeFiltering(db)
-    cf.build_interaction_matrix()
+    cf.load_matrix(interaction_matrix.refresh(db))
     
     # Find similar students
     similar_students = cf.find_similar_students(
@@ -341,7 +360,7 @@ async def get_peer_learning_insights(
     """
     # Initialize collaborative filtering
     cf = CollaborativeFiltering(db)
-    cf.build_interaction_matrix()
+    cf.load_matrix(interaction_matrix.refresh(db))
     
     # Get insights
     insights = cf.get_peer_insights(
@@ -396,6 +415,18 @@ async def get_peer_learning_insights(
 class ReviewRequest(BaseModel):
     quality: int  # 0-5 scale (SM-2 algorithm)
 
+class BatchReviewItem(BaseModel):
+    flashcard_id: int
+    quality: int  # 0-5 scale
+    answered_at: Optional[datetime] = None
+
+class BatchReviewRequest(BaseModel):
+    reviews: List[BatchReviewItem]
+    duration_seconds: Optional[int] = None
+
+class SchedulerRequest(BaseModel):
+    scheduler: str  # "sm2" or "fsrs"
+
 class FlashcardGenerateRequest(BaseModel):
     topic: str
     count: int = 5
@@ -408,71 +439,67 @@ class FlashcardCreateRequest(BaseModel):
     difficulty: int = 3
     tags: List[str] = []
 
+def _generate_flashcards_with_gemini(topic: str, count: int) -> List[Dict]:
+    """Ask Gemini for `count` flashcards on `topic`"""
+    client = GeminiClient(api_key=settings.GEMINI_API_KEY)
+    
+    prompt = f"""
+    Generate {count} flashcards for the topic: "{topic}".
+    The flashcards should be suitable for a university student.
+    
+    Return a JSON object with a "flashcards" key containing a list of objects.
+    Each object must have:
+    - "concept_name": A short title for the concept (max 5 words)
+    - "question": The question or front of the card
+    - "answer": The answer or back of the card
+    - "difficulty": An integer from 1 (easy) to 5 (hard)
+    """
+    
+    response_json = client.generate_json(prompt)
+    data = json.loads(response_json)
+    
+    # Handle both { "flashcards": [...] } and [...] formats
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and "flashcards" in data:
+        return data["flashcards"]
+    raise ValueError("Invalid response format from AI")
+
+
 @router.post("/flashcards/generate")
-async def generate_flashcards(
+def generate_flashcards(
     request: FlashcardGenerateRequest,
     current_student: Student = Depends(get_current_student),
     db: Session = Depends(get_db)
 ):
-    """Generate flashcards using Gemini AI"""
-    if not settings.GEMINI_API_KEY:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Gemini API key not configured"
-        )
+    """
+    Generate flashcards using Gemini AI.
+    Cards for a topic are generated once and shared: later requests for the
+    same topic and count are served from the pool without calling Gemini.
+    Asking again once every pooled card is in the deck serves the next variant.
+    """
+    def generate(topic: str, count: int) -> List[Dict]:
+        if not settings.GEMINI_API_KEY:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Gemini API key not configured"
+            )
+        return _generate_flashcards_with_gemini(topic, count)
     
     try:
-        client = GeminiClient(api_key=settings.GEMINI_API_KEY)
-        
-        prompt = f"""
-        Generate {request.count} flashcards for the topic: "{request.topic}".
-        The flashcards should be suitable for a university student.
-        
-        Return a JSON object with a "flashcards" key containing a list of objects.
-        Each object must have:
-        - "concept_name": A short title for the concept (max 5 words)
-        - "question": The question or front of the card
-        - "answer": The answer or back of the card
-        - "difficulty": An integer from 1 (easy) to 5 (hard)
-        """
+        pool, hit = get_or_create_pool(db, request.topic, request.count, generate, current_student.id)
+        created_cards = add_pool_to_deck(db, current_student.id, pool, tags=[request.topic])
         
-        response_json = client.generate_json(prompt)
-        data = json.loads(response_json)
-        
-        # Handle both { "flashcards": [...] } and [...] formats
-        if isinstance(data, list):
-            cards_list = data
-        elif isinstance(data, dict) and "flashcards" in data:
-            cards_list = data["flashcards"]
-        else:
-            raise ValueError("Invalid response format from AI")
-            
-        created_cards = []
-        for card_data in cards_list:
-            flashcard = FlashCard(
-                student_id=current_student.id,
-                concept_name=card_data.get("concept_name", "Concept"),
-                question=card_data.get("question", ""),
-                answer=card_data.get("answer", ""),
-                difficulty=card_data.get("difficulty", 3),
-                next_review_date=datetime.utcnow(),
-                tags=[request.topic]
-            )
-            db.add(flashcard)
-            created_cards.append(flashcard)
-            
-        db.commit()
-        
-        # Refresh to get IDs
-        for card in created_cards:
-            db.refresh(card)
-            
         return {
             "message": f"Generated {len(created_cards)} flashcards",
+            "source": "pool" if hit else "generated",
             "flashcards": created_cards
         }
-        
+    
+    except HTTPException:
+        raise
     except Exception as e:
+        db.rollback()
         print(f"Error generating flashcards: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -499,6 +526,7 @@ async def create_flashcard(
     db.add(flashcard)
     db.commit()
     db.refresh(flashcard)
+    schedule_card(flashcard)
     
     return {
         "message": "Flashcard created",
@@ -509,22 +537,29 @@ async def create_flashcard(
 
 @router.get("/flashcards/due")
 async def get_due_flashcards(
+    limit: int = 50,
+    cursor: Optional[str] = None,
     current_student: Student = Depends(get_current_student),
     db: Session = Depends(get_db)
 ):
-    """Get all flashcards due for review"""
+    """
+    Get flashcards due for review, most overdue first.
+    Pass `next_cursor` from the response as `cursor` for the next page.
+    """
     now = datetime.utcnow()
     
-    due_cards = db.query(FlashCard).filter(
-        and_(
-            FlashCard.student_id == current_student.id,
-            FlashCard.next_review_date <= now
+    try:
+        page, next_cursor = due_cards(db, current_student.id, now, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
-    ).order_by(FlashCard.next_review_date).all()
     
     return {
         "student_id": current_student.id,
-        "due_count": len(due_cards),
+        "due_count": count_due(db, current_student.id, now),
+        "next_cursor": next_cursor,
         "flashcards": [
             {
                 "id": card.id,
@@ -540,7 +575,7 @@ async def get_due_flashcards(
                 "next_review_date": card.next_review_date.isoformat(),
                 "overdue_days": (now - card.next_review_date).days if now > card.next_review_date else 0
             }
-            for card in due_cards
+            for card in page
         ]
     }
 
@@ -553,7 +588,7 @@ async def review_flashcard(
     db: Session = Depends(get_db)
 ):
     """
-    Review a flashcard and update SM-2 scheduling
+    Review a flashcard and update its scheduling (SM-2 or FSRS, per card)
     
     Body:
         quality: 0-5 scale
@@ -589,10 +624,19 @@ async def review_flashcard(
     old_interval = flashcard.interval
     old_ease = flashcard.ease_factor
     
-    next_review = flashcard.calculate_sm2_next_review(review.quality)
+    if flashcard.scheduler == "fsrs":
+        weights = fsrs.get_weights(db, current_student.id)
+        next_review = fsrs.review_card(flashcard, review.quality, datetime.utcnow(), weights)
+    else:
+        next_review = flashcard.calculate_sm2_next_review(review.quality)
+    publish_event(db, current_student.id, EVENT_FLASHCARD_REVIEW, {
+        "flashcard_id": flashcard.id,
+        "quality": review.quality
+    })
     
     db.commit()
     db.refresh(flashcard)
+    schedule_card(flashcard)
     
     return {
         "message": "Review recorded",
@@ -605,7 +649,68 @@ async def review_flashcard(
         "next_review_date": next_review.isoformat(),
         "days_until_next_review": flashcard.interval,
         "retention_rate": round(flashcard.get_retention_rate(), 1),
-        "streak": flashcard.streak
+        "streak": flashcard.streak,
+        "scheduler": flashcard.scheduler or "sm2",
+        "stability": round(flashcard.stability, 2) if flashcard.stability is not None else None
+    }
+
+
+@router.post("/flashcards/reviews")
+async def review_flashcards_batch(
+    request: BatchReviewRequest,
+    current_student: Student = Depends(get_current_student),
+    db: Session = Depends(get_db)
+):
+    """
+    Submit a whole review session at once.
+    All cards are rescheduled and a ReviewSession summary is recorded in a
+    single transaction.
+    """
+    try:
+        return submit_reviews(
+            db,
+            current_student.id,
+            [(item.flashcard_id, item.quality, item.answered_at) for item in request.reviews],
+            duration_seconds=request.duration_seconds
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.put("/flashcards/scheduler")
+async def set_flashcard_scheduler(
+    request: SchedulerRequest,
+    current_student: Student = Depends(get_current_student),
+    db: Session = Depends(get_db)
+):
+    """
+    Switch all of the student's flashcards between SM-2 and FSRS.
+    Switching to FSRS reschedules the whole deck in one pass.
+    """
+    if request.scheduler not in ("sm2", "fsrs"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Scheduler must be 'sm2' or 'fsrs'"
+        )
+    
+    updated = db.query(FlashCard).filter(
+        FlashCard.student_id == current_student.id
+    ).update({FlashCard.scheduler: request.scheduler}, synchronize_session=False)
+    
+    rescheduled = 0
+    if request.scheduler == "fsrs":
+        rescheduled = fsrs.reschedule_deck(db, current_student.id)
+    
+    db.commit()
+    invalidate_review_queue(current_student.id)
+    
+    return {
+        "scheduler": request.scheduler,
+        "cards": updated,
+        "rescheduled_cards": rescheduled
     }
 
 
@@ -615,39 +720,41 @@ async def get_upcoming_reviews(
     current_student: Student = Depends(get_current_student),
     db: Session = Depends(get_db)
 ):
-    """Get upcoming flashcard reviews for next N days"""
+    """Get the number of flashcard reviews due on each of the next N days"""
     now = datetime.utcnow()
     future = now + timedelta(days=days)
     
-    upcoming = db.query(FlashCard).filter(
-        and_(
-            FlashCard.student_id == current_student.id,
-            FlashCard.next_review_date > now,
-            FlashCard.next_review_date <= future
-        )
-    ).order_by(FlashCard.next_review_date).all()
-    
-    # Group by day
-    reviews_by_day = {}
-    for card in upcoming:
-        day_key = card.next_review_date.date().isoformat()
-        if day_key not in reviews_by_day:
-            reviews_by_day[day_key] = []
-        reviews_by_day[day_key].append({
-            "id": card.id,
-            "concept_name": card.concept_name,
-            "difficulty": card.difficulty,
-            "interval": card.interval
-        })
+    reviews_by_day = upcoming_counts(db, current_student.id, now, future)
     
     return {
         "student_id": current_student.id,
         "days_ahead": days,
-        "total_upcoming": len(upcoming),
+        "total_upcoming": sum(reviews_by_day.values()),
         "reviews_by_day": reviews_by_day
     }
 
 
+@router.get("/flashcards/forecast")
+async def get_review_forecast(
+    days: int = 30,
+    max_reviews_per_day: Optional[int] = None,
+    current_student: Student = Depends(get_current_student),
+    db: Session = Depends(get_db)
+):
+    """
+    Project the daily review load and expected retention of the whole deck
+    over the next N days. With max_reviews_per_day, reviews beyond the cap are
+    postponed and reported as backlog.
+    """
+    try:
+        return forecast(db, current_student.id, days=days, max_reviews_per_day=max_reviews_per_day)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.get("/flashcards/stats")
 async def get_flashcard_statistics(
     current_student: Student = Depends(get_current_student),
@@ -718,6 +825,7 @@ async def delete_flashcard(
     
     db.delete(flashcard)
     db.commit()
+    unschedule_card(current_student.id, flashcard_id)
     
     return {"message": "Flashcard deleted"}
 
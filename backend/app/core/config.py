@@ -23,6 +23,7 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    STAFF_USERNAMES: list = []  # Teachers/admins allowed to read other students' data
     
     # CORS
     FRONTEND_URL: str = "http://localhost:3000"
@@ -1,14 +1,18 @@
 # Models package
-from app.models.models import Student, Content, LearningSession, StudentKnowledge, PerformanceMetrics
+from app.models.models import (
+    Student, Content, LearningSession, StudentKnowledge, PerformanceMetrics, StudentActivity
+)
 from app.models.learning_style import LearningStyleProfile
 from app.models.skill_gap import SkillGap, Skill, PreAssessmentResult
-from app.models.learning_pace import LearningPace, ConceptTimeLog
+from app.models.learning_pace import LearningPace, ConceptTimeLog, PaceBaseline
 from app.models.smart_recommendations import (
-    BanditState, UserInteraction, SimilarStudent, FlashCard, ReviewSession
+    BanditState, UserInteraction, SimilarStudent, FlashCard, FlashCardPool, PooledFlashCard,
+    SRSParameters, ReviewSession
 )
 from app.models.mastery import (
-    MasterySkill, StudentMastery, Badge, StudentBadge, StudyPlan
+    MasterySkill, StudentMastery, Badge, StudentBadge, StudentStats, StudyPlan, StudyPlanTask
 )
+from app.models.events import LearningEvent, MaterializerOffset
 
 __all__ = [
     "Student",
@@ -16,20 +20,29 @@ __all__ = [
     "LearningSession",
     "StudentKnowledge",
     "PerformanceMetrics",
+    "StudentActivity",
     "LearningStyleProfile",
     "SkillGap",
     "Skill",
     "PreAssessmentResult",
     "LearningPace",
     "ConceptTimeLog",
+    "PaceBaseline",
     "BanditState",
     "UserInteraction",
     "SimilarStudent",
     "FlashCard",
+    "FlashCardPool",
+    "PooledFlashCard",
+    "SRSParameters",
     "ReviewSession",
     "MasterySkill",
     "StudentMastery",
     "Badge",
     "StudentBadge",
-    "StudyPlan"
+    "StudentStats",
+    "StudyPlan",
+    "StudyPlanTask",
+    "LearningEvent",
+    "MaterializerOffset"
 ]
@@ -0,0 +1,56 @@
+"""
+Learning Event Log Models
+Append-only log of answer/review/interaction events and the per-consumer
+offsets used by materializers to fold it into derived state.
+"""
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class LearningEvent(Base):
+    """
+    One immutable learning event.
+
+    The autoincrement primary key is the log offset: it is monotonically
+    increasing and rows are never updated or deleted, so any materializer can
+    be replayed from offset 0.
+
+    Attributes:
+        id: Log offset
+        student_id: Student the event belongs to
+        event_type: "answer", "skill_assessment", "flashcard_review" or "interaction"
+        payload: Compact event body (see app.services.event_log for the schema per type)
+        created_at: When the event happened
+    """
+    __tablename__ = "learning_events"
+    __table_args__ = (
+        Index("ix_learning_events_student_offset", "student_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    event_type = Column(String(32), nullable=False, index=True)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    def __repr__(self):
+        return f"<LearningEvent(offset={self.id}, student={self.student_id}, type={self.event_type})>"
+
+
+class MaterializerOffset(Base):
+    """
+    Last log offset a materializer has applied for a student.
+    Materializers are checkpointed per student so the live write path can
+    catch up a single student without scanning the whole log.
+    """
+    __tablename__ = "materializer_offsets"
+
+    materializer = Column(String(64), primary_key=True)
+    student_id = Column(Integer, primary_key=True)
+    last_offset = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f"<MaterializerOffset({self.materializer}, student={self.student_id}, offset={self.last_offset})>"
@@ -18,7 +18,7 @@ class LearningPace(Base):
         difficulty_preference: Preferred difficulty level (1-10)
         fast_track_mode: Boolean indicating if student prefers accelerated learning
         deep_dive_mode: Boolean indicating if student prefers thorough learning
-        time_on_task_data: JSON storing concept-wise time spent
+        time_on_task_data: JSON storing running time-on-task statistics per concept
         total_concepts_completed: Count of completed concepts
         avg_time_per_concept_seconds: Average time spent per concept
         completion_rate: Percentage of concepts completed successfully
@@ -39,7 +39,7 @@ class LearningPace(Base):
     deep_dive_mode = Column(Boolean, default=False)
     
     # Time tracking
-    time_on_task_data = Column(JSON, default=dict)  # {concept: avg_time_seconds}
+    time_on_task_data = Column(JSON, default=dict)  # {concept: {count, correct, mean, m2}}
     total_concepts_completed = Column(Integer, default=0)
     avg_time_per_concept_seconds = Column(Float, default=0.0)
     completion_rate = Column(Float, default=0.0)  # Percentage 0-100
@@ -58,6 +58,44 @@ class LearningPace(Base):
     def __repr__(self):
         return f"<LearningPace(student_id={self.student_id}, avg_speed={self.avg_speed}, difficulty={self.difficulty_preference})>"
     
+    def record_time_on_task(self, concept: str, seconds: float, is_correct: bool):
+        """
+        Fold one answer into the concept's running statistics (Welford's
+        algorithm: count, mean and M2, the sum of squared deviations)
+        """
+        data = dict(self.time_on_task_data or {})
+        stats = data.get(concept)
+        if not isinstance(stats, dict):
+            stats = {"count": 0, "correct": 0, "mean": 0.0, "m2": 0.0}
+        count = stats["count"] + 1
+        delta = seconds - stats["mean"]
+        mean = stats["mean"] + delta / count
+        data[concept] = {
+            "count": count,
+            "correct": stats["correct"] + (1 if is_correct else 0),
+            "mean": mean,
+            "m2": stats["m2"] + delta * (seconds - mean),
+        }
+        # Reassigned so the JSON column is flagged dirty
+        self.time_on_task_data = data
+    
+    def concept_stats(self) -> dict:
+        """Count, correct answers, mean and sample variance of time on task per concept"""
+        return {
+            concept: {
+                "count": stats["count"],
+                "correct": stats["correct"],
+                "mean": stats["mean"],
+                "variance": stats["m2"] / (stats["count"] - 1) if stats["count"] > 1 else 0.0,
+            }
+            for concept, stats in (self.time_on_task_data or {}).items()
+            if isinstance(stats, dict) and stats.get("count")
+        }
+    
+    def time_by_concept(self) -> dict:
+        """Average seconds per answer for each concept"""
+        return {concept: round(stats["mean"], 1) for concept, stats in self.concept_stats().items()}
+    
     def get_pace_category(self) -> str:
         """Categorize learning pace"""
         if self.avg_speed >= 1.5:
@@ -168,3 +206,38 @@ class ConceptTimeLog(Base):
         # Speed = baseline / actual (faster = higher number)
         speed = baseline_seconds / self.time_spent_seconds
         return round(speed, 2)
+
+
+class PaceBaseline(Base):
+    """
+    Population time-on-task baseline for one concept, recomputed nightly
+    
+    Attributes:
+        concept_name: Name of the concept/topic ("default" covers all concepts)
+        median_seconds: Median of the students' average time per answer
+        p25_seconds: 25th percentile of the students' average times
+        p75_seconds: 75th percentile of the students' average times
+        student_count: Students that contributed to the baseline
+        answer_count: Answers behind those students' averages
+        computed_at: When the baseline was computed
+    """
+    __tablename__ = "pace_baselines"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    concept_name = Column(String(200), unique=True, nullable=False)
+    
+    median_seconds = Column(Float, nullable=False)
+    p25_seconds = Column(Float, nullable=False)
+    p75_seconds = Column(Float, nullable=False)
+    
+    student_count = Column(Integer, default=0)
+    answer_count = Column(Integer, default=0)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PaceBaseline(concept={self.concept_name}, median={self.median_seconds}s)>"
+    
+    @property
+    def iqr_seconds(self) -> float:
+        """Interquartile range of the students' average times"""
+        return self.p75_seconds - self.p25_seconds
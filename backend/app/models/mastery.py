@@ -5,7 +5,7 @@ Phase 13: Mastery-Based Progression Models
 - Personalized study plans
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text, JSON, Table
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Date, Text, JSON, Table, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Set
@@ -101,6 +101,9 @@ class StudentMastery(Base):
     Mastery levels: 0=Not Started, 1=Beginner, 2=Developing, 3=Proficient, 4=Advanced, 5=Master
     """
     __tablename__ = "student_mastery"
+    __table_args__ = (
+        Index("ix_student_mastery_student_skill", "student_id", "skill_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
@@ -130,11 +133,14 @@ class StudentMastery(Base):
     student = relationship("app.models.models.Student", back_populates="skill_mastery")
     skill = relationship("app.models.mastery.MasterySkill", back_populates="student_mastery")
     
-    def update_mastery(self, correct: bool, time_spent: int = 0):
+    def update_mastery(self, correct: bool, time_spent: int = 0, assessed_at: Optional[datetime] = None):
         """
         Update mastery level based on performance.
         Uses accuracy and practice time to calculate mastery.
+        assessed_at defaults to now; event replays pass the original event time.
         """
+        assessed_at = assessed_at or datetime.now()
+        
         # Update attempts
         self.total_attempts += 1
         if correct:
@@ -150,7 +156,7 @@ class StudentMastery(Base):
         if self.accuracy >= 95 and self.total_attempts >= 20:
             self.mastery_level = 5  # Master
             if not self.mastered_at:
-                self.mastered_at = datetime.now()
+                self.mastered_at = assessed_at
         elif self.accuracy >= 85 and self.total_attempts >= 15:
             self.mastery_level = 4  # Advanced
         elif self.accuracy >= 75 and self.total_attempts >= 10:
@@ -165,7 +171,7 @@ class StudentMastery(Base):
         # Update progress percentage (normalized to 0-100)
         self.progress_percentage = min(100, (self.mastery_level / 5.0) * 100)
         
-        self.last_assessed_at = datetime.now()
+        self.last_assessed_at = assessed_at
         self.updated_at = datetime.now()
     
     def to_dict(self) -> Dict:
@@ -314,6 +320,45 @@ class StudentBadge(Base):
         return data
 
 
+class StudentStats(Base):
+    """
+    Per-student badge counters, maintained incrementally as students are
+    assessed and answer questions, so badge checks never rescan history.
+    Streaks come from the activity calendar (StudentActivity).
+    """
+    __tablename__ = "student_stats"
+    
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    
+    # Counters
+    mastered_skills = Column(Integer, default=0)  # Skills at level 5
+    total_skills = Column(Integer, default=0)  # Skills with a mastery record
+    total_attempts = Column(Integer, default=0)
+    correct_attempts = Column(Integer, default=0)
+    total_sessions = Column(Integer, default=0)
+    mastered_by_category = Column(JSON)  # {"Algebra": 3, ...}
+    
+    # Stat keys changed since badges were last evaluated
+    pending_stats = Column(JSON)
+    
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def to_dict(self) -> Dict:
+        """Flat stats dictionary used for badge criteria and evidence"""
+        data = {
+            "student_id": self.student_id,
+            "mastered_skills": self.mastered_skills,
+            "total_skills": self.total_skills,
+            "total_attempts": self.total_attempts,
+            "correct_attempts": self.correct_attempts,
+            "accuracy": (self.correct_attempts / self.total_attempts * 100) if self.total_attempts > 0 else 0,
+            "total_sessions": self.total_sessions,
+        }
+        for category, count in (self.mastered_by_category or {}).items():
+            data[f"mastered_skills.{category}"] = count
+        return data
+
+
 class StudyPlan(Base):
     """
     Personalized study plan generated for a student.
@@ -334,8 +379,9 @@ class StudyPlan(Base):
     target_date = Column(DateTime)
     daily_minutes = Column(Integer, default=30)  # Recommended daily study time
     
-    # Schedule (stored as JSON)
-    schedule = Column(JSON)  # Daily/weekly breakdown of topics
+    # Schedule metadata (total_days, skills_count); the tasks themselves live
+    # in study_plan_tasks and are exported to JSON by export_schedule()
+    schedule = Column(JSON)
     
     # Progress tracking
     progress_percentage = Column(Float, default=0.0)
@@ -358,23 +404,33 @@ class StudyPlan(Base):
     
     # Relationships
     student = relationship("app.models.models.Student", back_populates="study_plans")
+    tasks = relationship(
+        "app.models.mastery.StudyPlanTask",
+        back_populates="plan",
+        cascade="all, delete-orphan",
+        order_by="[StudyPlanTask.day, StudyPlanTask.id]"
+    )
+    
+    def export_schedule(self) -> Dict:
+        """Schedule in its JSON export format, built from the plan's tasks"""
+        return {
+            **(self.schedule or {}),
+            "daily_tasks": [task.to_dict() for task in self.tasks]
+        }
     
     def calculate_progress(self, db) -> float:
         """
         Calculate progress percentage based on skill mastery.
         """
+        from app.services.mastery_snapshot import get_mastery_snapshot
+        
         if not self.target_skills or len(self.target_skills) == 0:
             return 0.0
         
+        snapshot = get_mastery_snapshot(db, self.student_id)
         total_progress = 0.0
         for skill_id in self.target_skills:
-            mastery = db.query(StudentMastery).filter(
-                StudentMastery.student_id == self.student_id,
-                StudentMastery.skill_id == skill_id
-            ).first()
-            
-            if mastery:
-                total_progress += mastery.progress_percentage
+            total_progress += snapshot.progress_of(skill_id)
         
         self.progress_percentage = total_progress / len(self.target_skills)
         return self.progress_percentage
@@ -435,3 +491,48 @@ class StudyPlan(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "target_date": self.target_date.isoformat() if self.target_date else None,
         }
+
+
+class StudyPlanTask(Base):
+    """
+    One scheduled task of a study plan.
+    Indexed by (student_id, due_date) so "today" and "this week" are range scans.
+    """
+    __tablename__ = "study_plan_tasks"
+    __table_args__ = (
+        Index("ix_study_plan_tasks_student_due", "student_id", "due_date", "plan_id"),
+        Index("ix_study_plan_tasks_plan_day", "plan_id", "day"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    plan_id = Column(Integer, ForeignKey("study_plans.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    
+    # Schedule
+    day = Column(Integer, nullable=False)  # Days since the plan started
+    due_date = Column(Date, nullable=False)
+    skill_id = Column(Integer, ForeignKey("mastery_skills.id"))
+    skill_name = Column(String)
+    minutes = Column(Integer, default=0)
+    task_type = Column(String)  # "learn" or "review"
+    
+    # Completion
+    is_completed = Column(Boolean, default=False)
+    completed_at = Column(DateTime)
+    
+    # Relationships
+    plan = relationship("app.models.mastery.StudyPlan", back_populates="tasks")
+    
+    def to_dict(self) -> Dict:
+        """Convert to dictionary representation (the schedule export format)"""
+        return {
+            "id": self.id,
+            "day": self.day,
+            "date": self.due_date.isoformat() if self.due_date else None,
+            "skill_id": self.skill_id,
+            "skill_name": self.skill_name,
+            "minutes": self.minutes,
+            "task_type": self.task_type,
+            "is_completed": bool(self.is_completed),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+        }
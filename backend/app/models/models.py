@@ -1,7 +1,9 @@
 """
 Database models for RL Educational Tutor
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, JSON
+from sqlalchemy import (
+    Column, Integer, String, Float, DateTime, Date, ForeignKey, Boolean, Text, JSON, LargeBinary, UniqueConstraint, Index
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -54,6 +56,10 @@ class Content(Base):
 class LearningSession(Base):
     """Track individual learning interactions"""
     __tablename__ = "learning_sessions"
+    __table_args__ = (
+        # Per-student time windows for the analytics aggregates
+        Index("ix_learning_sessions_student_timestamp", "student_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
@@ -128,8 +134,15 @@ class StudentKnowledge(Base):
 
 
 class PerformanceMetrics(Base):
-    """Aggregate performance metrics for analytics"""
+    """
+    Per-student daily rollup of answers for analytics: one row per (student,
+    day), `date` being midnight of the day. Maintained from the learning event
+    log; see PerformanceMaterializer in app.services.event_log.
+    """
     __tablename__ = "performance_metrics"
+    __table_args__ = (
+        UniqueConstraint("student_id", "date", name="uq_performance_metrics_student_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
@@ -147,3 +160,53 @@ class PerformanceMetrics(Base):
     streak_days = Column(Integer, default=0)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def to_chart_point(self) -> dict:
+        """Serialize for the performance chart"""
+        attempts = self.questions_attempted or 0
+        correct = self.questions_correct or 0
+        total_time = self.total_time_spent or 0.0
+        return {
+            "date": self.date.date().isoformat(),
+            "attempts": attempts,
+            "correct": correct,
+            "accuracy": correct / attempts if attempts > 0 else 0,
+            "avg_reward": 0.0,
+            "total_time": total_time,
+            "avg_time": total_time / attempts if attempts > 0 else 0,
+            "average_difficulty": self.average_difficulty,
+            "topics_covered": self.topics_covered or [],
+            "streak_days": self.streak_days or 0
+        }
+
+
+class StudentActivity(Base):
+    """
+    Per-student activity calendar: bit i of `days` (little-endian) is set when
+    the student was active on `epoch` + i days. Maintained from the learning
+    event log; see app.services.streak_service.
+    """
+    __tablename__ = "student_activity"
+    
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    epoch = Column(Date, nullable=False)  # Day represented by bit 0
+    days = Column(LargeBinary, nullable=False, default=b"")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def mark(self, day):
+        """Set the bit for `day`, growing (or re-basing) the bitmap as needed"""
+        if self.epoch is None:
+            self.epoch = day
+        offset = (day - self.epoch).days
+        
+        if offset < 0:
+            bits = int.from_bytes(self.days or b"", "little") << -offset | 1
+            self.epoch = day
+            self.days = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+            return
+        
+        data = bytearray(self.days or b"")
+        if offset >> 3 >= len(data):
+            data.extend(bytes((offset >> 3) + 1 - len(data)))
+        data[offset >> 3] |= 1 << (offset & 7)
+        self.days = bytes(data)
@@ -2,9 +2,10 @@
 Smart Recommendations Models
 Includes Multi-Armed Bandit, Collaborative Filtering, and Spaced Repetition
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, JSON, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, JSON, DateTime, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
+from typing import Optional
 from app.core.database import Base
 
 
@@ -148,21 +149,32 @@ class FlashCard(Base):
     Spaced Repetition System (SRS) flashcards using SM-2 algorithm
     """
     __tablename__ = "flashcards"
+    __table_args__ = (
+        # Due queues are range scans in (next_review_date, id) order per student
+        Index("ix_flashcards_student_next_review", "student_id", "next_review_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
     
-    # Card content
+    # Card content; generated cards reference a shared pooled card instead
+    # of storing their own question and answer
     concept_id = Column(Integer, ForeignKey("content.id"))
     concept_name = Column(String(200), nullable=False)
-    question = Column(Text, nullable=False)
-    answer = Column(Text, nullable=False)
+    question_text = Column("question", Text)
+    answer_text = Column("answer", Text)
+    pooled_card_id = Column(Integer, ForeignKey("pooled_flashcards.id"), index=True)
     
     # SM-2 algorithm parameters
     interval = Column(Integer, default=1)  # Days until next review
     repetitions = Column(Integer, default=0)  # Number of successful reviews
     ease_factor = Column(Float, default=2.5)  # Ease factor (minimum 1.3)
     
+    # FSRS memory state, used when scheduler == "fsrs"
+    scheduler = Column(String(10), default="sm2")  # "sm2" or "fsrs"
+    stability = Column(Float)  # Days until recall probability falls to 90%
+    memory_difficulty = Column(Float)  # 1-10 scale
+    
     # Review scheduling
     next_review_date = Column(DateTime, default=datetime.utcnow)
     last_reviewed = Column(DateTime)
@@ -180,6 +192,23 @@ class FlashCard(Base):
     # Relationships
     student = relationship("Student")
     concept = relationship("Content")
+    pooled_card = relationship("PooledFlashCard", lazy="selectin")
+    
+    @property
+    def question(self) -> Optional[str]:
+        return self.pooled_card.question if self.pooled_card_id is not None else self.question_text
+    
+    @question.setter
+    def question(self, value: str):
+        self.question_text = value
+    
+    @property
+    def answer(self) -> Optional[str]:
+        return self.pooled_card.answer if self.pooled_card_id is not None else self.answer_text
+    
+    @answer.setter
+    def answer(self, value: str):
+        self.answer_text = value
     
     def __repr__(self):
         return f"<FlashCard(student={self.student_id}, concept={self.concept_name}, next_review={self.next_review_date})>"
@@ -188,12 +217,13 @@ class FlashCard(Base):
         """Check if card is due for review"""
         return datetime.utcnow() >= self.next_review_date
     
-    def calculate_sm2_next_review(self, quality: int):
+    def calculate_sm2_next_review(self, quality: int, reviewed_at: Optional[datetime] = None):
         """
         Calculate next review date using SM-2 algorithm
         
         Args:
             quality: 0-5 scale (0=complete blackout, 5=perfect response)
+            reviewed_at: When the card was answered (default: now, UTC)
         
         SM-2 Algorithm:
         - EF' = EF + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
@@ -228,9 +258,10 @@ class FlashCard(Base):
             self.repetitions += 1
         
         # Update review tracking
+        reviewed_at = reviewed_at or datetime.utcnow()
         self.total_reviews += 1
-        self.last_reviewed = datetime.utcnow()
-        self.next_review_date = datetime.utcnow() + timedelta(days=self.interval)
+        self.last_reviewed = reviewed_at
+        self.next_review_date = reviewed_at + timedelta(days=self.interval)
         
         return self.next_review_date
     
@@ -241,6 +272,81 @@ class FlashCard(Base):
         return (self.correct_reviews / self.total_reviews) * 100
 
 
+class FlashCardPool(Base):
+    """
+    Generated flashcards for one (normalized topic, card count), stored once
+    and shared by every student who asks for that topic. Further variants are
+    generated for students who already have every earlier one in their deck.
+    """
+    __tablename__ = "flashcard_pools"
+    __table_args__ = (
+        UniqueConstraint("topic_key", "card_count", "variant", name="uq_flashcard_pools_topic_count_variant"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    topic_key = Column(String(200), nullable=False)  # Normalized topic
+    topic = Column(String(200))  # As first requested
+    card_count = Column(Integer, nullable=False)
+    variant = Column(Integer, nullable=False, default=0)  # 0 for the first generation
+    
+    hit_count = Column(Integer, default=0)  # Requests served without generating
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    cards = relationship(
+        "PooledFlashCard",
+        back_populates="pool",
+        cascade="all, delete-orphan",
+        order_by="PooledFlashCard.position"
+    )
+    
+    def __repr__(self):
+        return (
+            f"<FlashCardPool(topic={self.topic_key}, count={self.card_count}, "
+            f"variant={self.variant}, hits={self.hit_count})>"
+        )
+
+
+class PooledFlashCard(Base):
+    """
+    One generated card of a FlashCardPool; students' FlashCard rows point here
+    """
+    __tablename__ = "pooled_flashcards"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    pool_id = Column(Integer, ForeignKey("flashcard_pools.id"), nullable=False, index=True)
+    position = Column(Integer, default=0)
+    
+    concept_name = Column(String(200), nullable=False)
+    question = Column(Text, nullable=False)
+    answer = Column(Text, nullable=False)
+    difficulty = Column(Integer, default=3)  # 1-5 scale
+    
+    # Relationships
+    pool = relationship("FlashCardPool", back_populates="cards")
+    
+    def __repr__(self):
+        return f"<PooledFlashCard(pool={self.pool_id}, concept={self.concept_name})>"
+
+
+class SRSParameters(Base):
+    """
+    Fitted FSRS weights, per student or global (student_id NULL)
+    """
+    __tablename__ = "srs_parameters"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), unique=True)
+    
+    weights = Column(JSON, nullable=False)  # 17 FSRS-4.5 weights
+    log_loss = Column(Float)  # On the history the weights were fitted to
+    review_count = Column(Integer, default=0)
+    fitted_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<SRSParameters(student={self.student_id}, reviews={self.review_count}, log_loss={self.log_loss})>"
+
+
 class ReviewSession(Base):
     """
     Track flashcard review sessions
@@ -0,0 +1,302 @@
+"""
+Badge Engine
+Compiled badge rules evaluated against incrementally maintained student stats.
+
+Badge criteria (e.g. {"accuracy": 90, "total_attempts": 20}) are compiled once
+into (stat key, operator, threshold) clauses and indexed by the stat keys they
+read. Student counters live in StudentStats and are bumped as students are
+assessed and answer questions; each bump records which stat keys changed, so
+an evaluation only re-checks badges that depend on those keys (plus the
+time-dependent ones) and never rescans mastery or session history.
+"""
+import operator
+import threading
+from collections import defaultdict
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import case, event, func, insert
+from sqlalchemy.orm import Session
+
+from app.models.mastery import Badge, MasterySkill, StudentBadge, StudentMastery, StudentStats
+from app.models.models import LearningSession, Student
+from app.services.streak_service import current_streak
+from app.services.response_cache import touch_student
+
+
+# Stats that change with the calendar rather than with events
+TIME_DEPENDENT_STATS = ("current_streak", "account_age_days")
+
+# Mastery level counted as a mastered skill
+MASTERED_LEVEL = 5
+
+OPERATORS = {">=": operator.ge, "==": operator.eq, ">": operator.gt}
+
+
+class CompiledBadge(NamedTuple):
+    """A badge with its criteria compiled to clauses"""
+    id: int
+    badge: Dict
+    clauses: Tuple[Tuple[str, Callable, object], ...]
+
+    def matches(self, stats: Dict) -> bool:
+        if not self.badge["criteria"]:
+            return False
+        return all(op(stats.get(key, 0), threshold) for key, op, threshold in self.clauses)
+
+
+def compile_criteria(criteria: Optional[Dict]) -> Tuple[Tuple[str, Callable, object], ...]:
+    """
+    Compile a criteria dict into (stat key, operator, threshold) clauses.
+
+    Plain values are minimums and {"op": value} uses ">=", "==" or ">".
+    A "category" entry scopes "mastered_skills" to skills of that category.
+    """
+    if not criteria:
+        return ()
+
+    category = criteria.get("category")
+    clauses = []
+    for key, required in criteria.items():
+        if key == "category":
+            continue
+        if category and key == "mastered_skills":
+            key = f"mastered_skills.{category}"
+
+        if isinstance(required, dict):
+            op, threshold = next(iter(required.items()))
+            if op not in OPERATORS:
+                continue
+            clauses.append((key, OPERATORS[op], threshold))
+        else:
+            clauses.append((key, operator.ge, required))
+    return tuple(clauses)
+
+
+class BadgeRules:
+    """Active badges compiled and indexed by the stat keys they depend on"""
+
+    def __init__(self, badges: List[Badge]):
+        self.badges = [
+            CompiledBadge(badge.id, badge.to_dict(), compile_criteria(badge.criteria))
+            for badge in sorted(badges, key=lambda b: b.id)
+        ]
+        self.by_stat: Dict[str, List[CompiledBadge]] = defaultdict(list)
+        for compiled in self.badges:
+            for key in {clause[0] for clause in compiled.clauses}:
+                self.by_stat[key].append(compiled)
+
+    def candidates(self, stat_keys: Iterable[str]) -> List[CompiledBadge]:
+        """Badges depending on any of the given stat keys, in id order"""
+        found = {}
+        for key in stat_keys:
+            for compiled in self.by_stat.get(key, []):
+                found[compiled.id] = compiled
+        return [found[badge_id] for badge_id in sorted(found)]
+
+    @classmethod
+    def load(cls, db: Session) -> "BadgeRules":
+        return cls(db.query(Badge).filter(Badge.is_active == True).all())
+
+
+_rules: Optional[BadgeRules] = None
+_lock = threading.Lock()
+
+
+def get_badge_rules(db: Session) -> BadgeRules:
+    """Return the cached compiled rules, loading them on first use"""
+    global _rules
+    rules = _rules
+    if rules is not None:
+        return rules
+
+    with _lock:
+        if _rules is None:
+            _rules = BadgeRules.load(db)
+        return _rules
+
+
+def invalidate_badge_rules():
+    """Drop the compiled rules; call after badges are created or changed"""
+    global _rules
+    with _lock:
+        _rules = None
+
+
+_BADGES_CHANGED_KEY = "badges_changed"
+
+
+@event.listens_for(Session, "before_flush")
+def _track_badge_writes(session, flush_context, instances):
+    if any(isinstance(obj, Badge) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info[_BADGES_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_stale_rules(session):
+    # ORM writes to badges (e.g. toggling is_active) reach the compiled rules on commit
+    if session.info.pop(_BADGES_CHANGED_KEY, False):
+        invalidate_badge_rules()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_badge_writes(session):
+    session.info.pop(_BADGES_CHANGED_KEY, None)
+
+
+# ============================================================================
+# Student counters
+# ============================================================================
+
+def load_student_stats(db: Session, student_id: int) -> StudentStats:
+    """
+    Get the student's counters, initializing them from aggregate queries the
+    first time. Call before recording the event being counted.
+    """
+    stats = db.get(StudentStats, student_id)
+    if stats is not None:
+        return stats
+
+    mastered = case((StudentMastery.mastery_level >= MASTERED_LEVEL, 1), else_=0)
+    skills, attempts, correct, mastered_count = db.query(
+        func.count(StudentMastery.id),
+        func.coalesce(func.sum(StudentMastery.total_attempts), 0),
+        func.coalesce(func.sum(StudentMastery.correct_attempts), 0),
+        func.coalesce(func.sum(mastered), 0)
+    ).filter(StudentMastery.student_id == student_id).one()
+
+    by_category = db.query(MasterySkill.category, func.count(StudentMastery.id)).join(
+        StudentMastery, StudentMastery.skill_id == MasterySkill.id
+    ).filter(
+        StudentMastery.student_id == student_id,
+        StudentMastery.mastery_level >= MASTERED_LEVEL,
+        MasterySkill.category.isnot(None)
+    ).group_by(MasterySkill.category).all()
+
+    sessions = db.query(func.count(LearningSession.id)).filter(
+        LearningSession.student_id == student_id
+    ).scalar()
+
+    stats = StudentStats(
+        student_id=student_id,
+        mastered_skills=int(mastered_count),
+        total_skills=int(skills),
+        total_attempts=int(attempts),
+        correct_attempts=int(correct),
+        total_sessions=int(sessions or 0),
+        mastered_by_category={category: count for category, count in by_category},
+        pending_stats=[]
+    )
+    db.add(stats)
+    db.flush()
+    return stats
+
+
+def record_assessment(
+    stats: StudentStats,
+    correct: bool,
+    old_level: int,
+    new_level: int,
+    is_new_skill: bool,
+    category: Optional[str] = None
+):
+    """Count one skill assessment"""
+    changed = ["total_attempts", "accuracy"]
+    stats.total_attempts += 1
+    if correct:
+        stats.correct_attempts += 1
+        changed.append("correct_attempts")
+
+    if is_new_skill:
+        stats.total_skills += 1
+        changed.append("total_skills")
+
+    if new_level >= MASTERED_LEVEL > old_level:
+        stats.mastered_skills += 1
+        changed.append("mastered_skills")
+        if category:
+            by_category = dict(stats.mastered_by_category or {})
+            by_category[category] = by_category.get(category, 0) + 1
+            stats.mastered_by_category = by_category
+            changed.append(f"mastered_skills.{category}")
+
+    _mark_changed(stats, changed)
+
+
+def record_session(stats: StudentStats):
+    """Count one answered learning session"""
+    stats.total_sessions += 1
+    _mark_changed(stats, ["total_sessions"])
+
+
+def _mark_changed(stats: StudentStats, changed: List[str]):
+    """Remember which stat keys changed since the last evaluation"""
+    stats.pending_stats = sorted(set(stats.pending_stats or []) | set(changed))
+
+
+def student_stats(db: Session, stats: StudentStats) -> Dict:
+    """Counters plus the time-dependent stats, as used by badge criteria"""
+    student = db.get(Student, stats.student_id)
+    data = stats.to_dict()
+    data["current_streak"] = current_streak(db, stats.student_id)
+    data["account_age_days"] = (datetime.now() - student.created_at).days if student and student.created_at else 0
+    return data
+
+
+# ============================================================================
+# Awarding
+# ============================================================================
+
+def award_badges(
+    db: Session,
+    student_id: int,
+    verification_code: Callable[[int, int], str],
+    full: bool = False
+) -> List[Dict]:
+    """
+    Award every badge whose criteria the student now meets.
+
+    Only badges depending on stats changed since the last evaluation (and on
+    time-dependent stats) are checked unless `full` is set. New badges are
+    written with one bulk insert; the caller commits.
+    """
+    stats = load_student_stats(db, student_id)
+    rules = get_badge_rules(db)
+
+    if full:
+        candidates = rules.badges
+    else:
+        candidates = rules.candidates(list(stats.pending_stats or []) + list(TIME_DEPENDENT_STATS))
+    stats.pending_stats = []
+
+    if not candidates:
+        return []
+
+    earned = {
+        badge_id for (badge_id,) in db.query(StudentBadge.badge_id).filter(
+            StudentBadge.student_id == student_id,
+            StudentBadge.badge_id.in_([c.id for c in candidates])
+        ).all()
+    }
+
+    data = student_stats(db, stats)
+    newly_earned = [c for c in candidates if c.id not in earned and c.matches(data)]
+    if not newly_earned:
+        return []
+
+    now = datetime.now()
+    db.execute(insert(StudentBadge), [
+        {
+            "student_id": student_id,
+            "badge_id": c.id,
+            "earned_at": now,
+            "evidence": data,
+            "verification_code": verification_code(student_id, c.id),
+            "is_public": True,
+            "shared_count": 0
+        }
+        for c in newly_earned
+    ])
+    touch_student(db, student_id)
+    return [c.badge for c in newly_earned]
@@ -0,0 +1,292 @@
+"""
+Cohort Analytics
+Class-level aggregates and columnar exports for a set of students.
+
+Summaries read two compact sources with one query each - the students'
+StudentKnowledge rows and their daily PerformanceMetrics rollups - and
+aggregate them as numpy arrays: per-topic mastery distributions, per-day
+accuracy and time-on-task, and per-student totals. Exports stream the same
+rows to BI tools as Arrow IPC or Parquet in record batches, so memory stays
+bounded by the batch size rather than the cohort. Both roll up the students'
+events not yet materialized before reading PerformanceMetrics.
+"""
+import io
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterator, List, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.models import PerformanceMetrics, StudentKnowledge
+from app.services.event_log import performance_materializer
+from app.services.student_model import JEE_TOPICS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Only the columnar export needs pyarrow
+    pa = pq = None
+
+
+MAX_COHORT_SIZE = 5000
+
+# Topic score at which a topic counts as mastered (as in the progress summary)
+MASTERY_THRESHOLD = 0.7
+
+# Mastery histogram buckets: [0, 0.2), [0.2, 0.4), ..., [0.8, 1.0]
+HISTOGRAM_BINS = 5
+
+EXPORT_FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXPORT_TABLES = ("rollups", "knowledge")
+
+BATCH_ROWS = 10_000
+
+
+def _cohort(student_ids: Sequence[int]) -> List[int]:
+    ids = sorted(set(student_ids))
+    if not ids:
+        raise ValueError("The cohort has no students")
+    if len(ids) > MAX_COHORT_SIZE:
+        raise ValueError(f"At most {MAX_COHORT_SIZE} students per cohort")
+    return ids
+
+
+def _catch_up(db: Session, ids: List[int]):
+    """Apply each student's answer events not yet in the daily rollups"""
+    for student_id in ids:
+        performance_materializer.catch_up(db, student_id=student_id)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=np.float64), where=denominator > 0)
+
+
+def cohort_summary(db: Session, student_ids: Sequence[int], start: date, end: date) -> Dict:
+    """
+    Topic mastery distributions, daily accuracy and time-on-task trends and
+    per-student totals for the cohort over [start, end].
+    Rollups are caught up in the caller's transaction.
+    """
+    ids = _cohort(student_ids)
+    if end < start:
+        raise ValueError("end must not be before start")
+    _catch_up(db, ids)
+
+    # Topic mastery: one row per student, one column per topic
+    score_columns = [getattr(StudentKnowledge, f"{topic}_score") for topic in JEE_TOPICS]
+    knowledge = db.query(*score_columns).filter(StudentKnowledge.student_id.in_(ids)).all()
+    scores = np.array(knowledge, dtype=np.float64).reshape(len(knowledge), len(JEE_TOPICS))
+
+    topic_mastery = {}
+    if len(knowledge):
+        p25, median, p75 = np.nanpercentile(scores, [25, 50, 75], axis=0)
+        mean = np.nanmean(scores, axis=0)
+        bins = np.clip((np.nan_to_num(scores) * HISTOGRAM_BINS).astype(int), 0, HISTOGRAM_BINS - 1)
+        histogram = (bins[:, :, None] == np.arange(HISTOGRAM_BINS)).sum(axis=0)
+        mastered = (scores > MASTERY_THRESHOLD).sum(axis=0)
+        for t, topic in enumerate(JEE_TOPICS):
+            topic_mastery[topic] = {
+                "mean": round(float(mean[t]), 3),
+                "p25": round(float(p25[t]), 3),
+                "median": round(float(median[t]), 3),
+                "p75": round(float(p75[t]), 3),
+                "mastered_students": int(mastered[t]),
+                "histogram": histogram[t].tolist(),
+            }
+
+    # Daily rollups: one row per active student and day
+    rows = db.query(
+        PerformanceMetrics.student_id, PerformanceMetrics.date,
+        PerformanceMetrics.questions_attempted, PerformanceMetrics.questions_correct,
+        PerformanceMetrics.total_time_spent
+    ).filter(
+        PerformanceMetrics.student_id.in_(ids),
+        PerformanceMetrics.date >= datetime.combine(start, time.min),
+        PerformanceMetrics.date <= datetime.combine(end, time.min)
+    ).all()
+
+    n_days = (end - start).days + 1
+    student = np.searchsorted(ids, np.array([r[0] for r in rows], dtype=np.int64))
+    day = np.array([(r[1].date() - start).days for r in rows], dtype=np.int64)
+    attempts = np.array([r[2] or 0 for r in rows], dtype=np.float64)
+    correct = np.array([r[3] or 0 for r in rows], dtype=np.float64)
+    minutes = np.array([r[4] or 0.0 for r in rows], dtype=np.float64)
+
+    def per_day(weights=None):
+        return np.bincount(day, weights=weights, minlength=n_days)
+
+    def per_student(weights=None):
+        return np.bincount(student, weights=weights, minlength=len(ids))
+
+    day_active, day_attempts, day_correct, day_minutes = per_day(), per_day(attempts), per_day(correct), per_day(minutes)
+    day_accuracy = _ratio(day_correct, day_attempts)
+    day_minutes_per_student = _ratio(day_minutes, day_active.astype(np.float64))
+    daily = [
+        {
+            "date": (start + timedelta(days=d)).isoformat(),
+            "active_students": int(day_active[d]),
+            "attempts": int(day_attempts[d]),
+            "correct": int(day_correct[d]),
+            "accuracy": round(float(day_accuracy[d]), 3),
+            "minutes": round(float(day_minutes[d]), 1),
+            "minutes_per_active_student": round(float(day_minutes_per_student[d]), 1),
+        }
+        for d in range(n_days)
+    ]
+
+    student_attempts, student_correct = per_student(attempts), per_student(correct)
+    student_minutes, student_days = per_student(minutes), per_student()
+    student_accuracy = _ratio(student_correct, student_attempts)
+    students = [
+        {
+            "student_id": student_id,
+            "active_days": int(student_days[i]),
+            "attempts": int(student_attempts[i]),
+            "accuracy": round(float(student_accuracy[i]), 3),
+            "minutes": round(float(student_minutes[i]), 1),
+        }
+        for i, student_id in enumerate(ids)
+    ]
+
+    total_attempts = float(day_attempts.sum())
+    return {
+        "student_count": len(ids),
+        "students_with_knowledge": len(knowledge),
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "attempts": int(total_attempts),
+        "accuracy": round(float(day_correct.sum()) / total_attempts, 3) if total_attempts else 0.0,
+        "minutes": round(float(day_minutes.sum()), 1),
+        "topic_mastery": topic_mastery,
+        "daily": daily,
+        "students": students,
+    }
+
+
+# ============================================================================
+# Columnar export
+# ============================================================================
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only stream whose written bytes are drained after every batch"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _export_schema(table: str):
+    if table == "knowledge":
+        return pa.schema(
+            [("student_id", pa.int64())]
+            + [(f"{topic}_score", pa.float64()) for topic in JEE_TOPICS]
+            + [("total_attempts", pa.int64()), ("accuracy_rate", pa.float64())]
+        )
+    return pa.schema([
+        ("student_id", pa.int64()),
+        ("date", pa.date32()),
+        ("questions_attempted", pa.int64()),
+        ("questions_correct", pa.int64()),
+        ("average_difficulty", pa.float64()),
+        ("minutes", pa.float64()),
+        ("streak_days", pa.int64()),
+    ])
+
+
+def _export_rows(db: Session, table: str, ids: List[int], start: date, end: date):
+    if table == "knowledge":
+        return db.query(
+            StudentKnowledge.student_id,
+            *[getattr(StudentKnowledge, f"{topic}_score") for topic in JEE_TOPICS],
+            StudentKnowledge.total_attempts, StudentKnowledge.accuracy_rate
+        ).filter(
+            StudentKnowledge.student_id.in_(ids)
+        ).order_by(StudentKnowledge.student_id).yield_per(BATCH_ROWS)
+
+    return db.query(
+        PerformanceMetrics.student_id, PerformanceMetrics.date,
+        PerformanceMetrics.questions_attempted, PerformanceMetrics.questions_correct,
+        PerformanceMetrics.average_difficulty, PerformanceMetrics.total_time_spent,
+        PerformanceMetrics.streak_days
+    ).filter(
+        PerformanceMetrics.student_id.in_(ids),
+        PerformanceMetrics.date >= datetime.combine(start, time.min),
+        PerformanceMetrics.date <= datetime.combine(end, time.min)
+    ).order_by(PerformanceMetrics.student_id, PerformanceMetrics.date).yield_per(BATCH_ROWS)
+
+
+def _record_batch(schema, table: str, rows: List[tuple]):
+    columns = list(zip(*rows))
+    if table == "rollups":
+        columns[1] = [when.date() for when in columns[1]]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def export_cohort(
+    session_factory: Callable[[], Session],
+    student_ids: Sequence[int],
+    start: date,
+    end: date,
+    fmt: str = "arrow",
+    table: str = "rollups"
+) -> Iterator[bytes]:
+    """
+    Stream the cohort's daily rollups (or knowledge vectors) as Arrow IPC or
+    Parquet, one record batch / row group per BATCH_ROWS rows.
+
+    The stream reads through its own session, so it can outlive the request's.
+    """
+    if pa is None:
+        raise RuntimeError("Columnar export needs pyarrow, which is not installed")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"table must be one of {', '.join(EXPORT_TABLES)}")
+    ids = _cohort(student_ids)
+
+    def stream() -> Iterator[bytes]:
+        schema = _export_schema(table)
+        sink = _ChunkSink()
+        writer = pa.ipc.new_stream(sink, schema) if fmt == "arrow" else pq.ParquetWriter(sink, schema)
+        db = session_factory()
+        try:
+            if table == "rollups":
+                _catch_up(db, ids)
+                db.commit()
+            rows: List[tuple] = []
+            for row in _export_rows(db, table, ids, start, end):
+                rows.append(tuple(row))
+                if len(rows) == BATCH_ROWS:
+                    writer.write_batch(_record_batch(schema, table, rows))
+                    rows = []
+                    yield sink.drain()
+            if rows:
+                writer.write_batch(_record_batch(schema, table, rows))
+            writer.close()
+            yield sink.drain()
+        finally:
+            db.close()
+
+    return stream()
@@ -55,6 +55,17 @@ class CollaborativeFiltering:
             if rating:
                 self.user_item_matrix[interaction.student_id][interaction.content_id] = rating
     
+    def load_matrix(self, matrix: Dict[int, Dict[int, float]]):
+        """
+        Use an already materialized user-item matrix instead of querying interactions
+        
+        Args:
+            matrix: {student_id: {content_id: rating}}, e.g. from the event log's
+                interaction matrix materializer
+        """
+        self.user_item_matrix = matrix
+        self.similarity_cache = {}
+    
     def calculate_cosine_similarity(
         self,
         student1_id: int,
@@ -0,0 +1,641 @@
+"""
+Learning Event Log
+Append-only log of answer, assessment, review and interaction events.
+
+Write paths append an event and publish it; materializers fold the log into
+derived state (StudentKnowledge, StudentMastery, the collaborative filtering
+matrix, the activity calendar, the daily PerformanceMetrics rollups, the
+running time-on-task statistics in LearningPace). Materializers are
+checkpointed by log offset, so they can be caught up incrementally or
+rebuilt from offset 0 after a logic change.
+
+Event payloads:
+    answer:           {content_id, topic, is_correct, difficulty, time_spent}
+    skill_assessment: {skill_id, correct, time_spent}
+    flashcard_review: {flashcard_id, quality}
+    interaction:      {content_id, interaction_type, rating, implicit_rating,
+                       time_spent, completed, score}
+"""
+import threading
+from datetime import datetime, time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.models.events import LearningEvent, MaterializerOffset
+from app.models.learning_pace import LearningPace
+from app.models.models import Content, LearningSession, PerformanceMetrics, StudentActivity, StudentKnowledge
+from app.models.mastery import StudentMastery
+from app.models.smart_recommendations import UserInteraction
+from app.services.mastery_snapshot import invalidate_mastery_snapshot, update_mastery_snapshot
+from app.services.response_cache import touch_student
+from app.services.student_model import StudentModelService
+
+
+EVENT_ANSWER = "answer"
+EVENT_SKILL_ASSESSMENT = "skill_assessment"
+EVENT_FLASHCARD_REVIEW = "flashcard_review"
+EVENT_INTERACTION = "interaction"
+
+# Offset row that applies to every student: all events at or below it are materialized
+GLOBAL_WATERMARK = 0
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def append_event(
+    db: Session,
+    student_id: int,
+    event_type: str,
+    payload: Dict,
+    created_at: Optional[datetime] = None
+) -> LearningEvent:
+    """
+    Append an event to the log.
+    The caller owns the transaction; the event is flushed so its offset is assigned.
+    """
+    event = LearningEvent(
+        student_id=student_id,
+        event_type=event_type,
+        payload=payload,
+        created_at=created_at or datetime.now()
+    )
+    db.add(event)
+    db.flush()
+    return event
+
+
+def read_events(
+    db: Session,
+    after_offset: int = 0,
+    event_types: Optional[Sequence[str]] = None,
+    student_id: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[LearningEvent]:
+    """Stream events with offset > after_offset in offset order, one keyset page at a time"""
+    offset = after_offset
+    while True:
+        query = db.query(LearningEvent).filter(LearningEvent.id > offset)
+        if event_types:
+            query = query.filter(LearningEvent.event_type.in_(event_types))
+        if student_id is not None:
+            query = query.filter(LearningEvent.student_id == student_id)
+
+        batch = query.order_by(LearningEvent.id).limit(batch_size).all()
+        if not batch:
+            return
+
+        for event in batch:
+            yield event
+        offset = batch[-1].id
+
+
+def head_offset(db: Session) -> int:
+    """Offset of the newest event (0 for an empty log)"""
+    return db.query(func.max(LearningEvent.id)).scalar() or 0
+
+
+class Materializer:
+    """
+    Folds events into a derived table.
+
+    Subclasses implement reset() and apply(); this base class handles offsets.
+    Offsets are stored per student so the live write path can catch up one
+    student cheaply, plus a global watermark row used by bulk catch-up and rebuilds.
+    """
+
+    name: str = ""
+    event_types: Sequence[str] = ()
+
+    def reset(self, db: Session, student_ids: List[int]):
+        """Discard derived state for the given students"""
+        raise NotImplementedError
+
+    def apply(self, db: Session, event: LearningEvent, state: Dict):
+        """
+        Fold one event into derived state.
+        `state` is scratch space that lives for one catch-up run (e.g. row caches).
+        """
+        raise NotImplementedError
+
+    def catch_up(
+        self,
+        db: Session,
+        student_id: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> int:
+        """
+        Apply every event not yet materialized.
+        With student_id, only that student's events are read.
+
+        Returns:
+            Number of events applied
+        """
+        offsets = self._load_offsets(db, student_id)
+        watermark = offsets.get(GLOBAL_WATERMARK, 0)
+
+        if student_id is not None:
+            start = max(watermark, offsets.get(student_id, 0))
+        else:
+            start = watermark
+
+        state: Dict = {}
+        applied = 0
+        last_seen = start
+        touched: Dict[int, int] = {}
+
+        for event in read_events(db, start, self.event_types, student_id, batch_size):
+            last_seen = event.id
+            if event.id <= offsets.get(event.student_id, 0):
+                continue  # Already applied by the live path
+            self.apply(db, event, state)
+            touched[event.student_id] = event.id
+            applied += 1
+            if applied % batch_size == 0:
+                db.flush()
+
+        if student_id is None:
+            # Everything up to head is now materialized for every student
+            touched = {GLOBAL_WATERMARK: max(last_seen, head_offset(db))}
+        self._store_offsets(db, touched)
+        db.flush()
+
+        return applied
+
+    def rebuild(self, db: Session, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Rebuild derived state from offset 0.
+        Runs in the caller's transaction, so readers keep seeing the old state until commit.
+        """
+        student_ids = [
+            row[0] for row in db.query(LearningEvent.student_id).filter(
+                LearningEvent.event_type.in_(self.event_types)
+            ).distinct()
+        ]
+        for start in range(0, len(student_ids), 500):
+            self.reset(db, student_ids[start:start + 500])
+
+        db.query(MaterializerOffset).filter(
+            MaterializerOffset.materializer == self.name
+        ).delete(synchronize_session=False)
+        db.flush()
+
+        return self.catch_up(db, batch_size=batch_size)
+
+    def _load_offsets(self, db: Session, student_id: Optional[int]) -> Dict[int, int]:
+        query = db.query(MaterializerOffset).filter(MaterializerOffset.materializer == self.name)
+        if student_id is not None:
+            query = query.filter(MaterializerOffset.student_id.in_([GLOBAL_WATERMARK, student_id]))
+        return {row.student_id: row.last_offset for row in query.all()}
+
+    def _store_offsets(self, db: Session, offsets: Dict[int, int]):
+        if not offsets:
+            return
+        existing = {
+            row.student_id: row for row in db.query(MaterializerOffset).filter(
+                MaterializerOffset.materializer == self.name,
+                MaterializerOffset.student_id.in_(list(offsets.keys()))
+            ).all()
+        }
+        for student_id, offset in offsets.items():
+            row = existing.get(student_id)
+            if row:
+                row.last_offset = max(row.last_offset, offset)
+            else:
+                db.add(MaterializerOffset(
+                    materializer=self.name,
+                    student_id=student_id,
+                    last_offset=offset
+                ))
+
+
+class KnowledgeMaterializer(Materializer):
+    """Maintains StudentKnowledge from answer events"""
+
+    name = "student_knowledge"
+    event_types = (EVENT_ANSWER,)
+
+    def reset(self, db: Session, student_ids: List[int]):
+        db.query(StudentKnowledge).filter(
+            StudentKnowledge.student_id.in_(student_ids)
+        ).delete(synchronize_session=False)
+
+    def apply(self, db: Session, event: LearningEvent, state: Dict):
+        knowledge = state.get(event.student_id)
+        if knowledge is None:
+            knowledge = db.query(StudentKnowledge).filter(
+                StudentKnowledge.student_id == event.student_id
+            ).first()
+            if not knowledge:
+                knowledge = StudentModelService.new_knowledge(event.student_id)
+                db.add(knowledge)
+            state[event.student_id] = knowledge
+
+        payload = event.payload
+        StudentModelService.apply_answer(
+            knowledge,
+            topic=payload.get("topic"),
+            is_correct=bool(payload.get("is_correct")),
+            difficulty=payload.get("difficulty"),
+            time_spent=payload.get("time_spent") or 0.0
+        )
+
+
+class MasteryMaterializer(Materializer):
+    """Maintains StudentMastery from skill assessment events"""
+
+    name = "student_mastery"
+    event_types = (EVENT_SKILL_ASSESSMENT,)
+
+    def reset(self, db: Session, student_ids: List[int]):
+        db.query(StudentMastery).filter(
+            StudentMastery.student_id.in_(student_ids)
+        ).delete(synchronize_session=False)
+        invalidate_mastery_snapshot(db)
+
+    def apply(self, db: Session, event: LearningEvent, state: Dict):
+        payload = event.payload
+        key = (event.student_id, payload["skill_id"])
+
+        mastery = state.get(key)
+        if mastery is None:
+            mastery = db.query(StudentMastery).filter(
+                StudentMastery.student_id == event.student_id,
+                StudentMastery.skill_id == payload["skill_id"]
+            ).first()
+            if not mastery:
+                mastery = StudentMastery(
+                    student_id=event.student_id,
+                    skill_id=payload["skill_id"],
+                    mastery_level=0,
+                    progress_percentage=0.0,
+                    total_practice_time=0,
+                    correct_attempts=0,
+                    total_attempts=0,
+                    accuracy=0.0,
+                    unlocked_at=event.created_at
+                )
+                db.add(mastery)
+            state[key] = mastery
+
+        mastery.update_mastery(
+            bool(payload.get("correct")),
+            payload.get("time_spent") or 0,
+            assessed_at=event.created_at
+        )
+        update_mastery_snapshot(db, mastery)
+
+
+class ActivityMaterializer(Materializer):
+    """Marks each day with any learning event in StudentActivity"""
+
+    name = "student_activity"
+    event_types = (EVENT_ANSWER, EVENT_SKILL_ASSESSMENT, EVENT_FLASHCARD_REVIEW, EVENT_INTERACTION)
+
+    def reset(self, db: Session, student_ids: List[int]):
+        db.query(StudentActivity).filter(
+            StudentActivity.student_id.in_(student_ids)
+        ).delete(synchronize_session=False)
+
+    def apply(self, db: Session, event: LearningEvent, state: Dict):
+        activity = state.get(event.student_id)
+        if activity is None:
+            activity = db.get(StudentActivity, event.student_id)
+            if not activity:
+                activity = StudentActivity(student_id=event.student_id, days=b"")
+                db.add(activity)
+            state[event.student_id] = activity
+
+        activity.mark(event.created_at.date())
+
+
+class PerformanceMaterializer(Materializer):
+    """
+    Upserts one PerformanceMetrics row per student and day from answer events.
+    Streaks are read from the activity calendar, which is caught up first.
+    """
+
+    name = "performance_metrics"
+    event_types = (EVENT_ANSWER,)
+
+    def reset(self, db: Session, student_ids: List[int]):
+        db.query(PerformanceMetrics).filter(
+            PerformanceMetrics.student_id.in_(student_ids)
+        ).delete(synchronize_session=False)
+
+    def catch_up(
+        self,
+        db: Session,
+        student_id: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> int:
+        activity_materializer.catch_up(db, student_id=student_id, batch_size=batch_size)
+        return super().catch_up(db, student_id=student_id, batch_size=batch_size)
+
+    def apply(self, db: Session, event: LearningEvent, state: Dict):
+        # Imported here: streak_service depends on this module
+        from app.services.streak_service import streaks_from_bitmap
+
+        day = event.created_at.date()
+        key = (event.student_id, day)
+        metrics = state.get(key)
+        if metrics is None:
+            midnight = datetime.combine(day, time.min)
+            metrics = db.query(PerformanceMetrics).filter(
+                PerformanceMetrics.student_id == event.student_id,
+                PerformanceMetrics.date == midnight
+            ).first()
+            if not metrics:
+                metrics = PerformanceMetrics(
+                    student_id=event.student_id,
+                    date=midnight,
+                    questions_attempted=0,
+                    questions_correct=0,
+                    total_time_spent=0.0,
+                    topics_covered=[],
+                    streak_days=0
+                )
+                db.add(metrics)
+            state[key] = metrics
+
+        payload = event.payload
+        metrics.questions_attempted = (metrics.questions_attempted or 0) + 1
+        if payload.get("is_correct"):
+            metrics.questions_correct = (metrics.questions_correct or 0) + 1
+        difficulty = payload.get("difficulty")
+        if difficulty is not None:
+            # Running mean over the day's answers
+            previous = metrics.average_difficulty if metrics.average_difficulty is not None else difficulty
+            metrics.average_difficulty = previous + (difficulty - previous) / metrics.questions_attempted
+        metrics.total_time_spent = (metrics.total_time_spent or 0.0) + (payload.get("time_spent") or 0.0) / 60
+        topic = payload.get("topic")
+        if topic and topic not in (metrics.topics_covered or []):
+            metrics.topics_covered = (metrics.topics_covered or []) + [topic]
+
+        activity = db.get(StudentActivity, event.student_id)
+        if activity is not None and activity.epoch is not None:
+            metrics.streak_days = streaks_from_bitmap(activity.days, activity.epoch, day)["current_streak"]
+
+
+class PaceMaterializer(Materializer):
+    """
+    Maintains per-concept running time-on-task statistics in LearningPace from
+    answer events. Answers without a positive time are not timed and skipped.
+    """
+
+    name = "learning_pace"
+    event_types = (EVENT_ANSWER,)
+
+    def reset(self, db: Session, student_ids: List[int]):
+        # The row also holds the student's pace preferences, so only the statistics are cleared
+        db.query(LearningPace).filter(
+            LearningPace.student_id.in_(student_ids)
+        ).update({LearningPace.time_on_task_data: {}}, synchronize_session=False)
+
+    def apply(self, db: Session, event: LearningEvent, state: Dict):
+        payload = event.payload
+        seconds = payload.get("time_spent") or 0.0
+        if seconds <= 0:
+            return
+
+        pace = state.get(event.student_id)
+        if pace is None:
+            pace = db.query(LearningPace).filter(
+                LearningPace.student_id == event.student_id
+            ).first()
+            if not pace:
+                pace = LearningPace(student_id=event.student_id, time_on_task_data={})
+                db.add(pace)
+            state[event.student_id] = pace
+
+        pace.record_time_on_task(payload.get("topic") or "general", seconds, bool(payload.get("is_correct")))
+
+
+class InteractionMatrixMaterializer(Materializer):
+    """
+    Maintains the in-memory user-item rating matrix used by collaborative filtering.
+    Process-local: the offset lives in memory and the matrix is rebuilt from the
+    log on first use, then refreshed incrementally.
+    """
+
+    name = "interaction_matrix"
+    event_types = (EVENT_INTERACTION,)
+
+    def __init__(self):
+        self.matrix: Dict[int, Dict[int, float]] = {}
+        self.last_offset = 0
+        self._lock = threading.Lock()
+
+    def reset(self, db: Session, student_ids: List[int]):
+        for student_id in student_ids:
+            self.matrix.pop(student_id, None)
+
+    def apply(self, db: Session, event: LearningEvent, state: Dict):
+        payload = event.payload
+        # Same rule as CollaborativeFiltering.build_interaction_matrix: latest rating wins
+        rating = payload.get("rating") or payload.get("implicit_rating")
+        row = self.matrix.setdefault(event.student_id, {})
+        if rating:
+            row[payload["content_id"]] = rating
+
+    def catch_up(
+        self,
+        db: Session,
+        student_id: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> int:
+        applied = 0
+        with self._lock:
+            for event in read_events(db, self.last_offset, self.event_types, batch_size=batch_size):
+                self.apply(db, event, {})
+                self.last_offset = event.id
+                applied += 1
+        return applied
+
+    def rebuild(self, db: Session, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        with self._lock:
+            self.matrix = {}
+            self.last_offset = 0
+        return self.catch_up(db, batch_size=batch_size)
+
+    def refresh(self, db: Session) -> Dict[int, Dict[int, float]]:
+        """Catch up with the log and return the current matrix"""
+        self.catch_up(db)
+        return self.matrix
+
+
+knowledge_materializer = KnowledgeMaterializer()
+mastery_materializer = MasteryMaterializer()
+activity_materializer = ActivityMaterializer()
+performance_materializer = PerformanceMaterializer()
+pace_materializer = PaceMaterializer()
+interaction_matrix = InteractionMatrixMaterializer()
+
+# Applied synchronously for the publishing student on every publish_event()
+LIVE_MATERIALIZERS: List[Materializer] = [
+    knowledge_materializer,
+    mastery_materializer,
+    activity_materializer,
+    performance_materializer,
+    pace_materializer,
+]
+
+MATERIALIZERS: Dict[str, Materializer] = {
+    m.name: m for m in (
+        knowledge_materializer, mastery_materializer, activity_materializer,
+        performance_materializer, pace_materializer, interaction_matrix
+    )
+}
+
+
+def publish_event(
+    db: Session,
+    student_id: int,
+    event_type: str,
+    payload: Dict,
+    created_at: Optional[datetime] = None
+) -> LearningEvent:
+    """
+    Append an event and bring the student's live materialized views up to date.
+    Nothing is committed; the caller commits the event and derived state together.
+    """
+    event = append_event(db, student_id, event_type, payload, created_at)
+
+    for materializer in LIVE_MATERIALIZERS:
+        if event_type in materializer.event_types:
+            materializer.catch_up(db, student_id=student_id)
+
+    return event
+
+
+def publish_events(
+    db: Session,
+    student_id: int,
+    event_type: str,
+    events: Sequence[Tuple[Dict, Optional[datetime]]]
+) -> int:
+    """
+    Append several events of one type with a single bulk insert, then bring
+    the student's live materialized views up to date once.
+    Nothing is committed.
+
+    Args:
+        events: (payload, created_at) pairs; created_at defaults to now
+    """
+    if not events:
+        return 0
+
+    now = datetime.now()
+    db.execute(insert(LearningEvent), [
+        {
+            "student_id": student_id,
+            "event_type": event_type,
+            "payload": payload,
+            "created_at": created_at or now
+        }
+        for payload, created_at in events
+    ])
+    touch_student(db, student_id)
+
+    for materializer in LIVE_MATERIALIZERS:
+        if event_type in materializer.event_types:
+            materializer.catch_up(db, student_id=student_id)
+
+    return len(events)
+
+
+def backfill_events(db: Session, chunk_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Seed an empty log from the tables written before the log existed.
+
+    Answers come from learning_sessions (in timestamp order), interactions from
+    user_interactions, and assessments are synthesized from StudentMastery
+    counters (mastery level depends only on the counts, so replaying them
+    reproduces the stored level). StudentKnowledge and StudentMastery already
+    reflect these events, so their watermarks are moved to head. Every other
+    materializer - the activity calendar, the daily PerformanceMetrics rollups
+    (performance_metrics) and the time-on-task statistics in LearningPace
+    (learning_pace) - stays at offset 0 and builds its state from the
+    backfilled events; moving their watermarks too would drop that history.
+    """
+    if head_offset(db) > 0:
+        raise ValueError("Event log is not empty; backfill only seeds a fresh log")
+
+    counts = {EVENT_ANSWER: 0, EVENT_SKILL_ASSESSMENT: 0, EVENT_INTERACTION: 0}
+    rows: List[Dict] = []
+
+    def flush_rows():
+        if rows:
+            db.execute(insert(LearningEvent), rows)
+            rows.clear()
+
+    sessions = db.query(LearningSession, Content.topic, Content.difficulty).outerjoin(
+        Content, LearningSession.content_id == Content.id
+    ).order_by(LearningSession.timestamp, LearningSession.id).yield_per(chunk_size)
+
+    for session, topic, difficulty in sessions:
+        rows.append({
+            "student_id": session.student_id,
+            "event_type": EVENT_ANSWER,
+            "payload": {
+                "content_id": session.content_id,
+                "topic": topic,
+                "is_correct": bool(session.is_correct),
+                "difficulty": difficulty,
+                "time_spent": session.time_spent or 0.0,
+            },
+            "created_at": session.timestamp or datetime.now(),
+        })
+        counts[EVENT_ANSWER] += 1
+        if len(rows) >= chunk_size:
+            flush_rows()
+
+    masteries = db.query(StudentMastery).order_by(StudentMastery.id).yield_per(chunk_size)
+    for mastery in masteries:
+        assessed_at = mastery.last_assessed_at or mastery.created_at or datetime.now()
+        correct = mastery.correct_attempts or 0
+        total = mastery.total_attempts or 0
+        for attempt in range(total):
+            rows.append({
+                "student_id": mastery.student_id,
+                "event_type": EVENT_SKILL_ASSESSMENT,
+                "payload": {
+                    "skill_id": mastery.skill_id,
+                    "correct": attempt < correct,
+                    "time_spent": (mastery.total_practice_time or 0) if attempt == 0 else 0,
+                },
+                "created_at": assessed_at,
+            })
+            counts[EVENT_SKILL_ASSESSMENT] += 1
+        if len(rows) >= chunk_size:
+            flush_rows()
+
+    interactions = db.query(UserInteraction).order_by(UserInteraction.id).yield_per(chunk_size)
+    for interaction in interactions:
+        rows.append({
+            "student_id": interaction.student_id,
+            "event_type": EVENT_INTERACTION,
+            "payload": {
+                "content_id": interaction.content_id,
+                "interaction_type": interaction.interaction_type,
+                "rating": interaction.rating,
+                "implicit_rating": interaction.implicit_rating,
+                "time_spent": interaction.time_spent_seconds,
+                "completed": bool(interaction.completed),
+                "score": interaction.score,
+            },
+            "created_at": interaction.interaction_date or datetime.now(),
+        })
+        counts[EVENT_INTERACTION] += 1
+        if len(rows) >= chunk_size:
+            flush_rows()
+
+    flush_rows()
+
+    head = head_offset(db)
+    for materializer in (knowledge_materializer, mastery_materializer):
+        materializer._store_offsets(db, {GLOBAL_WATERMARK: head})
+    db.flush()
+
+    return counts
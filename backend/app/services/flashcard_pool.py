@@ -0,0 +1,196 @@
+"""
+Flashcard Pool
+Shared, deduplicated cache of LLM-generated flashcards.
+
+Generated cards are stored once per (normalized topic, card count) in
+flashcard_pools/pooled_flashcards. A student's deck only gets FlashCard rows
+that point at the pooled cards and carry their own SRS state, so a topic that
+hundreds of students ask for is generated once and then served from the
+database. A student who already has every pooled card for the topic gets
+the next variant instead, generated the first time anyone asks for it.
+Identical generations running at the same time in one process are coalesced
+behind a per-key lock; across processes the unique (topic_key, card_count,
+variant) constraint keeps a single pool and the loser reuses it.
+"""
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.smart_recommendations import FlashCard, FlashCardPool, PooledFlashCard
+from app.services.review_queue import schedule_cards
+
+
+MAX_CARDS_PER_POOL = 50
+
+_inflight: Dict[Tuple[str, int], list] = {}  # key -> [lock, users]
+_inflight_lock = threading.Lock()
+
+
+def normalize_topic(topic: str) -> str:
+    """Case-, Unicode-width- and punctuation-insensitive topic key"""
+    text = unicodedata.normalize("NFKC", topic).casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())[:200]
+
+
+@contextmanager
+def _coalesced(key: Tuple[str, int]):
+    """Serialize work on one key; the lock entry is dropped with its last user"""
+    with _inflight_lock:
+        entry = _inflight.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _inflight_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                _inflight.pop(key, None)
+
+
+def _find_pool(db: Session, topic_key: str, count: int, variant: int):
+    return db.query(FlashCardPool).filter(
+        FlashCardPool.topic_key == topic_key,
+        FlashCardPool.card_count == count,
+        FlashCardPool.variant == variant
+    ).first()
+
+
+def _next_variant(db: Session, topic_key: str, count: int, student_id: Optional[int]) -> int:
+    """The first variant with a card not yet in the student's deck (one past the last if none)"""
+    rows = db.query(FlashCardPool.variant, func.count(PooledFlashCard.id), func.count(FlashCard.id)).join(
+        PooledFlashCard, PooledFlashCard.pool_id == FlashCardPool.id
+    ).outerjoin(
+        FlashCard, (FlashCard.pooled_card_id == PooledFlashCard.id) & (FlashCard.student_id == student_id)
+    ).filter(
+        FlashCardPool.topic_key == topic_key,
+        FlashCardPool.card_count == count
+    ).group_by(FlashCardPool.variant).order_by(FlashCardPool.variant).all()
+
+    for variant, pooled, owned in rows:
+        if owned < pooled:
+            return variant
+    return rows[-1][0] + 1 if rows else 0
+
+
+def get_or_create_pool(
+    db: Session,
+    topic: str,
+    count: int,
+    generate: Callable[[str, int], List[Dict]],
+    student_id: Optional[int] = None
+) -> Tuple[FlashCardPool, bool]:
+    """
+    The pool for (topic, count), generating it only when none exists.
+
+    Args:
+        generate: Called as generate(topic, count) on a miss; returns card dicts
+            with concept_name, question, answer and difficulty
+        student_id: Skip variants whose cards are all in this student's deck
+
+    Returns:
+        (pool, hit) where hit is True when no generation was needed
+    """
+    if not 1 <= count <= MAX_CARDS_PER_POOL:
+        raise ValueError(f"count must be between 1 and {MAX_CARDS_PER_POOL}")
+    topic_key = normalize_topic(topic)
+    if not topic_key:
+        raise ValueError("Topic must not be empty")
+
+    with _coalesced((topic_key, count)):
+        variant = _next_variant(db, topic_key, count, student_id)
+        pool = _find_pool(db, topic_key, count, variant)
+        if pool is not None:
+            db.query(FlashCardPool).filter(FlashCardPool.id == pool.id).update(
+                {FlashCardPool.hit_count: func.coalesce(FlashCardPool.hit_count, 0) + 1},
+                synchronize_session=False
+            )
+            db.commit()
+            return pool, True
+
+        cards = generate(topic, count)
+        if not cards:
+            raise ValueError("No flashcards were generated")
+
+        pool = FlashCardPool(
+            topic_key=topic_key, topic=topic.strip()[:200], card_count=count, variant=variant, hit_count=0
+        )
+        pool.cards = [
+            PooledFlashCard(
+                position=position,
+                concept_name=str(card.get("concept_name") or "Concept")[:200],
+                question=str(card.get("question") or ""),
+                answer=str(card.get("answer") or ""),
+                difficulty=int(card.get("difficulty") or 3)
+            )
+            for position, card in enumerate(cards[:count])
+        ]
+        db.add(pool)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another process stored the same pool first
+            db.rollback()
+            pool = _find_pool(db, topic_key, count, variant)
+            return pool, True
+        return pool, False
+
+
+def add_pool_to_deck(db: Session, student_id: int, pool: FlashCardPool, tags: List[str]) -> List[Dict]:
+    """
+    Give the student per-student SRS cards for every pooled card not already
+    in their deck, and commit.
+
+    Returns:
+        The new cards, serialized
+    """
+    pooled_ids = [card.id for card in pool.cards]
+    existing = {
+        pooled_id for (pooled_id,) in db.query(FlashCard.pooled_card_id).filter(
+            FlashCard.student_id == student_id,
+            FlashCard.pooled_card_id.in_(pooled_ids)
+        ).all()
+    }
+
+    now = datetime.utcnow()
+    cards = [
+        FlashCard(
+            student_id=student_id,
+            pooled_card_id=pooled.id,
+            pooled_card=pooled,
+            concept_name=pooled.concept_name,
+            difficulty=pooled.difficulty,
+            next_review_date=now,
+            tags=tags
+        )
+        for pooled in pool.cards
+        if pooled.id not in existing
+    ]
+    if not cards:
+        return []
+
+    db.add_all(cards)
+    db.flush()
+    created = [
+        {
+            "id": card.id,
+            "pooled_card_id": card.pooled_card_id,
+            "concept_name": card.concept_name,
+            "question": card.question,
+            "answer": card.answer,
+            "difficulty": card.difficulty,
+            "next_review_date": now.isoformat()
+        }
+        for card in cards
+    ]
+    db.commit()
+    schedule_cards(student_id, {card["id"]: now for card in created})
+    return created
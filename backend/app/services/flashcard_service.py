@@ -0,0 +1,202 @@
+"""
+Flashcard Service
+Batch review submission for the spaced repetition system.
+
+A review session's answers are applied together: the cards are loaded with one
+IN query, rescheduled in memory (SM-2 or FSRS, per card, in answer order),
+flushed as one batched UPDATE alongside a bulk insert of the review events and
+a single ReviewSession summary row, and committed once. Cards are scheduled
+in naive UTC like the rest of FlashCard, while the review events are stamped
+in local time like every other event in the log.
+
+upgrade_flashcards_table brings a flashcards table created before the FSRS
+scheduler and the shared flashcard pool up to the current model at startup.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+
+from app.models.smart_recommendations import FlashCard, ReviewSession
+from app.services import fsrs
+from app.services.event_log import publish_events, EVENT_FLASHCARD_REVIEW
+from app.services.review_queue import schedule_cards
+
+
+# Largest number of answers accepted in one submission
+MAX_BATCH_REVIEWS = 500
+
+# Columns added to flashcards after the table first shipped
+ADDED_COLUMNS = ("scheduler", "stability", "memory_difficulty", "pooled_card_id")
+
+# Columns that used to be NOT NULL
+RELAXED_COLUMNS = ("question", "answer")
+
+
+def _as_utc(when: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC, the convention of FlashCard timestamps"""
+    if when is None or when.tzinfo is None:
+        return when
+    return when.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _utc_to_local(when: datetime) -> datetime:
+    """Naive local time, the convention of event timestamps"""
+    return when.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+
+def submit_reviews(
+    db: Session,
+    student_id: int,
+    reviews: Sequence[Tuple[int, int, Optional[datetime]]],
+    duration_seconds: Optional[int] = None
+) -> Dict:
+    """
+    Apply a session of flashcard answers in one transaction.
+
+    Args:
+        reviews: (flashcard_id, quality 0-5, answered_at) tuples; answered_at
+            defaults to now. A card may be answered more than once.
+        duration_seconds: Session length (default: first to last answer)
+
+    Returns:
+        The per-card results and the ReviewSession summary
+    """
+    if not reviews:
+        raise ValueError("No reviews submitted")
+    if len(reviews) > MAX_BATCH_REVIEWS:
+        raise ValueError(f"At most {MAX_BATCH_REVIEWS} reviews per submission")
+
+    now = datetime.utcnow()
+    answers = []
+    for card_id, quality, answered_at in reviews:
+        if not 0 <= quality <= 5:
+            raise ValueError("Quality must be between 0 and 5")
+        answers.append((_as_utc(answered_at) or now, card_id, quality))
+    answers.sort(key=lambda answer: answer[0])
+
+    card_ids = {card_id for _, card_id, _ in answers}
+    cards = {
+        card.id: card for card in db.query(FlashCard).filter(
+            FlashCard.student_id == student_id,
+            FlashCard.id.in_(card_ids)
+        ).all()
+    }
+    missing = sorted(card_ids - cards.keys())
+    if missing:
+        raise ValueError(f"Flashcards not found: {missing}")
+
+    weights = None
+    if any(card.scheduler == "fsrs" for card in cards.values()):
+        weights = fsrs.get_weights(db, student_id)
+
+    for answered_at, card_id, quality in answers:
+        card = cards[card_id]
+        if card.scheduler == "fsrs":
+            fsrs.review_card(card, quality, answered_at, weights)
+        else:
+            card.calculate_sm2_next_review(quality, reviewed_at=answered_at)
+
+    publish_events(db, student_id, EVENT_FLASHCARD_REVIEW, [
+        ({"flashcard_id": card_id, "quality": quality}, _utc_to_local(answered_at))
+        for answered_at, card_id, quality in answers
+    ])
+
+    started_at, completed_at = answers[0][0], answers[-1][0]
+    correct = sum(1 for _, _, quality in answers if quality >= 3)
+    session = ReviewSession(
+        student_id=student_id,
+        cards_reviewed=len(answers),
+        cards_correct=correct,
+        session_duration_seconds=(
+            duration_seconds if duration_seconds is not None
+            else int((completed_at - started_at).total_seconds())
+        ),
+        average_quality=sum(quality for _, _, quality in answers) / len(answers),
+        accuracy_rate=correct / len(answers) * 100,
+        started_at=started_at,
+        completed_at=completed_at
+    )
+    db.add(session)
+    db.flush()
+
+    results = [
+        {
+            "flashcard_id": card.id,
+            "scheduler": card.scheduler or "sm2",
+            "interval": card.interval,
+            "next_review_date": card.next_review_date,
+            "streak": card.streak,
+            "retention_rate": round(card.get_retention_rate(), 1)
+        }
+        for card in sorted(cards.values(), key=lambda card: card.id)
+    ]
+    summary = {
+        "id": session.id,
+        "cards_reviewed": session.cards_reviewed,
+        "cards_correct": session.cards_correct,
+        "session_duration_seconds": session.session_duration_seconds,
+        "average_quality": round(session.average_quality, 2),
+        "accuracy_rate": round(session.accuracy_rate, 1),
+        "started_at": started_at.isoformat(),
+        "completed_at": completed_at.isoformat()
+    }
+
+    db.commit()
+    schedule_cards(student_id, {r["flashcard_id"]: r["next_review_date"] for r in results})
+
+    for result in results:
+        result["next_review_date"] = result["next_review_date"].isoformat()
+    return {"session": summary, "flashcards": results}
+
+
+def upgrade_flashcards_table(db: Session) -> List[str]:
+    """
+    Add the columns missing from an existing flashcards table and drop NOT
+    NULL from RELAXED_COLUMNS. SQLite cannot alter a column, so there the
+    table is rebuilt from the model and its rows copied over. Commits.
+
+    Returns:
+        A description of each change made (empty when already current)
+    """
+    connection = db.connection()
+    inspector = inspect(connection)
+    if not inspector.has_table(FlashCard.__tablename__):
+        return []
+
+    table = FlashCard.__table__
+    existing = {column["name"]: column for column in inspector.get_columns(table.name)}
+    changes = []
+
+    added = [name for name in ADDED_COLUMNS if name not in existing]
+    for name in added:
+        ddl = CreateColumn(table.c[name]).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+        changes.append(f"added {name}")
+    for index in table.indexes:
+        if any(column.name in added for column in index.columns):
+            index.create(connection, checkfirst=True)
+
+    relaxed = [name for name in RELAXED_COLUMNS if name in existing and not existing[name]["nullable"]]
+    if relaxed and connection.dialect.name == "sqlite":
+        # A fresh inspector: the one above has cached the columns before ADD COLUMN
+        copied = ", ".join(
+            column["name"] for column in inspect(connection).get_columns(table.name) if column["name"] in table.c
+        )
+        for index in inspect(connection).get_indexes(table.name):
+            connection.execute(text(f"DROP INDEX {index['name']}"))
+        connection.execute(text(f"ALTER TABLE {table.name} RENAME TO _{table.name}_old"))
+        table.create(connection)
+        connection.execute(text(f"INSERT INTO {table.name} ({copied}) SELECT {copied} FROM _{table.name}_old"))
+        connection.execute(text(f"DROP TABLE _{table.name}_old"))
+    for name in relaxed:
+        if connection.dialect.name != "sqlite":
+            connection.execute(text(f"ALTER TABLE {table.name} ALTER COLUMN {name} DROP NOT NULL"))
+        changes.append(f"made {name} nullable")
+
+    if "scheduler" not in existing:
+        connection.execute(text(f"UPDATE {table.name} SET scheduler = 'sm2' WHERE scheduler IS NULL"))
+    db.commit()
+    return changes
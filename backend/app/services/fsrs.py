@@ -0,0 +1,385 @@
+"""
+FSRS Scheduler
+Free Spaced Repetition Scheduler memory model over NumPy arrays.
+
+Each card carries a stability S (days until recall probability falls to 90%)
+and a difficulty D (1-10). Recall probability decays as
+R(t) = (1 + FACTOR * t / S) ** DECAY, and every review moves S and D by the
+FSRS-4.5 update rules, parameterised by 17 weights. All functions take arrays,
+so scheduling one card and replaying a whole deck's review history use the
+same code: a deck is replayed one review position at a time, vectorized over
+its cards. Weights can be fitted to a student's (or everyone's) review history
+by minimising the log-loss of predicted recall.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.optimize import minimize
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.models.smart_recommendations import FlashCard, SRSParameters
+from app.services.event_log import read_events, EVENT_FLASHCARD_REVIEW
+
+
+# FSRS-4.5 default weights
+DEFAULT_WEIGHTS = np.array([
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+    0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755
+])
+
+# Bounds used when fitting, per weight
+WEIGHT_BOUNDS = [
+    (0.1, 100.0), (0.1, 100.0), (0.1, 100.0), (0.1, 100.0),
+    (1.0, 10.0), (0.001, 4.0), (0.001, 4.0), (0.001, 0.75),
+    (0.0, 4.5), (0.0, 0.8), (0.001, 3.5), (0.001, 5.0),
+    (0.001, 0.25), (0.001, 0.9), (0.0, 4.0), (0.0, 1.0), (1.0, 6.0),
+]
+
+DECAY = -0.5
+FACTOR = 19 / 81
+
+# Recall probability at which a card is scheduled
+DESIRED_RETENTION = 0.9
+
+MIN_STABILITY = 0.01
+MAX_INTERVAL_DAYS = 36500
+
+# Reviews needed before fitted weights are trusted over the defaults
+MIN_REVIEWS_TO_FIT = 50
+
+# Ratings: 1 again, 2 hard, 3 good, 4 easy
+AGAIN, HARD, GOOD, EASY = 1, 2, 3, 4
+
+
+def quality_to_rating(quality) -> np.ndarray:
+    """Map SM-2 quality (0-5) to an FSRS rating: 0-2 again, 3 hard, 4 good, 5 easy"""
+    quality = np.asarray(quality)
+    return np.where(quality < 3, AGAIN, np.minimum(quality, 5) - 1).astype(np.int64)
+
+
+def retrievability(elapsed_days, stability) -> np.ndarray:
+    """Probability of recall after `elapsed_days` at the given stability"""
+    return (1 + FACTOR * np.asarray(elapsed_days) / np.asarray(stability)) ** DECAY
+
+
+def next_interval(stability, desired_retention: float = DESIRED_RETENTION) -> np.ndarray:
+    """Whole days until recall probability falls to `desired_retention`"""
+    interval = np.asarray(stability) / FACTOR * (desired_retention ** (1 / DECAY) - 1)
+    return np.clip(np.round(interval), 1, MAX_INTERVAL_DAYS).astype(np.int64)
+
+
+def initial_difficulty(rating, w: np.ndarray) -> np.ndarray:
+    """Difficulty after a card's first review: D0(G) = w4 - (G - 3) * w5"""
+    return np.clip(w[4] - (np.asarray(rating) - 3) * w[5], 1, 10)
+
+
+def next_state(
+    stability: np.ndarray,
+    difficulty: np.ndarray,
+    elapsed_days: np.ndarray,
+    rating: np.ndarray,
+    w: np.ndarray = DEFAULT_WEIGHTS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Memory state after a review.
+
+    Args:
+        stability: Current stability per card (NaN for a card never reviewed)
+        difficulty: Current difficulty per card (ignored for new cards)
+        elapsed_days: Days since each card's previous review
+        rating: FSRS rating per card (1-4)
+        w: Model weights
+
+    Returns:
+        (stability, difficulty) after the review
+    """
+    stability = np.asarray(stability, dtype=np.float64)
+    difficulty = np.asarray(difficulty, dtype=np.float64)
+    rating = np.asarray(rating, dtype=np.int64)
+    is_new = np.isnan(stability)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = retrievability(np.maximum(elapsed_days, 0), stability)
+
+        new_d = difficulty - w[6] * (rating - 3)
+        # Mean reversion towards the difficulty of a first "good"
+        new_d = np.clip(w[7] * initial_difficulty(GOOD, w) + (1 - w[7]) * new_d, 1, 10)
+
+        penalty = np.where(rating == HARD, w[15], 1.0) * np.where(rating == EASY, w[16], 1.0)
+        recalled = stability * (
+            1 + np.exp(w[8]) * (11 - new_d) * stability ** -w[9] * (np.exp(w[10] * (1 - r)) - 1) * penalty
+        )
+        forgotten = np.minimum(
+            w[11] * new_d ** -w[12] * ((stability + 1) ** w[13] - 1) * np.exp(w[14] * (1 - r)),
+            stability
+        )
+        new_s = np.where(rating == AGAIN, forgotten, recalled)
+
+    first_s = w[np.clip(rating, AGAIN, EASY) - 1]
+    new_s = np.where(is_new, first_s, new_s)
+    new_d = np.where(is_new, initial_difficulty(rating, w), new_d)
+    return np.clip(new_s, MIN_STABILITY, MAX_INTERVAL_DAYS), new_d
+
+
+def seed_state(interval, ease_factor) -> Tuple[np.ndarray, np.ndarray]:
+    """Approximate FSRS state for cards reviewed only under SM-2"""
+    stability = np.maximum(np.asarray(interval, dtype=np.float64), 1.0)
+    difficulty = np.clip(11 - (np.asarray(ease_factor, dtype=np.float64) - 1.3) * 5, 1, 10)
+    return stability, difficulty
+
+
+# ============================================================================
+# Review histories
+# ============================================================================
+
+class ReviewHistory:
+    """
+    Review sequences of many cards, left-aligned and padded into matrices.
+
+    Attributes:
+        card_ids: Card per row
+        ratings: FSRS rating per review (0 = padding)
+        elapsed: Days since the card's previous review (0 for the first)
+        last_review: Time of each card's last review
+    """
+
+    def __init__(self, sequences: Dict[int, List[Tuple[datetime, int]]]):
+        self.card_ids = sorted(sequences)
+        n = len(self.card_ids)
+        length = max((len(s) for s in sequences.values()), default=0)
+
+        self.ratings = np.zeros((n, length), dtype=np.int64)
+        self.elapsed = np.zeros((n, length), dtype=np.float64)
+        self.last_review: List[Optional[datetime]] = []
+        for row, card_id in enumerate(self.card_ids):
+            reviews = sorted(sequences[card_id], key=lambda review: review[0])
+            times = [when for when, _ in reviews]
+            self.ratings[row, :len(reviews)] = [rating for _, rating in reviews]
+            self.elapsed[row, 1:len(reviews)] = [
+                (b - a).total_seconds() / 86400 for a, b in zip(times, times[1:])
+            ]
+            self.last_review.append(times[-1] if times else None)
+
+    @property
+    def review_count(self) -> int:
+        return int((self.ratings > 0).sum())
+
+    @classmethod
+    def load(
+        cls,
+        db: Session,
+        student_id: Optional[int] = None,
+        card_ids: Optional[Sequence[int]] = None
+    ) -> "ReviewHistory":
+        """Read flashcard review events from the event log"""
+        wanted = set(card_ids) if card_ids is not None else None
+        sequences: Dict[int, List[Tuple[datetime, int]]] = {}
+        for event in read_events(db, 0, (EVENT_FLASHCARD_REVIEW,), student_id):
+            card_id = event.payload.get("flashcard_id")
+            if card_id is None or (wanted is not None and card_id not in wanted):
+                continue
+            rating = int(quality_to_rating(event.payload.get("quality", 0)))
+            sequences.setdefault(card_id, []).append((event.created_at, rating))
+        return cls(sequences)
+
+
+def replay(
+    history: ReviewHistory,
+    w: np.ndarray = DEFAULT_WEIGHTS,
+    stability: Optional[np.ndarray] = None,
+    difficulty: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run every card's reviews through the model, one review position at a
+    time across all cards.
+
+    Args:
+        stability, difficulty: State per card before its first review
+            (default: new cards, NaN)
+
+    Returns:
+        Final stability and difficulty per card, and the predicted recall
+        probability before each review (NaN for first reviews and padding)
+    """
+    n, length = history.ratings.shape
+    stability = np.full(n, np.nan) if stability is None else np.array(stability, dtype=np.float64)
+    difficulty = np.full(n, np.nan) if difficulty is None else np.array(difficulty, dtype=np.float64)
+    predicted = np.full((n, length), np.nan)
+
+    for t in range(length):
+        rating = history.ratings[:, t]
+        active = rating > 0
+        if t > 0:
+            with np.errstate(invalid="ignore"):
+                predicted[:, t] = np.where(active, retrievability(history.elapsed[:, t], stability), np.nan)
+        new_s, new_d = next_state(stability, difficulty, history.elapsed[:, t], np.maximum(rating, AGAIN), w)
+        stability = np.where(active, new_s, stability)
+        difficulty = np.where(active, new_d, difficulty)
+
+    return stability, difficulty, predicted
+
+
+def log_loss(history: ReviewHistory, w: np.ndarray = DEFAULT_WEIGHTS) -> float:
+    """Mean log-loss of predicted recall over every non-first review"""
+    _, _, predicted = replay(history, w)
+    mask = ~np.isnan(predicted)
+    if not mask.any():
+        return 0.0
+    p = np.clip(predicted[mask], 1e-6, 1 - 1e-6)
+    recalled = history.ratings[mask] > AGAIN
+    return float(-np.mean(np.where(recalled, np.log(p), np.log(1 - p))))
+
+
+def fit_weights(history: ReviewHistory, initial: np.ndarray = DEFAULT_WEIGHTS, max_iter: int = 50) -> np.ndarray:
+    """Weights minimising log_loss, searched within WEIGHT_BOUNDS"""
+    result = minimize(
+        lambda w: log_loss(history, w),
+        np.asarray(initial, dtype=np.float64),
+        method="L-BFGS-B",
+        bounds=WEIGHT_BOUNDS,
+        options={"maxiter": max_iter}
+    )
+    return result.x
+
+
+# ============================================================================
+# Parameters and scheduling
+# ============================================================================
+
+def get_weights(db: Session, student_id: int) -> np.ndarray:
+    """The student's fitted weights, else the global fit, else the defaults"""
+    rows = db.query(SRSParameters).filter(
+        or_(SRSParameters.student_id == student_id, SRSParameters.student_id.is_(None))
+    ).all()
+    rows.sort(key=lambda row: row.student_id is None)
+    return np.array(rows[0].weights, dtype=np.float64) if rows else DEFAULT_WEIGHTS
+
+
+def fit_parameters(db: Session, student_id: Optional[int] = None) -> Dict:
+    """
+    Fit weights to the review history of one student (or of everyone when
+    student_id is None) and store them. The caller commits.
+    """
+    history = ReviewHistory.load(db, student_id)
+    if history.review_count < MIN_REVIEWS_TO_FIT:
+        raise ValueError(
+            f"Need at least {MIN_REVIEWS_TO_FIT} reviews to fit parameters, found {history.review_count}"
+        )
+
+    baseline = log_loss(history)
+    weights = fit_weights(history)
+    loss = log_loss(history, weights)
+    if loss > baseline:
+        weights, loss = DEFAULT_WEIGHTS, baseline
+
+    params = db.query(SRSParameters).filter(
+        SRSParameters.student_id == student_id if student_id is not None else SRSParameters.student_id.is_(None)
+    ).first()
+    if not params:
+        params = SRSParameters(student_id=student_id)
+        db.add(params)
+    params.weights = [float(x) for x in weights]
+    params.log_loss = loss
+    params.review_count = history.review_count
+    params.fitted_at = datetime.utcnow()
+
+    return {
+        "student_id": student_id,
+        "weights": params.weights,
+        "log_loss": round(loss, 4),
+        "baseline_log_loss": round(baseline, 4),
+        "review_count": history.review_count,
+        "card_count": len(history.card_ids)
+    }
+
+
+def review_card(card: FlashCard, quality: int, now: datetime, w: np.ndarray = DEFAULT_WEIGHTS) -> datetime:
+    """
+    Schedule one card with FSRS; mirrors FlashCard.calculate_sm2_next_review.
+    """
+    if card.stability is None and card.last_reviewed is not None:
+        stability, difficulty = seed_state(card.interval or 1, card.ease_factor or 2.5)
+    else:
+        stability = np.nan if card.stability is None else card.stability
+        difficulty = np.nan if card.memory_difficulty is None else card.memory_difficulty
+
+    elapsed = (now - card.last_reviewed).total_seconds() / 86400 if card.last_reviewed else 0.0
+    new_s, new_d = next_state(
+        np.array([stability]), np.array([difficulty]), np.array([elapsed]), quality_to_rating([quality]), w
+    )
+
+    card.stability = float(new_s[0])
+    card.memory_difficulty = float(new_d[0])
+    card.interval = int(next_interval(new_s)[0])
+
+    if quality < 3:
+        card.repetitions = 0
+        card.streak = 0
+    else:
+        card.correct_reviews = (card.correct_reviews or 0) + 1
+        card.streak = (card.streak or 0) + 1
+        card.repetitions = (card.repetitions or 0) + 1
+
+    card.total_reviews = (card.total_reviews or 0) + 1
+    card.last_reviewed = now
+    card.next_review_date = now + timedelta(days=card.interval)
+    return card.next_review_date
+
+
+def reschedule_deck(db: Session, student_id: int, w: Optional[np.ndarray] = None) -> int:
+    """
+    Recompute FSRS state and due dates for all of a student's FSRS cards in
+    one pass. Cards are seeded from their SM-2 state when they were reviewed
+    before the log existed (more reviews on the card than in the log), as
+    review_card does, and their logged reviews are then replayed under the
+    weights. Written with one bulk update; the caller commits.
+
+    Returns:
+        Number of cards rescheduled
+    """
+    w = get_weights(db, student_id) if w is None else w
+    cards = db.query(
+        FlashCard.id, FlashCard.last_reviewed, FlashCard.interval, FlashCard.ease_factor, FlashCard.total_reviews
+    ).filter(
+        FlashCard.student_id == student_id,
+        FlashCard.scheduler == "fsrs",
+        FlashCard.last_reviewed.isnot(None)
+    ).all()
+    if not cards:
+        return 0
+
+    stability, difficulty = seed_state(
+        [card.interval or 1 for card in cards], [card.ease_factor or 2.5 for card in cards]
+    )
+    history = ReviewHistory.load(db, student_id, [card.id for card in cards])
+    if history.card_ids:
+        row = {card.id: i for i, card in enumerate(cards)}
+        rows = np.array([row[card_id] for card_id in history.card_ids])
+        logged = (history.ratings > 0).sum(axis=1)
+        total = np.array([cards[i].total_reviews or 0 for i in rows])
+        seeded = total > logged
+
+        # A seeded card's first logged review is taken to be on time
+        history.elapsed[seeded, 0] = stability[rows[seeded]]
+        replayed_s, replayed_d, _ = replay(
+            history, w,
+            np.where(seeded, stability[rows], np.nan),
+            np.where(seeded, difficulty[rows], np.nan)
+        )
+        stability[rows] = replayed_s
+        difficulty[rows] = replayed_d
+
+    intervals = next_interval(stability).tolist()
+    db.execute(update(FlashCard), [
+        {
+            "id": card.id,
+            "stability": float(s),
+            "memory_difficulty": float(d),
+            "interval": interval,
+            "next_review_date": card.last_reviewed + timedelta(days=interval)
+        }
+        for card, s, d, interval in zip(cards, stability.tolist(), difficulty.tolist(), intervals)
+    ])
+    return len(cards)
@@ -0,0 +1,115 @@
+"""
+Learning Path Planner
+Shortest-time ordering of the unmastered prerequisites of a target skill.
+
+The skills to study are read from the graph's precomputed prerequisite
+closure in one lookup. Every unsatisfied ancestor is included, even one
+behind a satisfied skill, since update_mastery can lower a level. They are
+ordered with a precedence-constrained shortest-processing-time heuristic:
+among the skills whose prerequisites are done, always study the quickest
+next. This keeps the order topologically valid and tends to unlock skills
+early, though it does not guarantee the least cumulative hours. Plans depend
+only on the graph version, the student's satisfied (level >= 3) skills and
+the target, and are memoized on exactly that key.
+"""
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+from app.services.mastery_snapshot import MasterySnapshot
+from app.services.skill_graph import SkillGraph
+
+
+# Number of memoized plans kept across all students
+PLAN_CACHE_SIZE = 1024
+
+
+class PathPlan(NamedTuple):
+    """Student-independent part of a learning path"""
+    order: List[int]            # Skill indices in study order
+    stages: List[int]           # Longest prerequisite chain below each skill within the plan
+    cumulative_hours: List[float]
+    critical_path_hours: float  # Hours to the target if parallel branches were studied at once
+
+
+_plans: "OrderedDict[tuple, PathPlan]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def plan_path(graph: SkillGraph, satisfied: np.ndarray, target: int) -> PathPlan:
+    """
+    Order the unsatisfied prerequisites of `target` (and the target itself)
+    for the least cumulative study time.
+
+    Args:
+        graph: Skill graph
+        satisfied: Boolean mask of skills at level >= 3
+        target: Index of the target skill
+    """
+    required = graph.ancestor_mask(target) & ~satisfied
+    required[target] = not satisfied[target]
+    members = np.flatnonzero(required).tolist()
+    if not members:
+        return PathPlan([], [], [], 0.0)
+
+    hours = graph.estimated_hours.tolist()
+    # Prerequisites of each skill that are themselves still to be studied
+    inner = required[graph.prereq_indices] & required[graph.edge_rows]
+    counts = np.bincount(graph.edge_rows[inner], minlength=graph.size)
+    pending = dict(zip(members, counts[members].tolist()))
+    ready = [(hours[i], i) for i in members if pending[i] == 0]
+    heapq.heapify(ready)
+
+    order, stages, cumulative = [], [], []
+    stage_of: Dict[int, int] = {}
+    finish: Dict[int, float] = {}
+    elapsed = 0.0
+
+    while ready:
+        duration, i = heapq.heappop(ready)
+        prereqs = [p for p in graph.prerequisites(i).tolist() if p in stage_of]
+
+        stage_of[i] = max((stage_of[p] + 1 for p in prereqs), default=0)
+        finish[i] = max((finish[p] for p in prereqs), default=0.0) + duration
+        elapsed += duration
+
+        order.append(i)
+        stages.append(stage_of[i])
+        cumulative.append(elapsed)
+
+        for j in graph.unlocks(i).tolist():
+            if j in pending:
+                pending[j] -= 1
+                if pending[j] == 0:
+                    heapq.heappush(ready, (hours[j], j))
+
+    return PathPlan(order, stages, cumulative, max(finish.values()))
+
+
+def get_path_plan(graph: SkillGraph, snapshot: MasterySnapshot, target: int) -> PathPlan:
+    """Memoized plan_path keyed on (graph version, satisfied skills, target)"""
+    satisfied = snapshot.satisfied
+    key = (graph.version, np.packbits(satisfied).tobytes(), target)
+
+    with _lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+            return plan
+
+    plan = plan_path(graph, satisfied, target)
+
+    with _lock:
+        _plans[key] = plan
+        while len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def clear_path_plans():
+    """Drop all memoized plans"""
+    with _lock:
+        _plans.clear()
@@ -3,12 +3,28 @@ Mastery Service
 Handles skill tree navigation, mastery assessment, and progression logic.
 """
 
+from sqlalchemy import func, insert
 from sqlalchemy.orm import Session
 from typing import List, Dict, Set, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from collections import defaultdict
 import random
 
-from app.models.mastery import MasterySkill, StudentMastery, Badge, StudentBadge, StudyPlan
+import numpy as np
+
+from app.models.mastery import MasterySkill, StudentMastery, Badge, StudentBadge, StudyPlan, StudyPlanTask
+from app.services.badge_engine import award_badges, load_student_stats, record_assessment, student_stats
+from app.services.event_log import publish_event, EVENT_SKILL_ASSESSMENT
+from app.services.learning_path import get_path_plan
+from app.services.mastery_snapshot import get_mastery_snapshot
+from app.services.plan_scheduler import dependent_closure, schedule_skills, LEARN_CHUNK_MINUTES
+from app.services.retention_forecast import review_minutes_by_day
+from app.services.response_cache import touch_student
+from app.services.skill_graph import get_skill_graph, PREREQUISITE_LEVEL
+
+
+# Priority weight per skill difficulty for next-skill recommendations
+DIFFICULTY_WEIGHTS = {"beginner": 20, "intermediate": 10, "advanced": 5, "expert": 2}
 
 
 class MasteryService:
@@ -23,45 +39,33 @@ class MasteryService:
         """
         Get complete skill tree with optional student progress.
         Returns tree structure with nodes and edges.
+        Uses the cached skill graph plus the student's mastery snapshot.
         """
-        skills = self.db.query(MasterySkill).all()
+        graph = get_skill_graph(self.db)
+        
+        if student_id:
+            snapshot = get_mastery_snapshot(self.db, student_id)
+            unlocked = snapshot.unlocked
+        else:
+            snapshot = None
+            unlocked = graph.unlocked_mask(np.zeros(graph.size, dtype=bool))
         
         # Build nodes
         nodes = []
-        for skill in skills:
-            node = skill.to_dict(include_prerequisites=True)
+        for i, skill_id in enumerate(graph.ids.tolist()):
+            node = graph.skill_dict(i, include_prerequisites=True)
+            mastery = snapshot.record(skill_id) if snapshot else None
             
-            # Add student progress if provided
-            if student_id:
-                mastery = self.db.query(StudentMastery).filter(
-                    StudentMastery.student_id == student_id,
-                    StudentMastery.skill_id == skill.id
-                ).first()
-                
-                node["is_unlocked"] = skill.is_unlocked_for_student(student_id, self.db)
-                node["mastery_level"] = mastery.mastery_level if mastery else 0
-                node["progress_percentage"] = mastery.progress_percentage if mastery else 0.0
-            else:
-                node["is_unlocked"] = len(skill.prerequisites) == 0
-                node["mastery_level"] = 0
-                node["progress_percentage"] = 0.0
+            node["is_unlocked"] = bool(unlocked[i])
+            node["mastery_level"] = mastery["mastery_level"] if mastery else 0
+            node["progress_percentage"] = mastery["progress_percentage"] if mastery else 0.0
             
             nodes.append(node)
         
-        # Build edges (prerequisite relationships)
-        edges = []
-        for skill in skills:
-            for prereq in skill.prerequisites:
-                edges.append({
-                    "source": prereq.id,
-                    "target": skill.id,
-                    "type": "prerequisite"
-                })
-        
         return {
             "nodes": nodes,
-            "edges": edges,
-            "total_skills": len(skills)
+            "edges": graph.edges(),
+            "total_skills": graph.size
         }
     
     def get_student_mastery_overview(self, student_id: int) -> Dict:
@@ -111,47 +115,56 @@ class MasteryService:
         """
         Assess student performance on a skill and update mastery level.
         """
-        skill = self.db.query(MasterySkill).filter(MasterySkill.id == skill_id).first()
-        if not skill:
+        graph = get_skill_graph(self.db)
+        if skill_id not in graph.index:
             raise ValueError(f"Skill {skill_id} not found")
+        i = graph.index[skill_id]
         
         # Check if skill is unlocked
-        if not skill.is_unlocked_for_student(student_id, self.db):
+        snapshot = get_mastery_snapshot(self.db, student_id)
+        if not snapshot.unlocked[i]:
             raise ValueError(f"Skill {skill_id} is locked. Complete prerequisites first.")
         
-        # Get or create mastery record
+        old_level = int(snapshot.level[i])
+        is_new_skill = not snapshot.has_record[i]
+        stats = load_student_stats(self.db, student_id)
+        
+        # Record the assessment; the mastery materializer creates/updates the
+        # record and folds it into the snapshot, decrementing the unmet
+        # prerequisite counters of dependent skills on a level-up
+        publish_event(self.db, student_id, EVENT_SKILL_ASSESSMENT, {
+            "skill_id": skill_id,
+            "correct": correct,
+            "time_spent": time_spent
+        })
+        record_assessment(
+            stats, correct, old_level, int(snapshot.level[i]), is_new_skill,
+            category=graph.skill_dict(i)["category"]
+        )
+        self.db.commit()
+        
         mastery = self.db.query(StudentMastery).filter(
             StudentMastery.student_id == student_id,
             StudentMastery.skill_id == skill_id
         ).first()
         
-        if not mastery:
-            mastery = StudentMastery(
-                student_id=student_id,
-                skill_id=skill_id
-            )
-            self.db.add(mastery)
-        
-        # Update mastery
-        old_level = mastery.mastery_level
-        mastery.update_mastery(correct, time_spent)
-        
-        self.db.commit()
-        self.db.refresh(mastery)
-        
-        # Check if new skills unlocked
+        # Check if new skills unlocked: only dependents of this skill can be
+        # affected, and the counters say which ones have nothing left unmet
         newly_unlocked = []
-        if mastery.mastery_level >= 3 and old_level < 3:
-            # Check what skills this unlocks
-            all_skills = self.db.query(MasterySkill).all()
-            for s in all_skills:
-                if skill in s.prerequisites:
-                    if s.is_unlocked_for_student(student_id, self.db):
-                        newly_unlocked.append({
-                            "id": s.id,
-                            "name": s.name,
-                            "description": s.description
-                        })
+        if mastery.mastery_level >= PREREQUISITE_LEVEL and old_level < PREREQUISITE_LEVEL:
+            for j in graph.unlocks(i).tolist():
+                if snapshot.unmet[j] == 0:
+                    s = graph.skill_dict(j)
+                    newly_unlocked.append({
+                        "id": s["id"],
+                        "name": s["name"],
+                        "description": s["description"]
+                    })
+        
+        # A level change moves this skill's (and its dependents') remaining
+        # work in any active study plan; re-plan just that suffix
+        if mastery.mastery_level != old_level:
+            StudyPlanService(self.db).replan_for_skills(student_id, [skill_id])
         
         return {
             "mastery": mastery.to_dict(),
@@ -165,106 +178,90 @@ class MasteryService:
         """
         Get recommended skills for student to work on next.
         Prioritizes: unlocked skills, closest to mastery, foundational skills.
+        Scores every skill at once over the skill graph and mastery snapshot.
         """
-        all_skills = self.db.query(MasterySkill).all()
-        recommendations = []
+        graph = get_skill_graph(self.db)
+        snapshot = get_mastery_snapshot(self.db, student_id)
         
-        for skill in all_skills:
-            # Check if unlocked
-            if not skill.is_unlocked_for_student(student_id, self.db):
-                continue
-            
-            # Get current mastery
-            mastery = self.db.query(StudentMastery).filter(
-                StudentMastery.student_id == student_id,
-                StudentMastery.skill_id == skill.id
-            ).first()
-            
-            # Skip if already mastered
-            if mastery and mastery.mastery_level >= 5:
-                continue
-            
-            # Calculate priority score
-            priority_score = 0
-            
-            # Factor 1: Progress (skills close to next level)
-            if mastery:
-                progress_factor = mastery.progress_percentage / 100.0
-                priority_score += progress_factor * 30
-            
-            # Factor 2: Foundation (skills that unlock others)
-            unlocks_count = len(skill.unlocks)
-            priority_score += min(unlocks_count * 10, 30)
-            
-            # Factor 3: Difficulty (start with easier skills)
-            difficulty_map = {"beginner": 20, "intermediate": 10, "advanced": 5, "expert": 2}
-            priority_score += difficulty_map.get(skill.difficulty, 10)
-            
-            # Factor 4: Recent activity (deprioritize recently worked on)
-            if mastery and mastery.last_assessed_at:
-                hours_since = (datetime.now() - mastery.last_assessed_at).total_seconds() / 3600
-                if hours_since < 24:
-                    priority_score -= 20
-            
+        # Unlocked and not yet mastered
+        candidates = np.flatnonzero(snapshot.unlocked & (snapshot.level < 5))
+        if len(candidates) == 0 or limit <= 0:
+            return []
+        
+        has_record = snapshot.has_record[candidates]
+        
+        # Factor 1: Progress (skills close to next level)
+        scores = np.where(has_record, snapshot.progress[candidates] / 100.0 * 30, 0.0)
+        
+        # Factor 2: Foundation (skills that unlock others)
+        unlocks_count = graph.out_degree[candidates]
+        scores += np.minimum(unlocks_count * 10, 30)
+        
+        # Factor 3: Difficulty (start with easier skills)
+        scores += graph.difficulty_weights(DIFFICULTY_WEIGHTS, 10)[candidates]
+        
+        # Factor 4: Recent activity (deprioritize recently worked on)
+        with np.errstate(invalid="ignore"):
+            recent = snapshot.hours_since_assessed()[candidates] < 24
+        scores -= np.where(has_record & recent, 20, 0)
+        
+        # Top `limit` by score; ties keep skill order like a stable sort
+        top = np.arange(len(candidates))
+        if len(candidates) > limit:
+            threshold = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            top = np.flatnonzero(scores >= threshold)
+        top = top[np.lexsort((top, -scores[top]))][:limit]
+        
+        recommendations = []
+        for k in top.tolist():
+            i = int(candidates[k])
             recommendations.append({
-                "skill": skill.to_dict(include_prerequisites=True),
-                "mastery": mastery.to_dict() if mastery else None,
-                "priority_score": priority_score,
-                "unlocks_count": unlocks_count
+                "skill": graph.skill_dict(i, include_prerequisites=True),
+                "mastery": snapshot.record(int(graph.ids[i])),
+                "priority_score": float(scores[k]) if has_record[k] else int(scores[k]),
+                "unlocks_count": int(unlocks_count[k])
             })
         
-        # Sort by priority score
-        recommendations.sort(key=lambda x: x["priority_score"], reverse=True)
-        
-        return recommendations[:limit]
+        return recommendations
     
     def get_learning_path(self, student_id: int, target_skill_id: int) -> Dict:
         """
         Generate optimal learning path to reach a target skill.
-        Uses topological sort on prerequisite DAG.
+        Orders unmastered prerequisites topologically, quickest skills first,
+        to minimise cumulative hours; skills in the same stage can be studied
+        in parallel.
         """
-        target_skill = self.db.query(MasterySkill).filter(MasterySkill.id == target_skill_id).first()
-        if not target_skill:
+        graph = get_skill_graph(self.db)
+        if target_skill_id not in graph.index:
             raise ValueError(f"Target skill {target_skill_id} not found")
+        target = graph.index[target_skill_id]
+        snapshot = get_mastery_snapshot(self.db, student_id)
         
-        # Get all prerequisites recursively
-        path = []
-        visited = set()
-        
-        def get_prerequisites_recursive(skill: MasterySkill):
-            if skill.id in visited:
-                return
-            visited.add(skill.id)
-            
-            for prereq in skill.prerequisites:
-                get_prerequisites_recursive(prereq)
-            
-            # Check student mastery
-            mastery = self.db.query(StudentMastery).filter(
-                StudentMastery.student_id == student_id,
-                StudentMastery.skill_id == skill.id
-            ).first()
-            
-            # Only add if not mastered
-            if not mastery or mastery.mastery_level < 3:
-                path.append({
-                    "skill": skill.to_dict(),
-                    "mastery_level": mastery.mastery_level if mastery else 0,
-                    "is_unlocked": skill.is_unlocked_for_student(student_id, self.db),
-                    "estimated_hours": skill.estimated_hours
-                })
+        plan = get_path_plan(graph, snapshot, target)
         
-        get_prerequisites_recursive(target_skill)
+        path = []
+        for i, stage, cumulative in zip(plan.order, plan.stages, plan.cumulative_hours):
+            skill = graph.skill_dict(i)
+            path.append({
+                "skill": skill,
+                "mastery_level": int(snapshot.level[i]),
+                "is_unlocked": bool(snapshot.unlocked[i]),
+                "estimated_hours": skill["estimated_hours"],
+                "stage": stage,
+                "cumulative_hours": round(cumulative, 2)
+            })
         
         # Calculate total time
-        total_hours = sum(item["estimated_hours"] for item in path)
+        total_hours = plan.cumulative_hours[-1] if path else 0.0
         
         return {
-            "target_skill": target_skill.to_dict(),
+            "target_skill": graph.skill_dict(target),
             "path": path,
             "total_skills": len(path),
             "estimated_hours": total_hours,
-            "estimated_days": round(total_hours / 2, 1)  # Assuming 2 hours/day
+            "estimated_days": round(total_hours / 2, 1),  # Assuming 2 hours/day
+            "critical_path_hours": plan.critical_path_hours,
+            "stages": max(plan.stages) + 1 if path else 0
         }
 
 
@@ -276,43 +273,16 @@ class BadgeService:
     def __init__(self, db: Session):
         self.db = db
     
-    def check_and_award_badges(self, student_id: int) -> List[Dict]:
+    def check_and_award_badges(self, student_id: int, full: bool = False) -> List[Dict]:
         """
-        Check all badge criteria and award newly earned badges.
+        Check badge criteria and award newly earned badges.
+        Only badges affected by stats that changed since the last check are
+        evaluated unless `full` is set.
         """
-        # Get student stats
-        student_stats = self._get_student_stats(student_id)
-        
-        # Get all active badges
-        all_badges = self.db.query(Badge).filter(Badge.is_active == True).all()
-        
-        # Get already earned badges
-        earned_badge_ids = set(
-            b.badge_id for b in self.db.query(StudentBadge).filter(
-                StudentBadge.student_id == student_id
-            ).all()
+        newly_earned = award_badges(
+            self.db, student_id, self._generate_verification_code, full=full
         )
-        
-        # Check criteria and award
-        newly_earned = []
-        for badge in all_badges:
-            # Skip if already earned
-            if badge.id in earned_badge_ids:
-                continue
-            
-            # Check criteria
-            if badge.check_criteria(student_stats):
-                student_badge = StudentBadge(
-                    student_id=student_id,
-                    badge_id=badge.id,
-                    evidence=student_stats,
-                    verification_code=self._generate_verification_code(student_id, badge.id)
-                )
-                self.db.add(student_badge)
-                newly_earned.append(badge.to_dict())
-        
-        if newly_earned:
-            self.db.commit()
+        self.db.commit()
         
         return newly_earned
     
@@ -343,67 +313,7 @@ class BadgeService:
         """
         Get comprehensive student statistics for badge criteria checking.
         """
-        from app.models.models import Student, LearningSession
-        
-        student = self.db.query(Student).filter(Student.id == student_id).first()
-        if not student:
-            return {}
-        
-        masteries = self.db.query(StudentMastery).filter(
-            StudentMastery.student_id == student_id
-        ).all()
-        
-        sessions = self.db.query(LearningSession).filter(
-            LearningSession.student_id == student_id
-        ).all()
-        
-        mastered_skills = len([m for m in masteries if m.mastery_level >= 5])
-        total_attempts = sum(m.total_attempts for m in masteries)
-        correct_attempts = sum(m.correct_attempts for m in masteries)
-        
-        # Calculate streak
-        streak = self._calculate_streak(student_id)
-        
-        return {
-            "student_id": student_id,
-            "mastered_skills": mastered_skills,
-            "total_skills": len(masteries),
-            "total_attempts": total_attempts,
-            "correct_attempts": correct_attempts,
-            "accuracy": (correct_attempts / total_attempts * 100) if total_attempts > 0 else 0,
-            "total_sessions": len(sessions),
-            "current_streak": streak,
-            "account_age_days": (datetime.now() - student.created_at).days if student.created_at else 0
-        }
-    
-    def _calculate_streak(self, student_id: int) -> int:
-        """Calculate current daily streak"""
-        masteries = self.db.query(StudentMastery).filter(
-            StudentMastery.student_id == student_id
-        ).order_by(StudentMastery.last_assessed_at.desc()).all()
-        
-        if not masteries:
-            return 0
-        
-        streak = 0
-        current_date = datetime.now().date()
-        
-        for mastery in masteries:
-            if not mastery.last_assessed_at:
-                continue
-            
-            assessment_date = mastery.last_assessed_at.date()
-            
-            if assessment_date == current_date:
-                streak = max(streak, 1)
-                current_date -= timedelta(days=1)
-            elif assessment_date == current_date - timedelta(days=1):
-                streak += 1
-                current_date -= timedelta(days=1)
-            else:
-                break
-        
-        return streak
+        return student_stats(self.db, load_student_stats(self.db, student_id))
     
     def _generate_verification_code(self, student_id: int, badge_id: int) -> str:
         """Generate unique verification code"""
@@ -461,12 +371,14 @@ class StudyPlanService:
         
         # Generate schedule
         schedule = self._generate_schedule(
+            student_id=student_id,
             skills=skills,
             days_available=days_available,
             daily_minutes=daily_minutes
         )
         
         # Create study plan
+        daily_tasks = schedule.pop("daily_tasks", [])
         plan = StudyPlan(
             student_id=student_id,
             title=f"{goal_type.replace('_', ' ').title()} Study Plan",
@@ -476,106 +388,73 @@ class StudyPlanService:
             target_date=target_date,
             daily_minutes=daily_minutes,
             schedule=schedule,
-            total_tasks=len(schedule.get("daily_tasks", []))
+            total_tasks=len(daily_tasks)
         )
         
         self.db.add(plan)
+        self.db.flush()
+        self._save_tasks(plan, daily_tasks, datetime.now().date())
         self.db.commit()
         self.db.refresh(plan)
         
         return {
-            "plan": plan.to_dict(),
+            "plan": {**plan.to_dict(), "schedule": plan.export_schedule()},
             "feasibility": feasibility,
             "required_daily_minutes": round(required_daily_minutes, 1),
             "total_hours": total_hours,
             "skills": [skill.to_dict() for skill in skills]
         }
     
+    def _save_tasks(self, plan: StudyPlan, daily_tasks: List[Dict], start_date: date):
+        """Bulk insert schedule entries as study_plan_tasks rows"""
+        if not daily_tasks:
+            return
+        touch_student(self.db, plan.student_id)
+        self.db.execute(insert(StudyPlanTask), [
+            {
+                "plan_id": plan.id,
+                "student_id": plan.student_id,
+                "day": task["day"],
+                "due_date": start_date + timedelta(days=task["day"]),
+                "skill_id": task.get("skill_id"),
+                "skill_name": task.get("skill_name"),
+                "minutes": task.get("minutes", 0),
+                "task_type": task.get("task_type"),
+                "is_completed": False
+            }
+            for task in daily_tasks
+        ])
+    
     def _generate_schedule(
         self,
+        student_id: int,
         skills: List[MasterySkill],
         days_available: int,
         daily_minutes: int
     ) -> Dict:
         """
         Generate day-by-day schedule.
-        Uses spaced repetition principles and skill dependencies.
+        Packs learn and spaced-review tasks into per-day capacity bins,
+        respecting prerequisite order from the skill graph, around the
+        projected flashcard review load.
         """
-        # Sort skills by prerequisites (topological sort)
-        sorted_skills = self._topological_sort(skills)
+        graph = get_skill_graph(self.db)
+        indices = [graph.index[skill.id] for skill in skills if skill.id in graph.index]
         
-        daily_tasks = []
-        current_day = 0
-        
-        for skill in sorted_skills:
-            # Calculate days needed for this skill
-            skill_hours = skill.estimated_hours
-            days_for_skill = max(1, int((skill_hours * 60) / daily_minutes))
-            
-            # Distribute across days with spaced repetition
-            for day in range(days_for_skill):
-                if current_day >= days_available:
-                    break
-                
-                task_day = current_day + day
-                daily_tasks.append({
-                    "day": task_day,
-                    "date": (datetime.now() + timedelta(days=task_day)).isoformat(),
-                    "skill_id": skill.id,
-                    "skill_name": skill.name,
-                    "minutes": daily_minutes,
-                    "task_type": "learn" if day < days_for_skill - 1 else "review"
-                })
-            
-            current_day += days_for_skill
-        
-        # Add review days for spacing
-        review_days = [7, 14, 21, 28]  # Review on these days
-        for review_day in review_days:
-            if review_day < days_available:
-                for skill in sorted_skills:
-                    daily_tasks.append({
-                        "day": review_day,
-                        "date": (datetime.now() + timedelta(days=review_day)).isoformat(),
-                        "skill_id": skill.id,
-                        "skill_name": skill.name,
-                        "minutes": 15,
-                        "task_type": "review"
-                    })
-        
-        # Sort by day
-        daily_tasks.sort(key=lambda x: x["day"])
+        load = review_minutes_by_day(self.db, student_id, days_available)
+        flashcard_minutes = sum(load)
+        result = schedule_skills(graph, indices, days_available, daily_minutes, load=load)
         
         return {
-            "daily_tasks": daily_tasks,
+            "daily_tasks": result["daily_tasks"],
             "total_days": days_available,
-            "skills_count": len(skills)
+            "skills_count": len(skills),
+            "flashcard_review_minutes": flashcard_minutes,
+            "max_daily_minutes": max(result["load"], default=0),
+            "unscheduled_minutes": result["unscheduled_minutes"],
+            "dropped_reviews": result["dropped_reviews"]
         }
     
-    def _topological_sort(self, skills: List[MasterySkill]) -> List[MasterySkill]:
-        """
-        Sort skills by prerequisite dependencies.
-        Skills with no prerequisites come first.
-        """
-        sorted_skills = []
-        visited = set()
-        
-        def visit(skill: MasterySkill):
-            if skill.id in visited:
-                return
-            visited.add(skill.id)
-            
-            for prereq in skill.prerequisites:
-                if prereq in skills:
-                    visit(prereq)
-            
-            sorted_skills.append(skill)
-        
-        for skill in skills:
-            visit(skill)
-        
-        return sorted_skills
-    
     def adjust_plan(self, plan_id: int, performance_data: Dict) -> Dict:
         """
         Adjust study plan based on actual performance.
@@ -587,6 +466,12 @@ class StudyPlanService:
         # Update progress
         plan.calculate_progress(self.db)
         
+        # Re-plan the skills assessed since the last adjustment
+        since = np.datetime64(plan.last_adjusted_at or plan.created_at or datetime.min, "us")
+        snapshot = get_mastery_snapshot(self.db, plan.student_id)
+        changed = np.flatnonzero(snapshot.last_assessed >= since)
+        replanned = self.replan(plan, snapshot.graph.ids[changed].tolist())
+        
         # Adjust based on performance
         plan.adjust_schedule(performance_data)
         
@@ -596,39 +481,199 @@ class StudyPlanService:
         return {
             "plan": plan.to_dict(),
             "adjustments_made": plan.adjustment_count,
-            "performance_trend": plan.performance_trend
+            "performance_trend": plan.performance_trend,
+            "replanned": replanned
+        }
+    
+    def replan(self, plan: StudyPlan, changed_skill_ids: List[int], today: Optional[date] = None) -> Dict:
+        """
+        Re-schedule the part of a plan affected by mastery changes.
+        
+        Only tasks after today that are not completed, and only those of the
+        changed skills and their dependents in the plan, are replaced. Past,
+        completed and unaffected tasks stay as they are and keep their
+        minutes booked. Skills now at level 3 or above get reviews only;
+        others keep their estimated minutes minus completed learn work.
+        The caller commits.
+        """
+        graph = get_skill_graph(self.db)
+        snapshot = get_mastery_snapshot(self.db, plan.student_id)
+        unchanged = {"replanned_skills": [], "removed_tasks": 0, "added_tasks": 0}
+        
+        rows = self.db.query(
+            StudyPlanTask.id, StudyPlanTask.day, StudyPlanTask.due_date, StudyPlanTask.skill_id,
+            StudyPlanTask.minutes, StudyPlanTask.task_type, StudyPlanTask.is_completed
+        ).filter(StudyPlanTask.plan_id == plan.id).all()
+        if not rows:
+            return unchanged
+        
+        start_date = rows[0].due_date - timedelta(days=rows[0].day)
+        from_day = ((today or datetime.now().date()) - start_date).days + 1
+        days = (plan.schedule or {}).get("total_days") or max(row.day for row in rows) + 1
+        if from_day >= days:
+            return unchanged
+        
+        members = [graph.index[s] for s in {row.skill_id for row in rows} if s in graph.index]
+        changed = [graph.index[s] for s in changed_skill_ids if s in graph.index]
+        affected = dependent_closure(graph, changed, members)
+        if not affected:
+            return unchanged
+        affected_ids = set(graph.ids[affected].tolist())
+        
+        replaced = {
+            row.id for row in rows
+            if row.skill_id in affected_ids and row.day >= from_day and not row.is_completed
+        }
+        
+        # Kept tasks: booked minutes per day, completed learn work of affected
+        # skills and the finish day of every unaffected skill
+        load = [0] * days
+        done: Dict[int, int] = defaultdict(int)
+        finished: Dict[int, int] = {}
+        for row in rows:
+            if row.id in replaced:
+                continue
+            if row.day < days:
+                load[row.day] += row.minutes or 0
+            if row.task_type != "learn" or row.skill_id not in graph.index:
+                continue
+            i = graph.index[row.skill_id]
+            if row.skill_id not in affected_ids:
+                finished[i] = max(finished.get(i, row.day), row.day)
+            elif row.is_completed:
+                done[i] += row.minutes or 0
+        
+        # Projected flashcard reviews, starting today (from_day - 1)
+        reviews = review_minutes_by_day(self.db, plan.student_id, days - from_day + 1)
+        for day in range(from_day, days):
+            load[day] += reviews[day - from_day + 1]
+        
+        need = {}
+        for i in affected:
+            if snapshot.satisfied[i]:
+                need[i] = 0
+            else:
+                need[i] = max(LEARN_CHUNK_MINUTES, int(round(graph.estimated_hours[i] * 60)) - done[i])
+        
+        result = schedule_skills(
+            graph, affected, days, plan.daily_minutes or 30,
+            start_day=from_day, load=load, finished=finished, minutes=need
+        )
+        
+        if replaced:
+            self.db.query(StudyPlanTask).filter(
+                StudyPlanTask.id.in_(replaced)
+            ).delete(synchronize_session=False)
+            touch_student(self.db, plan.student_id)
+        self._save_tasks(plan, result["daily_tasks"], start_date)
+        plan.total_tasks = len(rows) - len(replaced) + len(result["daily_tasks"])
+        self.db.expire(plan, ["tasks"])
+        
+        return {
+            "replanned_skills": sorted(affected_ids),
+            "removed_tasks": len(replaced),
+            "added_tasks": len(result["daily_tasks"]),
+            "unscheduled_minutes": result["unscheduled_minutes"],
+            "dropped_reviews": result["dropped_reviews"]
         }
     
+    def replan_for_skills(self, student_id: int, skill_ids: List[int]) -> List[Dict]:
+        """
+        Re-plan every active plan of the student that schedules any of the
+        given skills, and commit.
+        """
+        plans = self.db.query(StudyPlan).filter(
+            StudyPlan.student_id == student_id,
+            StudyPlan.is_active == True,
+            StudyPlan.id.in_(
+                self.db.query(StudyPlanTask.plan_id).filter(
+                    StudyPlanTask.student_id == student_id,
+                    StudyPlanTask.skill_id.in_(skill_ids)
+                )
+            )
+        ).all()
+        
+        results = [{"plan_id": plan.id, **self.replan(plan, skill_ids)} for plan in plans]
+        if plans:
+            self.db.commit()
+        return results
+    
     def get_today_tasks(self, student_id: int) -> Dict:
         """
         Get today's tasks from active study plans.
         """
-        active_plans = self.db.query(StudyPlan).filter(
-            StudyPlan.student_id == student_id,
+        today = datetime.now().date()
+        result = self.get_tasks_between(student_id, today, today)
+        
+        return {
+            "date": today.isoformat(),
+            **result
+        }
+    
+    def get_tasks_between(self, student_id: int, start: date, end: date) -> Dict:
+        """
+        Get tasks from active study plans due between two dates (inclusive).
+        One range scan over the (student_id, due_date) index.
+        """
+        rows = self.db.query(StudyPlanTask, StudyPlan.title).join(
+            StudyPlan, StudyPlanTask.plan_id == StudyPlan.id
+        ).filter(
+            StudyPlanTask.student_id == student_id,
+            StudyPlanTask.due_date >= start,
+            StudyPlanTask.due_date <= end,
             StudyPlan.is_active == True
-        ).all()
+        ).order_by(StudyPlanTask.due_date, StudyPlanTask.plan_id, StudyPlanTask.day, StudyPlanTask.id).all()
+        
+        tasks = [
+            {**task.to_dict(), "plan_id": task.plan_id, "plan_title": title}
+            for task, title in rows
+        ]
         
-        today_tasks = []
-        total_minutes = 0
+        return {
+            "total_tasks": len(tasks),
+            "total_minutes": sum(task["minutes"] or 0 for task in tasks),
+            "completed_tasks": sum(1 for task in tasks if task["is_completed"]),
+            "tasks": tasks
+        }
+    
+    def complete_task(self, student_id: int, task_id: int) -> Dict:
+        """
+        Mark one plan task as completed and bump the plan's counter.
+        """
+        task = self.db.query(StudyPlanTask).filter(
+            StudyPlanTask.id == task_id,
+            StudyPlanTask.student_id == student_id
+        ).first()
+        if not task:
+            raise ValueError(f"Task {task_id} not found")
+        
+        if not task.is_completed:
+            task.is_completed = True
+            task.completed_at = datetime.now()
+            self.db.query(StudyPlan).filter(StudyPlan.id == task.plan_id).update(
+                {StudyPlan.completed_tasks: func.coalesce(StudyPlan.completed_tasks, 0) + 1},
+                synchronize_session=False
+            )
+            self.db.commit()
         
-        for plan in active_plans:
-            if not plan.schedule or "daily_tasks" not in plan.schedule:
+        return task.to_dict()
+    
+    def backfill_tasks(self) -> int:
+        """
+        Move schedules stored as JSON (plans created before study_plan_tasks
+        existed) into task rows. Returns the number of plans migrated.
+        """
+        migrated = 0
+        for plan in self.db.query(StudyPlan).all():
+            schedule = dict(plan.schedule or {})
+            daily_tasks = schedule.pop("daily_tasks", None)
+            if daily_tasks is None:
                 continue
             
-            days_since_start = (datetime.now() - plan.created_at).days
-            
-            for task in plan.schedule["daily_tasks"]:
-                if task["day"] == days_since_start:
-                    today_tasks.append({
-                        **task,
-                        "plan_id": plan.id,
-                        "plan_title": plan.title
-                    })
-                    total_minutes += task.get("minutes", 0)
+            start_date = plan.created_at.date() if plan.created_at else datetime.now().date()
+            self._save_tasks(plan, daily_tasks, start_date)
+            plan.schedule = schedule
+            migrated += 1
         
-        return {
-            "date": datetime.now().date().isoformat(),
-            "total_tasks": len(today_tasks),
-            "total_minutes": total_minutes,
-            "tasks": today_tasks
-        }
+        self.db.commit()
+        return migrated
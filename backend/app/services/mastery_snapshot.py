@@ -0,0 +1,164 @@
+"""
+Mastery Snapshot
+One-query view of a student's StudentMastery rows, aligned with the skill graph.
+
+All of a student's mastery rows are fetched at once and laid out as arrays
+indexed like SkillGraph (level, progress, last_assessed), so tree, path,
+recommendation and study-plan code never query mastery per skill. Snapshots
+are cached on the session for the duration of a request and kept current as
+mastery is written: the snapshot also holds per-skill counters of unmet
+prerequisites, which a level-up decrements along the graph's reverse index.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.mastery import StudentMastery
+from app.services.skill_graph import SkillGraph, get_skill_graph, PREREQUISITE_LEVEL
+
+
+_CACHE_KEY = "mastery_snapshots"
+
+
+class MasterySnapshot:
+    """
+    A student's mastery state over every skill in a SkillGraph.
+
+    Attributes:
+        graph: Skill graph the arrays are aligned with
+        student_id: Student the snapshot belongs to
+        level: Mastery level per skill (0 when never assessed)
+        progress: Progress percentage per skill
+        last_assessed: Last assessment time per skill (NaT when never assessed)
+        has_record: Whether a StudentMastery row exists per skill
+        records: StudentMastery.to_dict() per skill id
+        unmet: Direct prerequisites below level 3, per skill
+    """
+
+    def __init__(self, graph: SkillGraph, student_id: int, masteries):
+        self.graph = graph
+        self.student_id = student_id
+
+        n = graph.size
+        self.level = np.zeros(n, dtype=np.int64)
+        self.progress = np.zeros(n, dtype=np.float64)
+        self.last_assessed = np.full(n, np.datetime64("NaT"), dtype="datetime64[us]")
+        self.has_record = np.zeros(n, dtype=bool)
+        self.records: Dict[int, Dict] = {}
+
+        for mastery in masteries:
+            self.records[mastery.skill_id] = mastery.to_dict()
+            i = graph.index.get(mastery.skill_id)
+            if i is None:
+                continue
+            self.has_record[i] = True
+            self.level[i] = mastery.mastery_level or 0
+            self.progress[i] = mastery.progress_percentage or 0.0
+            if mastery.last_assessed_at:
+                self.last_assessed[i] = np.datetime64(mastery.last_assessed_at, "us")
+
+        self.unmet = graph.unmet_prerequisite_counts(self.satisfied)
+
+    @property
+    def satisfied(self) -> np.ndarray:
+        """Skills that count as met prerequisites (level >= 3)"""
+        return self.level >= PREREQUISITE_LEVEL
+
+    @property
+    def unlocked(self) -> np.ndarray:
+        """Skills whose direct prerequisites are all satisfied"""
+        return self.unmet == 0
+
+    def update(self, mastery: StudentMastery) -> List[int]:
+        """
+        Fold a changed StudentMastery row into the snapshot.
+
+        When the skill crosses level 3, the unmet-prerequisite counter of every
+        skill it unlocks is decremented (O(out-degree)); a drop below level 3
+        (update_mastery recomputes the level from accuracy, so it can fall)
+        increments them again.
+
+        Returns:
+            Indices of skills that became unlocked
+        """
+        self.records[mastery.skill_id] = mastery.to_dict()
+        i = self.graph.index.get(mastery.skill_id)
+        if i is None:
+            return []
+
+        was_satisfied = self.level[i] >= PREREQUISITE_LEVEL
+        self.has_record[i] = True
+        self.level[i] = mastery.mastery_level or 0
+        self.progress[i] = mastery.progress_percentage or 0.0
+        if mastery.last_assessed_at:
+            self.last_assessed[i] = np.datetime64(mastery.last_assessed_at, "us")
+
+        is_satisfied = self.level[i] >= PREREQUISITE_LEVEL
+        if was_satisfied == is_satisfied:
+            return []
+
+        unlocks = self.graph.unlocks(i)
+        if not is_satisfied:
+            self.unmet[unlocks] += 1
+            return []
+        self.unmet[unlocks] -= 1
+        return unlocks[self.unmet[unlocks] == 0].tolist()
+
+    def hours_since_assessed(self, now: Optional[datetime] = None) -> np.ndarray:
+        """Hours since each skill was last assessed (NaN when never assessed)"""
+        now = np.datetime64(now or datetime.now(), "us")
+        hours = (now - self.last_assessed) / np.timedelta64(1, "h")
+        return np.where(np.isnat(self.last_assessed), np.nan, hours)
+
+    def record(self, skill_id: int) -> Optional[Dict]:
+        """StudentMastery.to_dict() for a skill, or None when not started"""
+        return self.records.get(skill_id)
+
+    def progress_of(self, skill_id: int) -> float:
+        """Progress percentage for a skill, 0.0 when not started"""
+        record = self.records.get(skill_id)
+        return (record["progress_percentage"] or 0.0) if record else 0.0
+
+    @classmethod
+    def load(cls, db: Session, student_id: int, graph: Optional[SkillGraph] = None) -> "MasterySnapshot":
+        """Build a snapshot with a single StudentMastery query"""
+        graph = graph or get_skill_graph(db)
+        masteries = db.query(StudentMastery).filter(
+            StudentMastery.student_id == student_id
+        ).all()
+        return cls(graph, student_id, masteries)
+
+
+def get_mastery_snapshot(db: Session, student_id: int) -> MasterySnapshot:
+    """
+    Return the student's snapshot for this session, loading it on first use.
+    A snapshot built against an older skill graph is reloaded.
+    """
+    graph = get_skill_graph(db)
+    cache = db.info.setdefault(_CACHE_KEY, {})
+    snapshot = cache.get(student_id)
+    if snapshot is None or snapshot.graph.version != graph.version:
+        snapshot = MasterySnapshot.load(db, student_id, graph)
+        cache[student_id] = snapshot
+    return snapshot
+
+
+def update_mastery_snapshot(db: Session, mastery: StudentMastery) -> List[int]:
+    """Apply a mastery write to the student's cached snapshot, if one is loaded"""
+    snapshot = db.info.get(_CACHE_KEY, {}).get(mastery.student_id)
+    if snapshot is None:
+        return []
+    return snapshot.update(mastery)
+
+
+def invalidate_mastery_snapshot(db: Session, student_id: Optional[int] = None):
+    """Drop cached snapshots for one student (or all) after mastery changes"""
+    cache = db.info.get(_CACHE_KEY)
+    if not cache:
+        return
+    if student_id is None:
+        cache.clear()
+    else:
+        cache.pop(student_id, None)
@@ -0,0 +1,182 @@
+"""
+Pace Baselines
+Population time-on-task baselines per concept, computed from the data.
+
+A nightly job streams every student's running per-concept statistics
+(LearningPace.time_on_task_data, kept up to date from the event log) and
+feeds each student's average time per answer into one quantile sketch per
+concept. The medians and quartiles land in the small pace_baselines table,
+which pace analysis reads through a process-local cache. The job reads one
+row per student instead of raw learning_sessions, and the sketches keep
+memory bounded by the range of times rather than the number of students.
+
+Concepts with too little data fall back to the cohort-wide "default"
+baseline, and before the first run to the cold-start COLD_START_BASELINES.
+"""
+import math
+import threading
+import time as clock
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.learning_pace import LearningPace, PaceBaseline
+
+
+# Cold-start concept completion times (in seconds), used until baselines are computed
+COLD_START_BASELINES = {
+    "algebra": 180,  # 3 minutes
+    "calculus": 240,  # 4 minutes
+    "geometry": 200,  # 3.3 minutes
+    "statistics": 220,  # 3.7 minutes
+    "default": 200
+}
+
+DEFAULT_CONCEPT = "default"
+
+# A student's average counts once they have this many timed answers on the concept
+MIN_ANSWERS_PER_STUDENT = 3
+
+# A concept gets its own baseline once this many students contribute
+MIN_STUDENTS = 5
+
+# Quantiles are within this relative error of the exact value
+RELATIVE_ACCURACY = 0.01
+
+# How long a process serves cached baselines before re-reading the table
+BASELINE_CACHE_SECONDS = 3600
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (as in DDSketch) for positive values.
+    Each bucket spans a factor of gamma, so any quantile is returned within
+    RELATIVE_ACCURACY of the true value and memory grows with log(max / min).
+    """
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, float] = {}
+        self.count = 0.0
+
+    def add(self, value: float, weight: float = 1.0):
+        """Add a value (non-positive values are ignored)"""
+        if value <= 0:
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0.0) + weight
+        self.count += weight
+
+    def merge(self, other: "QuantileSketch"):
+        """Fold another sketch with the same accuracy into this one"""
+        for index, weight in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0.0) + weight
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q in [0, 1], or None for an empty sketch"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+def compute_pace_baselines(db: Session, batch_size: int = 1000) -> Dict[str, Dict]:
+    """
+    Recompute every concept's baseline and update the pace_baselines rows in
+    place (concepts that lost their baseline are deleted).
+    Runs in the caller's transaction; readers see the new baselines on commit.
+
+    Returns:
+        {concept: {median_seconds, p25_seconds, p75_seconds, student_count, answer_count}}
+    """
+    sketches: Dict[str, QuantileSketch] = {}
+    students: Dict[str, int] = {}
+    answers: Dict[str, int] = {}
+
+    rows = db.query(LearningPace.time_on_task_data).yield_per(batch_size)
+    for (data,) in rows:
+        for concept, stats in (data or {}).items():
+            if not isinstance(stats, dict) or stats.get("count", 0) < MIN_ANSWERS_PER_STUDENT:
+                continue
+            for key in (concept, DEFAULT_CONCEPT):
+                sketches.setdefault(key, QuantileSketch()).add(stats["mean"])
+                students[key] = students.get(key, 0) + 1
+                answers[key] = answers.get(key, 0) + stats["count"]
+
+    baselines = {
+        concept: {
+            "median_seconds": round(sketch.quantile(0.5), 1),
+            "p25_seconds": round(sketch.quantile(0.25), 1),
+            "p75_seconds": round(sketch.quantile(0.75), 1),
+            "student_count": students[concept],
+            "answer_count": answers[concept],
+        }
+        for concept, sketch in sketches.items()
+        if students[concept] >= MIN_STUDENTS
+    }
+
+    computed_at = datetime.utcnow()
+    rows = {row.concept_name: row for row in db.query(PaceBaseline).all()}
+    for concept, row in rows.items():
+        if concept not in baselines:
+            db.delete(row)
+    for concept, values in baselines.items():
+        row = rows.get(concept)
+        if row is None:
+            row = PaceBaseline(concept_name=concept)
+            db.add(row)
+        for key, value in values.items():
+            setattr(row, key, value)
+        row.computed_at = computed_at
+    db.flush()
+    invalidate_pace_baselines()
+
+    return baselines
+
+
+_baselines: Optional[Dict[str, float]] = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def get_pace_baselines(db: Session) -> Dict[str, float]:
+    """Median seconds per concept, cached for BASELINE_CACHE_SECONDS"""
+    global _baselines, _loaded_at
+    baselines = _baselines
+    if baselines is not None and clock.monotonic() - _loaded_at < BASELINE_CACHE_SECONDS:
+        return baselines
+
+    with _lock:
+        if _baselines is None or clock.monotonic() - _loaded_at >= BASELINE_CACHE_SECONDS:
+            _baselines = {
+                concept: median for concept, median in db.query(
+                    PaceBaseline.concept_name, PaceBaseline.median_seconds
+                ).all()
+            }
+            _loaded_at = clock.monotonic()
+        return _baselines
+
+
+def baseline_seconds(baselines: Dict[str, float], concept: str) -> float:
+    """Baseline time for a concept: its own, else the cohort-wide one, else the cold-start value"""
+    if concept in baselines:
+        return baselines[concept]
+    if DEFAULT_CONCEPT in baselines:
+        return baselines[DEFAULT_CONCEPT]
+    return COLD_START_BASELINES.get(concept, COLD_START_BASELINES[DEFAULT_CONCEPT])
+
+
+def invalidate_pace_baselines():
+    """Drop the cached baselines; the next read reloads the table"""
+    global _baselines
+    with _lock:
+        _baselines = None
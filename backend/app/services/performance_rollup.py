@@ -0,0 +1,106 @@
+"""
+Performance Rollups
+Reads and backfills the per-student daily PerformanceMetrics rows.
+
+Rows are maintained incrementally by PerformanceMaterializer as answer events
+are published, so chart endpoints read O(days) rollup rows instead of
+re-aggregating raw learning_sessions. History is backfilled from the event log
+by splitting students into chunks that worker threads catch up in parallel,
+each in its own session. Every student is committed separately, so write
+transactions stay short, and a transaction that loses a write-lock race
+(SQLite allows one writer at a time) is rolled back and retried.
+"""
+import random
+import time as clock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+from typing import Callable, Dict, List
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.models.events import LearningEvent
+from app.models.models import PerformanceMetrics
+from app.services.event_log import performance_materializer, DEFAULT_BATCH_SIZE, EVENT_ANSWER
+
+
+def daily_rollups(db: Session, student_id: int, start: date, end: date) -> List[PerformanceMetrics]:
+    """
+    The student's rollup rows for days in [start, end], oldest first.
+    Events not yet rolled up (e.g. from before the rollups existed) are applied first.
+    """
+    performance_materializer.catch_up(db, student_id=student_id)
+    return db.query(PerformanceMetrics).filter(
+        PerformanceMetrics.student_id == student_id,
+        PerformanceMetrics.date >= datetime.combine(start, time.min),
+        PerformanceMetrics.date <= datetime.combine(end, time.min)
+    ).order_by(PerformanceMetrics.date).all()
+
+
+# Attempts per student when the database is locked by another writer
+BUSY_RETRIES = 8
+BUSY_BACKOFF_SECONDS = 0.02
+
+
+def _is_busy(error: OperationalError) -> bool:
+    message = str(error.orig).lower()
+    return "locked" in message or "busy" in message
+
+
+def _backfill_student(db: Session, student_id: int, batch_size: int) -> int:
+    for attempt in range(BUSY_RETRIES + 1):
+        try:
+            applied = performance_materializer.catch_up(db, student_id=student_id, batch_size=batch_size)
+            db.commit()
+            return applied
+        except OperationalError as e:
+            db.rollback()
+            if attempt == BUSY_RETRIES or not _is_busy(e):
+                raise
+            # Rolled back, offsets included, so the retry starts over cleanly
+            clock.sleep(BUSY_BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def _backfill_chunk(session_factory: Callable[[], Session], student_ids: List[int], batch_size: int) -> int:
+    db = session_factory()
+    try:
+        return sum(_backfill_student(db, student_id, batch_size) for student_id in student_ids)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def backfill_rollups(
+    session_factory: Callable[[], Session],
+    workers: int = 4,
+    chunk_size: int = 100,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Dict[str, int]:
+    """
+    Roll up every student's answer history in parallel.
+
+    Students are split into chunks of `chunk_size`; each chunk is caught up by
+    one of `workers` threads, committing student by student. Per-student
+    offsets make the job resumable: a rerun skips events that are already
+    rolled up.
+    """
+    if workers < 1 or chunk_size < 1:
+        raise ValueError("workers and chunk_size must be positive")
+
+    db = session_factory()
+    try:
+        student_ids = [
+            row[0] for row in db.query(LearningEvent.student_id).filter(
+                LearningEvent.event_type == EVENT_ANSWER
+            ).distinct().order_by(LearningEvent.student_id)
+        ]
+    finally:
+        db.close()
+
+    chunks = [student_ids[i:i + chunk_size] for i in range(0, len(student_ids), chunk_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        applied = sum(pool.map(lambda chunk: _backfill_chunk(session_factory, chunk, batch_size), chunks))
+
+    return {"students": len(student_ids), "chunks": len(chunks), "events": applied}
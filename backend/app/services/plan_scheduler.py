@@ -0,0 +1,175 @@
+"""
+Study Plan Scheduler
+Capacity-aware packing of learn and review tasks into daily bins.
+
+Skills are taken in the skill graph's topological order. Each skill's study
+minutes are packed greedily into the earliest days with spare capacity, no
+earlier than the day after its last (transitive) prerequisite in the plan
+finishes. Spaced reviews are then placed at expanding intervals after a
+skill is learned, slipping a few days when the target day is full. Days with
+no room left are skipped with a union-find "next open day" structure, so a
+plan costs roughly O((skills + days) * α) plus one closure lookup per skill.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.skill_graph import SkillGraph
+
+
+# Smallest learn chunk worth scheduling on a partially filled day
+LEARN_CHUNK_MINUTES = 15
+
+# Spaced review after a skill is learned: days after the last learn day
+REVIEW_INTERVALS = (1, 3, 7, 14, 30)
+REVIEW_MINUTES = 15
+
+# Share of each day kept free for reviews when the horizon allows it
+REVIEW_SHARE = 0.25
+
+
+class _OpenDays:
+    """Union-find over days; find(d) is the first open day >= d (or the horizon)"""
+
+    def __init__(self, horizon: int, is_open: Sequence[bool]):
+        self.parent = [d if is_open[d] else d + 1 for d in range(horizon)] + [horizon]
+
+    def find(self, day: int) -> int:
+        parent = self.parent
+        root = day
+        while parent[root] != root:
+            root = parent[root]
+        while parent[day] != root:
+            parent[day], day = root, parent[day]
+        return root
+
+    def close(self, day: int):
+        self.parent[day] = day + 1
+
+
+def dependent_closure(graph: SkillGraph, changed: Sequence[int], members: Sequence[int]) -> List[int]:
+    """
+    Members that are in `changed` or (transitively) depend on one of them,
+    read from the graph's prerequisite closure in one pass.
+    """
+    members = np.asarray(sorted(set(members)), dtype=np.int64)
+    if len(members) == 0 or len(changed) == 0:
+        return []
+    changed = np.asarray(sorted(set(changed)), dtype=np.int64)
+    depends = np.unpackbits(graph.ancestors[members], axis=1, count=graph.size)[:, changed].any(axis=1)
+    return members[depends | np.isin(members, changed)].tolist()
+
+
+def schedule_skills(
+    graph: SkillGraph,
+    skill_indices: Sequence[int],
+    days: int,
+    daily_minutes: int,
+    start_day: int = 0,
+    load: Optional[List[int]] = None,
+    finished: Optional[Dict[int, int]] = None,
+    minutes: Optional[Dict[int, int]] = None
+) -> Dict:
+    """
+    Pack learn and review tasks for the given skills into daily bins.
+
+    Args:
+        graph: Skill graph (for prerequisite order and estimated hours)
+        skill_indices: Graph indices of the skills to schedule
+        days: Plan horizon; tasks fall on days [start_day, days)
+        daily_minutes: Capacity of each day
+        start_day: First day tasks may be placed on
+        load: Minutes already booked per day (e.g. kept tasks); updated in place
+        finished: Graph index -> last learn day for prerequisites scheduled elsewhere
+        minutes: Learn minutes still needed per graph index (default: estimated
+            hours); a skill needing none counts as learned the day before it
+            could start, so only its reviews are placed
+
+    Returns:
+        daily_tasks (sorted by day), load, finish_day per graph index,
+        unscheduled_minutes and dropped_reviews
+    """
+    load = load if load is not None else [0] * days
+    finish: Dict[int, int] = dict(finished or {})
+
+    in_plan = np.zeros(graph.size, dtype=bool)
+    in_plan[list(skill_indices)] = True
+    if finished:
+        in_plan[list(finished)] = True
+    order = [int(i) for i in graph.topo_order if in_plan[i] and int(i) not in (finished or {})]
+
+    minutes = {
+        i: minutes[i] if minutes is not None and i in minutes else int(round(graph.estimated_hours[i] * 60))
+        for i in order
+    }
+    open_capacity = sum(max(0, daily_minutes - load[d]) for d in range(start_day, days))
+    if sum(minutes.values()) <= open_capacity * (1 - REVIEW_SHARE):
+        learn_capacity = int(daily_minutes * (1 - REVIEW_SHARE))
+    else:
+        learn_capacity = daily_minutes
+    chunk = max(1, min(LEARN_CHUNK_MINUTES, learn_capacity))
+
+    tasks = []
+    unscheduled = 0
+
+    # Learn tasks
+    learn_days = _OpenDays(days, [d >= start_day and learn_capacity - load[d] >= chunk for d in range(days)])
+    for i in order:
+        need = minutes[i]
+        prerequisites = np.flatnonzero(graph.ancestor_mask(i) & in_plan).tolist()
+        earliest = max([start_day] + [finish[p] + 1 for p in prerequisites if p in finish])
+
+        day = learn_days.find(earliest) if earliest < days else days
+        last_day = None
+        while need > 0 and day < days:
+            take = min(need, learn_capacity - load[day])
+            tasks.append((day, i, take, "learn"))
+            load[day] += take
+            need -= take
+            last_day = day
+            if learn_capacity - load[day] < chunk:
+                learn_days.close(day)
+            day = learn_days.find(day + 1) if day + 1 < days else days
+
+        unscheduled += need
+        if last_day is not None:
+            finish[i] = last_day
+        elif minutes[i] == 0:
+            finish[i] = earliest - 1
+
+    # Spaced reviews
+    dropped = 0
+    review_days = _OpenDays(days, [d >= start_day and daily_minutes - load[d] >= REVIEW_MINUTES for d in range(days)])
+    for i in order:
+        if i not in finish:
+            continue
+        for interval in REVIEW_INTERVALS:
+            target = finish[i] + interval
+            if target >= days:
+                break
+            day = review_days.find(target)
+            if day > target + max(1, interval // 2) or day >= days:
+                dropped += 1
+                continue
+            tasks.append((day, i, REVIEW_MINUTES, "review"))
+            load[day] += REVIEW_MINUTES
+            if daily_minutes - load[day] < REVIEW_MINUTES:
+                review_days.close(day)
+
+    tasks.sort(key=lambda task: task[0])
+    return {
+        "daily_tasks": [
+            {
+                "day": day,
+                "skill_id": int(graph.ids[i]),
+                "skill_name": graph.skill_dict(i)["name"],
+                "minutes": task_minutes,
+                "task_type": task_type
+            }
+            for day, i, task_minutes, task_type in tasks
+        ],
+        "load": load,
+        "finish_day": finish,
+        "unscheduled_minutes": unscheduled,
+        "dropped_reviews": dropped
+    }
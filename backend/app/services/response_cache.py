@@ -0,0 +1,144 @@
+"""
+Response Cache
+Per-student state versions and a version-keyed cache of dashboard responses.
+
+Every committed write that touches a student's rows (knowledge, sessions,
+events, mastery, badges, study plans, ...) bumps that student's state
+version: ORM writes are picked up when the session flushes, bulk statements
+call touch_student(), and versions only move once the transaction commits.
+Dashboard responses are cached under (endpoint, student, version, scope), so
+a repeat load after no new activity is served from memory, and an ETag lets
+the browser revalidate with If-None-Match and get a bodiless 304.
+
+Versions and responses are process-local, like the other in-memory caches.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.models import Student
+
+
+# Number of cached responses kept in memory
+RESPONSE_CACHE_SIZE = 2048
+
+_PENDING_KEY = "touched_students"
+
+_versions: Dict[int, int] = {}
+_responses: "OrderedDict[Tuple, Tuple[str, Any]]" = OrderedDict()
+_latest: Dict[Tuple[str, int], Tuple] = {}  # (endpoint, student) -> newest cache key
+_lock = threading.Lock()
+
+
+def state_version(student_id: int) -> int:
+    """Current version of the student's state"""
+    return _versions.get(student_id, 0)
+
+
+def touch_student(db: Session, student_id: int):
+    """Bump the student's version when `db` next commits"""
+    db.info.setdefault(_PENDING_KEY, set()).add(student_id)
+
+
+@event.listens_for(Session, "before_flush")
+def _track_writes(session, flush_context, instances):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        student_id = obj.id if isinstance(obj, Student) else getattr(obj, "student_id", None)
+        if isinstance(student_id, int) and student_id > 0:
+            touch_student(session, student_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_versions(session):
+    touched = session.info.pop(_PENDING_KEY, None)
+    if touched:
+        with _lock:
+            for student_id in touched:
+                _versions[student_id] = _versions.get(student_id, 0) + 1
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _etag(body: Any) -> str:
+    digest = hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def cached_response(
+    request: Request,
+    response: Response,
+    endpoint: str,
+    student_id: int,
+    compute: Callable[[], Any],
+    scope: Optional[Hashable] = None
+) -> Any:
+    """
+    Serve `compute()` for the student's current state version from the cache.
+
+    Args:
+        endpoint: Cache namespace, one per route
+        scope: Extra key part for responses that depend on more than the
+            student's state (e.g. today's date)
+
+    Returns:
+        The response body, or a 304 Response when If-None-Match matches
+    """
+    key = (endpoint, student_id, state_version(student_id), scope)
+    with _lock:
+        entry = _responses.get(key)
+        if entry is not None:
+            _responses.move_to_end(key)
+
+    if entry is None:
+        body = jsonable_encoder(compute())
+        entry = (_etag(body), body)
+        with _lock:
+            if state_version(student_id) != key[2]:
+                # Written meanwhile: the body may already be stale, so don't keep it
+                return _respond(request, response, entry)
+            previous = _latest.get((endpoint, student_id))
+            if previous is not None and previous != key:
+                _responses.pop(previous, None)
+            _latest[(endpoint, student_id)] = key
+            _responses[key] = entry
+            while len(_responses) > RESPONSE_CACHE_SIZE:
+                evicted, _ = _responses.popitem(last=False)
+                if _latest.get(evicted[:2]) == evicted:
+                    del _latest[evicted[:2]]
+
+    return _respond(request, response, entry)
+
+
+def _respond(request: Request, response: Response, entry: Tuple[str, Any]) -> Any:
+    etag, body = entry
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return body
+
+
+def invalidate_response_cache(student_id: Optional[int] = None):
+    """Drop cached responses (and versions) of one student, or everyone"""
+    with _lock:
+        if student_id is None:
+            _responses.clear()
+            _latest.clear()
+            _versions.clear()
+            return
+        for key in [k for k in _responses if k[1] == student_id]:
+            del _responses[key]
+        for key in [k for k in _latest if k[1] == student_id]:
+            del _latest[key]
+        _versions[student_id] = _versions.get(student_id, 0) + 1
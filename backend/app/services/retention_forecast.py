@@ -0,0 +1,195 @@
+"""
+Retention Forecast
+Projected flashcard review load and expected retention for the next N days.
+
+A student's whole deck is simulated forward one day at a time, vectorized
+over cards and over a handful of Monte-Carlo runs. Each day the cards that
+fall due are reviewed: recall succeeds with the FSRS retrievability of the
+card (SM-2 cards are given an FSRS memory state seeded from their interval),
+and the card is rescheduled by its own scheduler, so SM-2 and FSRS decks
+project the way they will actually behave. An optional daily review cap
+postpones the cards most likely to be recalled anyway, which shows how far a
+backlog would build up when load is shed, e.g. before an exam week.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.smart_recommendations import FlashCard
+from app.services import fsrs
+
+
+# Average time spent on one flashcard review
+SECONDS_PER_REVIEW = 20
+
+DEFAULT_RUNS = 20
+
+
+class Deck:
+    """A student's cards as arrays, with times in days relative to `now`"""
+
+    def __init__(self, cards, now: datetime):
+        self.size = len(cards)
+        self.is_fsrs = np.array([card.scheduler == "fsrs" for card in cards], dtype=bool)
+        self.interval = np.array([card.interval or 1 for card in cards], dtype=np.float64)
+        self.repetitions = np.array([card.repetitions or 0 for card in cards], dtype=np.int64)
+        self.ease_factor = np.array([card.ease_factor or 2.5 for card in cards], dtype=np.float64)
+
+        def days_from_now(when):
+            return (when - now).total_seconds() / 86400 if when else np.nan
+
+        due_day = np.array([days_from_now(card.next_review_date) for card in cards], dtype=np.float64)
+        self.due_day = np.maximum(np.nan_to_num(due_day, nan=0.0), 0.0)
+        self.last_review_day = np.array([days_from_now(card.last_reviewed) for card in cards], dtype=np.float64)
+
+        # Memory state: FSRS where known, seeded from SM-2 for reviewed cards, NaN for new cards
+        seeded_s, seeded_d = fsrs.seed_state(self.interval, self.ease_factor)
+        stability = np.array([card.stability for card in cards], dtype=np.float64)
+        difficulty = np.array([card.memory_difficulty for card in cards], dtype=np.float64)
+        reviewed = ~np.isnan(self.last_review_day)
+        missing = reviewed & np.isnan(stability)
+        self.stability = np.where(reviewed, np.where(missing, seeded_s, stability), np.nan)
+        self.difficulty = np.where(missing, seeded_d, difficulty)
+
+    @classmethod
+    def load(cls, db: Session, student_id: int, now: datetime) -> "Deck":
+        cards = db.query(
+            FlashCard.scheduler, FlashCard.interval, FlashCard.repetitions, FlashCard.ease_factor,
+            FlashCard.stability, FlashCard.memory_difficulty,
+            FlashCard.next_review_date, FlashCard.last_reviewed
+        ).filter(FlashCard.student_id == student_id).all()
+        return cls(cards, now)
+
+
+def simulate(
+    deck: Deck,
+    days: int,
+    runs: int = DEFAULT_RUNS,
+    max_reviews_per_day: Optional[int] = None,
+    w: np.ndarray = fsrs.DEFAULT_WEIGHTS,
+    seed: int = 0
+) -> Dict[str, np.ndarray]:
+    """
+    Step the deck forward `days` days.
+
+    Returns:
+        Per-day arrays averaged over runs: reviews, retention (mean recall
+        probability of learned cards at the start of the day; NaN when none)
+        and backlog (due cards postponed by the cap)
+    """
+    rng = np.random.default_rng(seed)
+    shape = (runs, deck.size)
+
+    def tile(values):
+        return np.broadcast_to(values, shape).copy()
+
+    due_day, last = tile(deck.due_day), tile(deck.last_review_day)
+    stability, difficulty = tile(deck.stability), tile(deck.difficulty)
+    interval, repetitions, ease = tile(deck.interval), tile(deck.repetitions), tile(deck.ease_factor)
+    is_fsrs = deck.is_fsrs[None, :]
+
+    reviews = np.zeros(days)
+    retention = np.full(days, np.nan)
+    backlog = np.zeros(days)
+    if deck.size == 0:
+        return {"reviews": reviews, "retention": retention, "backlog": backlog}
+
+    for day in range(days):
+        learned = ~np.isnan(stability)
+        elapsed = np.where(learned, day - last, 0.0)
+        with np.errstate(invalid="ignore"):
+            recall = np.where(learned, fsrs.retrievability(elapsed, stability), np.nan)
+        if learned.any():
+            retention[day] = np.nanmean(np.where(learned, recall, np.nan))
+
+        due = due_day < day + 1
+        if max_reviews_per_day is not None:
+            # Least likely to be recalled first, new cards after reviews
+            priority = np.where(due, np.where(learned, recall, 2.0), np.inf)
+            order = np.argsort(priority, axis=1, kind="stable")
+            rank = np.empty_like(order)
+            np.put_along_axis(rank, order, np.broadcast_to(np.arange(deck.size), shape), axis=1)
+            backlog[day] = (due & (rank >= max_reviews_per_day)).sum(axis=1).mean()
+            due &= rank < max_reviews_per_day
+        reviews[day] = due.sum(axis=1).mean()
+        if not due.any():
+            continue
+
+        # New cards are learned on their first review
+        success = ~learned | (rng.random(shape) < np.nan_to_num(recall))
+        rating = np.where(success, 3, 1)  # Good / Again
+        new_s, new_d = fsrs.next_state(stability, difficulty, elapsed, rating, w)
+
+        # SM-2: quality 4 on success, 2 on a lapse
+        quality = np.where(success, 4, 2)
+        new_ease = np.maximum(1.3, ease + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)))
+        grown = np.where(repetitions == 0, 1, np.where(repetitions == 1, 6, np.floor(interval * new_ease)))
+        sm2_interval = np.where(success, grown, 1)
+
+        next_interval = np.where(is_fsrs, fsrs.next_interval(new_s), sm2_interval)
+        stability = np.where(due, new_s, stability)
+        difficulty = np.where(due, new_d, difficulty)
+        ease = np.where(due, new_ease, ease)
+        interval = np.where(due, sm2_interval, interval)
+        repetitions = np.where(due, np.where(success, repetitions + 1, 0), repetitions)
+        last = np.where(due, day, last)
+        due_day = np.where(due, day + next_interval, due_day)
+
+    return {"reviews": reviews, "retention": retention, "backlog": backlog}
+
+
+def forecast(
+    db: Session,
+    student_id: int,
+    days: int = 30,
+    max_reviews_per_day: Optional[int] = None,
+    runs: int = DEFAULT_RUNS,
+    now: Optional[datetime] = None
+) -> Dict:
+    """Projected daily review load and expected retention for a student's deck"""
+    if not 1 <= days <= 365:
+        raise ValueError("days must be between 1 and 365")
+    if max_reviews_per_day is not None and max_reviews_per_day < 0:
+        raise ValueError("max_reviews_per_day must not be negative")
+
+    now = now or datetime.utcnow()
+    deck = Deck.load(db, student_id, now)
+    w = fsrs.get_weights(db, student_id)
+    result = simulate(deck, days, runs=runs, max_reviews_per_day=max_reviews_per_day, w=w)
+
+    daily: List[Dict] = []
+    for day in range(days):
+        retention = result["retention"][day]
+        daily.append({
+            "date": (now.date() + timedelta(days=day)).isoformat(),
+            "expected_reviews": round(float(result["reviews"][day]), 1),
+            "expected_minutes": round(float(result["reviews"][day]) * SECONDS_PER_REVIEW / 60, 1),
+            "expected_retention": None if np.isnan(retention) else round(float(retention), 3),
+            "backlog": round(float(result["backlog"][day]), 1)
+        })
+
+    peak = int(np.argmax(result["reviews"]))
+    return {
+        "student_id": student_id,
+        "days_ahead": days,
+        "total_cards": deck.size,
+        "total_expected_reviews": round(float(result["reviews"].sum()), 1),
+        "peak_day": daily[peak]["date"],
+        "peak_reviews": daily[peak]["expected_reviews"],
+        "average_retention": (
+            None if np.isnan(result["retention"]).all()
+            else round(float(np.nanmean(result["retention"])), 3)
+        ),
+        "daily": daily
+    }
+
+
+def review_minutes_by_day(db: Session, student_id: int, days: int, runs: int = 8) -> List[int]:
+    """Expected flashcard review minutes for each of the next `days` days (today first)"""
+    deck = Deck.load(db, student_id, datetime.utcnow())
+    if deck.size == 0:
+        return [0] * days
+    reviews = simulate(deck, days, runs=runs, w=fsrs.get_weights(db, student_id))["reviews"]
+    return np.ceil(reviews * SECONDS_PER_REVIEW / 60).astype(int).tolist()
@@ -0,0 +1,209 @@
+"""
+Review Queue
+Due-card ordering for the spaced repetition system.
+
+Each student's cards are kept in an in-memory min-heap of
+(next_review_date, card id), loaded once from the (student_id,
+next_review_date) index and updated as cards are created, reviewed and
+deleted. Superseded heap entries are skipped lazily, so taking the next N due
+cards costs O(N log n) rather than a scan of every due row. Later pages are
+keyset-paginated on the same (next_review_date, id) order in SQL.
+"""
+import heapq
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.smart_recommendations import FlashCard
+
+
+# Number of per-student queues kept in memory
+QUEUE_CACHE_SIZE = 1024
+
+
+class ReviewQueue:
+    """Min-heap of a student's review times with lazy deletion"""
+
+    def __init__(self, student_id: int, cards: List[Tuple[int, datetime]]):
+        self.student_id = student_id
+        self.due_at: Dict[int, datetime] = dict(cards)
+        self.heap = [(when, card_id) for card_id, when in self.due_at.items()]
+        heapq.heapify(self.heap)
+
+    def push(self, card_id: int, when: datetime):
+        """Schedule (or reschedule) a card"""
+        self.due_at[card_id] = when
+        heapq.heappush(self.heap, (when, card_id))
+        # Keep stale entries from outgrowing the live ones
+        if len(self.heap) > 2 * len(self.due_at) + 64:
+            self.heap = [(w, c) for c, w in self.due_at.items()]
+            heapq.heapify(self.heap)
+
+    def remove(self, card_id: int):
+        """Forget a card; its heap entries are dropped when reached"""
+        self.due_at.pop(card_id, None)
+
+    def next_due(self, now: datetime, limit: int) -> List[Tuple[datetime, int]]:
+        """The first `limit` (review time, card id) pairs due at `now`, in order"""
+        taken = []
+        heap = self.heap
+        while heap and len(taken) < limit and heap[0][0] <= now:
+            when, card_id = heapq.heappop(heap)
+            if self.due_at.get(card_id) == when and (not taken or taken[-1] != (when, card_id)):
+                taken.append((when, card_id))
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return taken
+
+    @classmethod
+    def load(cls, db: Session, student_id: int) -> "ReviewQueue":
+        """Build a queue from an index-only scan of the student's cards"""
+        rows = db.query(FlashCard.id, FlashCard.next_review_date).filter(
+            FlashCard.student_id == student_id
+        ).all()
+        return cls(student_id, [(card_id, when) for card_id, when in rows if when is not None])
+
+
+_queues: "OrderedDict[int, ReviewQueue]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_review_queue(db: Session, student_id: int) -> ReviewQueue:
+    """Return the student's cached queue, loading it on first use"""
+    with _lock:
+        queue = _queues.get(student_id)
+        if queue is not None:
+            _queues.move_to_end(student_id)
+            return queue
+
+    queue = ReviewQueue.load(db, student_id)
+
+    with _lock:
+        queue = _queues.setdefault(student_id, queue)
+        while len(_queues) > QUEUE_CACHE_SIZE:
+            _queues.popitem(last=False)
+    return queue
+
+
+def schedule_card(card: FlashCard):
+    """Record a card's next review time in its student's queue, if cached"""
+    schedule_cards(card.student_id, {card.id: card.next_review_date})
+
+
+def schedule_cards(student_id: int, due_at: Dict[int, datetime]):
+    """Record new review times (card id -> time) in the student's queue, if cached"""
+    with _lock:
+        queue = _queues.get(student_id)
+        if queue is not None:
+            for card_id, when in due_at.items():
+                queue.push(card_id, when)
+
+
+def unschedule_card(student_id: int, card_id: int):
+    """Drop a deleted card from its student's queue, if cached"""
+    with _lock:
+        queue = _queues.get(student_id)
+        if queue is not None:
+            queue.remove(card_id)
+
+
+def invalidate_review_queue(student_id: Optional[int] = None):
+    """Drop cached queues for one student (or all)"""
+    with _lock:
+        if student_id is None:
+            _queues.clear()
+        else:
+            _queues.pop(student_id, None)
+
+
+# ============================================================================
+# Queries
+# ============================================================================
+
+def encode_cursor(card: FlashCard) -> str:
+    """Keyset cursor after the given card"""
+    return f"{card.next_review_date.isoformat()}_{card.id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        when, card_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(when), int(card_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def due_cards(
+    db: Session,
+    student_id: int,
+    now: datetime,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Tuple[List[FlashCard], Optional[str]]:
+    """
+    One page of due cards in (next_review_date, id) order.
+
+    The first page is taken from the in-memory queue and fetched by primary
+    key; later pages (and a queue that turns out to be stale) use a keyset
+    range scan on the (student_id, next_review_date) index.
+
+    Returns:
+        The cards and the cursor of the next page (None on the last page)
+    """
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+
+    cards = None
+    if cursor is None:
+        queue = get_review_queue(db, student_id)
+        with _lock:
+            entries = queue.next_due(now, limit + 1)
+        by_id = {
+            card.id: card for card in db.query(FlashCard).filter(
+                FlashCard.id.in_([card_id for _, card_id in entries])
+            ).all()
+        } if entries else {}
+        if all(card_id in by_id and by_id[card_id].next_review_date == when for when, card_id in entries):
+            cards = [by_id[card_id] for _, card_id in entries]
+        else:
+            invalidate_review_queue(student_id)
+
+    if cards is None:
+        query = db.query(FlashCard).filter(
+            FlashCard.student_id == student_id,
+            FlashCard.next_review_date <= now
+        )
+        if cursor is not None:
+            after, after_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                FlashCard.next_review_date > after,
+                and_(FlashCard.next_review_date == after, FlashCard.id > after_id)
+            ))
+        cards = query.order_by(FlashCard.next_review_date, FlashCard.id).limit(limit + 1).all()
+
+    if len(cards) > limit:
+        return cards[:limit], encode_cursor(cards[limit - 1])
+    return cards, None
+
+
+def count_due(db: Session, student_id: int, now: datetime) -> int:
+    """Number of due cards, counted on the index"""
+    return db.query(func.count(FlashCard.id)).filter(
+        FlashCard.student_id == student_id,
+        FlashCard.next_review_date <= now
+    ).scalar()
+
+
+def upcoming_counts(db: Session, student_id: int, start: datetime, end: datetime) -> Dict[str, int]:
+    """Reviews per calendar day in (start, end], from a GROUP BY date aggregate"""
+    day = func.date(FlashCard.next_review_date)
+    rows = db.query(day, func.count(FlashCard.id)).filter(
+        FlashCard.student_id == student_id,
+        FlashCard.next_review_date > start,
+        FlashCard.next_review_date <= end
+    ).group_by(day).order_by(day).all()
+    return {str(d): count for d, count in rows}
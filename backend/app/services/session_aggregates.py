@@ -0,0 +1,117 @@
+"""
+Session Aggregates
+GROUP BY aggregation of learning_sessions pushed down to the database.
+
+Analytics that used to load every session in a window as ORM objects and
+bucket them in Python ask the database for the buckets instead; only one row
+per bucket crosses the wire. Date and hour buckets are built per dialect
+(SQLite stores timestamps as text, PostgreSQL as timestamps).
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from sqlalchemy import Integer, case, cast, func
+from sqlalchemy.orm import Session
+
+from app.models.models import Content, LearningSession
+
+
+GROUPINGS = ("day", "hour", "topic", "concept", "difficulty")
+
+
+def day_bucket(column, dialect: str):
+    """Calendar day of a timestamp column, as an ISO date string"""
+    if dialect == "postgresql":
+        return func.to_char(column, "YYYY-MM-DD")
+    return func.date(column)
+
+
+def hour_bucket(column, dialect: str):
+    """Hour of day (0-23) of a timestamp column"""
+    if dialect == "postgresql":
+        return cast(func.extract("hour", column), Integer)
+    return cast(func.strftime("%H", column), Integer)
+
+
+def aggregate_sessions(
+    db: Session,
+    student_ids: Union[int, Iterable[int]],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    by: Optional[Union[str, Sequence[str]]] = None
+) -> List[Dict]:
+    """
+    Attempt, correctness and time totals of sessions in [start, end).
+
+    Args:
+        student_ids: One student or several (a cohort)
+        by: None for a single total, one of GROUPINGS, or a tuple of them to
+            group by several buckets in one query. topic and difficulty come
+            from the session's content.
+
+    Returns:
+        Dicts with bucket (absent when by is None; with a tuple, one key per
+        grouping instead), attempts, timed_attempts (sessions with
+        time_spent_seconds), correct, time_spent (sum of time_spent) and
+        time_spent_seconds (sum of time_spent_seconds), ordered by bucket
+    """
+    groupings = (by,) if isinstance(by, str) else tuple(by or ())
+    for grouping in groupings:
+        if grouping not in GROUPINGS:
+            raise ValueError(f"by must be one of {', '.join(GROUPINGS)}")
+
+    dialect = db.get_bind().dialect.name
+    columns = [
+        func.count(LearningSession.id).label("attempts"),
+        func.count(LearningSession.time_spent_seconds).label("timed_attempts"),
+        func.coalesce(func.sum(case((LearningSession.is_correct == True, 1), else_=0)), 0).label("correct"),
+        func.coalesce(func.sum(LearningSession.time_spent), 0.0).label("time_spent"),
+        func.coalesce(func.sum(LearningSession.time_spent_seconds), 0).label("time_spent_seconds"),
+    ]
+
+    buckets = {
+        "day": lambda: day_bucket(LearningSession.timestamp, dialect),
+        "hour": lambda: hour_bucket(LearningSession.timestamp, dialect),
+        "topic": lambda: Content.topic,
+        "concept": lambda: LearningSession.concept_name,
+        "difficulty": lambda: Content.difficulty,
+    }
+    keys = ["bucket"] if isinstance(by, str) else list(groupings)  # None: no keys, one total row
+    group = [buckets[grouping]().label(key) for grouping, key in zip(groupings, keys)]
+
+    query = db.query(*group, *columns)
+    if {"topic", "difficulty"} & set(groupings):
+        query = query.select_from(LearningSession).outerjoin(Content, LearningSession.content_id == Content.id)
+
+    if isinstance(student_ids, int):
+        query = query.filter(LearningSession.student_id == student_ids)
+    else:
+        query = query.filter(LearningSession.student_id.in_(list(student_ids)))
+    if start is not None:
+        query = query.filter(LearningSession.timestamp >= start)
+    if end is not None:
+        query = query.filter(LearningSession.timestamp < end)
+    if group:
+        query = query.group_by(*group).order_by(*group)
+
+    return [
+        {
+            **{key: getattr(row, key) for key in keys},
+            "attempts": row.attempts,
+            "timed_attempts": row.timed_attempts,
+            "correct": int(row.correct),
+            "time_spent": float(row.time_spent),
+            "time_spent_seconds": int(row.time_spent_seconds),
+        }
+        for row in query.all()
+    ]
+
+
+def session_totals(
+    db: Session,
+    student_ids: Union[int, Iterable[int]],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Dict:
+    """Totals of sessions in [start, end) as one row"""
+    return aggregate_sessions(db, student_ids, start, end)[0]
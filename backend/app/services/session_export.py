@@ -0,0 +1,177 @@
+"""
+Session Export
+Streams learning_sessions to analysts as NDJSON or CSV.
+
+Rows are read in keyset pages on the primary key (WHERE id > last ORDER BY id
+LIMIT n) with yield_per, so neither the database nor this process ever holds
+more than a page, however large the export. The RL state columns are
+flattened into numeric columns (before_algebra_score, after_accuracy_rate,
+...) so the output loads straight into a dataframe. Output can be gzipped
+on the fly, one compressed chunk per page.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.models.models import Content, LearningSession
+from app.services.student_model import JEE_TOPICS
+
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+PAGE_SIZE = 5000
+
+# Numeric knowledge-state fields flattened from state_before / state_after
+STATE_FIELDS = tuple(f"{topic}_score" for topic in JEE_TOPICS) + (
+    "accuracy_rate", "preferred_difficulty", "total_attempts", "correct_answers"
+)
+
+SESSION_COLUMNS = (
+    "id", "student_id", "content_id", "topic", "difficulty", "timestamp", "is_correct",
+    "time_spent", "time_spent_seconds", "attempts", "hint_used", "concept_name", "reward",
+)
+
+EXPORT_COLUMNS = (
+    SESSION_COLUMNS
+    + tuple(f"before_{field}" for field in STATE_FIELDS)
+    + tuple(f"after_{field}" for field in STATE_FIELDS)
+)
+
+
+def _numeric(state: Optional[Dict], field: str) -> Optional[float]:
+    value = (state or {}).get(field) if isinstance(state, dict) else None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+def _flatten(row) -> Dict:
+    record = {
+        "id": row.id,
+        "student_id": row.student_id,
+        "content_id": row.content_id,
+        "topic": row.topic,
+        "difficulty": row.difficulty,
+        "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+        "is_correct": row.is_correct,
+        "time_spent": row.time_spent,
+        "time_spent_seconds": row.time_spent_seconds,
+        "attempts": row.attempts,
+        "hint_used": row.hint_used,
+        "concept_name": row.concept_name,
+        "reward": row.reward,
+    }
+    for field in STATE_FIELDS:
+        record[f"before_{field}"] = _numeric(row.state_before, field)
+    for field in STATE_FIELDS:
+        record[f"after_{field}"] = _numeric(row.state_after, field)
+    return record
+
+
+def _pages(
+    db: Session,
+    student_ids: Optional[List[int]],
+    start: Optional[date],
+    end: Optional[date],
+    topic: Optional[str],
+    page_size: int
+) -> Iterator[List[Dict]]:
+    last_id = 0
+    while True:
+        query = db.query(
+            LearningSession.id, LearningSession.student_id, LearningSession.content_id,
+            Content.topic, Content.difficulty, LearningSession.timestamp, LearningSession.is_correct,
+            LearningSession.time_spent, LearningSession.time_spent_seconds, LearningSession.attempts,
+            LearningSession.hint_used, LearningSession.concept_name, LearningSession.reward,
+            LearningSession.state_before, LearningSession.state_after
+        ).outerjoin(
+            Content, LearningSession.content_id == Content.id
+        ).filter(LearningSession.id > last_id)
+
+        if student_ids is not None:
+            query = query.filter(LearningSession.student_id.in_(student_ids))
+        if start is not None:
+            query = query.filter(LearningSession.timestamp >= datetime.combine(start, time.min))
+        if end is not None:
+            query = query.filter(LearningSession.timestamp < datetime.combine(end + timedelta(days=1), time.min))
+        if topic is not None:
+            query = query.filter(Content.topic == topic)
+
+        page = [_flatten(row) for row in query.order_by(LearningSession.id).limit(page_size).yield_per(page_size)]
+        if not page:
+            return
+        yield page
+        last_id = page[-1]["id"]
+
+
+def _encode_ndjson(page: List[Dict]) -> str:
+    return "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in page)
+
+
+def _encode_csv(page: List[Dict], header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(page)
+    return buffer.getvalue()
+
+
+def export_sessions(
+    session_factory: Callable[[], Session],
+    student_ids: Optional[Sequence[int]] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    topic: Optional[str] = None,
+    fmt: str = "ndjson",
+    gzip: bool = False,
+    page_size: int = PAGE_SIZE
+) -> Iterator[bytes]:
+    """
+    Stream learning sessions matching the filters as NDJSON or CSV, oldest
+    first, one chunk per keyset page.
+
+    Args:
+        student_ids: Only these students (default: everyone)
+        start, end: Only sessions on days in [start, end]
+        topic: Only sessions on content of this topic
+        gzip: Compress the stream (one gzip member, flushed per page)
+
+    The stream reads through its own session, so it can outlive the request's.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if start is not None and end is not None and end < start:
+        raise ValueError("end must not be before start")
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    ids = sorted(set(student_ids)) if student_ids is not None else None
+
+    def stream() -> Iterator[bytes]:
+        compressor = zlib.compressobj(wbits=31) if gzip else None  # wbits=31: gzip container
+        db = session_factory()
+        try:
+            header = True
+            for page in _pages(db, ids, start, end, topic, page_size):
+                text = _encode_ndjson(page) if fmt == "ndjson" else _encode_csv(page, header)
+                header = False
+                data = text.encode()
+                yield compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH) if compressor else data
+            if fmt == "csv" and header:
+                # No rows: still send the header
+                data = _encode_csv([], True).encode()
+                yield compressor.compress(data) if compressor else data
+            if compressor:
+                yield compressor.flush()
+        finally:
+            db.close()
+
+    return stream()
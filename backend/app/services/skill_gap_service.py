@@ -0,0 +1,204 @@
+"""
+Skill Gap Service
+Vectorized skill gap detection over the full JEE knowledge vector.
+
+A batch of students' StudentKnowledge rows is read with one query into a
+students x topics score matrix; severity, priority and estimated hours are
+computed for every cell at once. Stored SkillGap rows are upserted in bulk:
+one UPDATE (executemany by primary key) for gaps already on file, one INSERT
+for new ones and one DELETE for stored gaps the student has since closed
+(score back at or above GAP_THRESHOLD) or that the old analyzer left on
+topics outside JEE_TOPICS. Cohort mode walks every student in chunks,
+committing per chunk, and returns per-topic counts for teacher reports.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from app.models.models import Student, StudentKnowledge
+from app.models.skill_gap import SkillGap
+from app.services.response_cache import touch_student
+from app.services.student_model import JEE_TOPICS, StudentModelService
+
+
+# Scores below this are reported as gaps
+GAP_THRESHOLD = 0.7
+
+TARGET_LEVEL = 0.8
+
+# Severity by score: < 0.3 critical, < 0.5 high, < 0.7 medium, otherwise low
+SEVERITIES = ("critical", "high", "medium", "low")
+SEVERITY_EDGES = (0.3, 0.5, GAP_THRESHOLD)
+BASE_PRIORITY = np.array([10, 8, 5, 3])
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def classify_scores(scores: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Severity index, priority (1-10) and estimated hours for every score.
+    Works on any array shape, e.g. students x topics.
+    """
+    severity = np.digitize(scores, SEVERITY_EDGES)
+    gap_size = TARGET_LEVEL - scores
+    # Further from the target raises the priority
+    priority = np.clip(BASE_PRIORITY[severity] + np.trunc(gap_size * 5).astype(int), 1, 10)
+    # Rough estimate: 10 hours per 0.1 gap, none once the target is reached
+    hours = np.round(np.maximum(gap_size, 0) * 100, 1)
+    return {"severity": severity, "priority": priority, "hours": hours}
+
+
+def _score_matrix(db: Session, student_ids: List[int]) -> np.ndarray:
+    """Scores per student (rows, in student_ids order) and topic; students without knowledge get the defaults"""
+    columns = [getattr(StudentKnowledge, f"{topic}_score") for topic in JEE_TOPICS]
+    rows = {
+        row[0]: row[1:] for row in db.query(StudentKnowledge.student_id, *columns).filter(
+            StudentKnowledge.student_id.in_(student_ids)
+        )
+    }
+    default = StudentModelService.new_knowledge(0)
+    defaults = tuple(getattr(default, f"{topic}_score") for topic in JEE_TOPICS)
+    scores = np.array([rows.get(student_id, defaults) for student_id in student_ids], dtype=np.float64)
+    # Columns without a value (e.g. never set) count as no proficiency
+    return np.nan_to_num(scores.reshape(len(student_ids), len(JEE_TOPICS)), nan=0.0)
+
+
+def detect_gaps(db: Session, student_ids: Sequence[int]) -> Dict[int, List[Dict]]:
+    """
+    Detect gaps on every topic for the students and upsert their SkillGap rows.
+    Stored gaps on topics that are no longer below the threshold, or on
+    topics outside JEE_TOPICS, are deleted.
+    Runs in the caller's transaction.
+
+    Returns:
+        {student_id: [gap dicts, highest priority first]}
+    """
+    ids = list(dict.fromkeys(student_ids))
+    if not ids:
+        return {}
+    return _upsert_gaps(db, ids, _score_matrix(db, ids))
+
+
+def _upsert_gaps(db: Session, ids: List[int], scores: np.ndarray) -> Dict[int, List[Dict]]:
+    classified = classify_scores(scores)
+    severity, priority, hours = classified["severity"], classified["priority"], classified["hours"]
+
+    existing, closed = {}, []
+    for row in db.query(SkillGap.id, SkillGap.student_id, SkillGap.topic, SkillGap.assessment_method).filter(
+        SkillGap.student_id.in_(ids)
+    ):
+        if row.topic in JEE_TOPICS:
+            existing[(row.student_id, row.topic)] = row.id
+        elif row.assessment_method == "session_analysis":
+            # Left by the old analyzer on topics outside the knowledge vector
+            closed.append(row.id)
+
+    is_gap = scores < GAP_THRESHOLD
+    stored = np.zeros_like(is_gap)
+    row_of = {student_id: s for s, student_id in enumerate(ids)}
+    for student_id, topic in existing:
+        stored[row_of[student_id], JEE_TOPICS.index(topic)] = True
+
+    updates, inserts = [], []
+    gaps: Dict[int, List[Dict]] = {student_id: [] for student_id in ids}
+    for s, t in zip(*np.nonzero(is_gap | stored)):
+        student_id, topic = ids[s], JEE_TOPICS[t]
+        gap_id = existing.get((student_id, topic))
+        if not is_gap[s, t]:
+            closed.append(gap_id)
+            continue
+
+        values = {
+            "proficiency_level": float(scores[s, t]),
+            "gap_severity": SEVERITIES[severity[s, t]],
+            "priority": int(priority[s, t]),
+            "estimated_time_hours": float(hours[s, t]),
+        }
+        if gap_id is not None:
+            updates.append({"id": gap_id, **values})
+        else:
+            inserts.append({
+                "student_id": student_id,
+                "topic": topic,
+                "target_level": TARGET_LEVEL,
+                "assessment_method": "session_analysis",
+                **values
+            })
+
+        gaps[student_id].append({
+            "topic": topic.replace("_", " ").capitalize(),
+            "current_level": values["proficiency_level"],
+            "target_level": TARGET_LEVEL,
+            "gap_percentage": (TARGET_LEVEL - values["proficiency_level"]) * 100,
+            "severity": values["gap_severity"],
+            "estimated_hours": values["estimated_time_hours"],
+            "priority": values["priority"],
+        })
+
+    if updates:
+        db.execute(update(SkillGap), updates)
+    if inserts:
+        db.execute(insert(SkillGap), inserts)
+    if closed:
+        db.execute(delete(SkillGap).where(SkillGap.id.in_(closed)))
+    for student_id in ids:
+        touch_student(db, student_id)
+
+    for student_gaps in gaps.values():
+        student_gaps.sort(key=lambda gap: gap["priority"], reverse=True)
+    return gaps
+
+
+def analyze_cohort_gaps(
+    db: Session,
+    student_ids: Optional[Sequence[int]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Dict:
+    """
+    Detect gaps for a cohort (default: every student with a knowledge state),
+    committing after each chunk of students. Ids matching no student are
+    skipped and reported.
+
+    Returns:
+        Student count, unknown student ids, and per topic the number of
+        students with a gap of each severity and the mean proficiency
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    unknown: List[int] = []
+    if student_ids is None:
+        ids = [row[0] for row in db.query(StudentKnowledge.student_id).order_by(StudentKnowledge.student_id)]
+    else:
+        requested = list(dict.fromkeys(student_ids))
+        known = {row[0] for row in db.query(Student.id).filter(Student.id.in_(requested))} if requested else set()
+        ids = [student_id for student_id in requested if student_id in known]
+        unknown = [student_id for student_id in requested if student_id not in known]
+
+    counts = np.zeros((len(JEE_TOPICS), len(SEVERITIES)), dtype=np.int64)
+    score_sums = np.zeros(len(JEE_TOPICS))
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        scores = _score_matrix(db, chunk)
+        _upsert_gaps(db, chunk, scores)
+        db.commit()
+
+        severity = classify_scores(scores)["severity"]
+        # Per topic: students at each severity (low counts students without a gap)
+        counts += (severity[:, :, None] == np.arange(len(SEVERITIES))).sum(axis=0)
+        score_sums += scores.sum(axis=0)
+
+    return {
+        "student_count": len(ids),
+        "unknown_student_ids": unknown,
+        "topics": {
+            topic: {
+                "mean_proficiency": round(float(score_sums[t] / len(ids)), 3) if ids else 0.0,
+                "students_with_gap": int(counts[t, :-1].sum()),
+                **{severity: int(counts[t, i]) for i, severity in enumerate(SEVERITIES[:-1])},
+            }
+            for t, topic in enumerate(JEE_TOPICS)
+        },
+    }
@@ -0,0 +1,194 @@
+"""
+Skill Graph
+Process-wide, in-memory view of the mastery skill DAG.
+
+Loaded once from mastery_skills/skill_prerequisites and kept until
+invalidated (e.g. by /mastery/skills/create). Holds the prerequisite and
+reverse (unlock) adjacency as CSR arrays, a topological order and the
+transitive prerequisite closure as packed bitsets, so per-student questions
+like "which skills are unlocked" become array operations.
+"""
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.mastery import MasterySkill, skill_prerequisites
+
+
+# Mastery level at which a skill counts as a satisfied prerequisite (Proficient)
+PREREQUISITE_LEVEL = 3
+
+
+class SkillGraph:
+    """
+    Immutable snapshot of the skill DAG.
+    Skills are addressed by a dense index (position in id order); `index`
+    maps skill ids to it.
+    """
+
+    def __init__(self, skills: List[MasterySkill], edges: List[tuple], version: int = 0):
+        """
+        Args:
+            skills: All MasterySkill rows
+            edges: (skill_id, prerequisite_id) pairs
+            version: Cache generation this graph was built for
+        """
+        skills = sorted(skills, key=lambda s: s.id)
+        n = len(skills)
+
+        self.version = version
+        self.size = n
+        self.ids = np.array([s.id for s in skills], dtype=np.int64)
+        self.index: Dict[int, int] = {skill_id: i for i, skill_id in enumerate(self.ids.tolist())}
+        self.difficulty = [s.difficulty for s in skills]
+        self.estimated_hours = np.array(
+            [s.estimated_hours if s.estimated_hours is not None else 1.0 for s in skills],
+            dtype=np.float64
+        )
+        self._skill_dicts = [s.to_dict() for s in skills]
+        self._difficulty_weights: Dict[tuple, np.ndarray] = {}
+
+        # Keep only edges between known skills, in (skill, prerequisite) order
+        pairs = sorted(
+            (self.index[skill_id], self.index[prereq_id])
+            for skill_id, prereq_id in edges
+            if skill_id in self.index and prereq_id in self.index
+        )
+        rows = np.array([p[0] for p in pairs], dtype=np.int64)
+        cols = np.array([p[1] for p in pairs], dtype=np.int64)
+
+        # Prerequisites of skill i: prereq_indices[prereq_indptr[i]:prereq_indptr[i + 1]]
+        self.prereq_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=self.prereq_indptr[1:])
+        self.prereq_indices = cols
+        self.edge_rows = rows
+
+        # Skills unlocked by skill i (reverse adjacency)
+        order = np.lexsort((rows, cols))
+        self.unlock_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=n), out=self.unlock_indptr[1:])
+        self.unlock_indices = rows[order]
+
+        self.out_degree = np.diff(self.unlock_indptr)
+        self.topo_order = self._topological_order()
+        self.ancestors = self._transitive_closure()
+
+    def _topological_order(self) -> np.ndarray:
+        """Kahn's algorithm; ties broken by id. Skills on a cycle are appended last."""
+        indegree = np.diff(self.prereq_indptr).copy()
+        ready = [i for i in range(self.size) if indegree[i] == 0]
+        order = []
+        while ready:
+            next_ready = []
+            for i in ready:
+                order.append(i)
+                for j in self.unlocks(i):
+                    indegree[j] -= 1
+                    if indegree[j] == 0:
+                        next_ready.append(int(j))
+            ready = sorted(next_ready)
+
+        if len(order) < self.size:
+            seen = set(order)
+            order.extend(i for i in range(self.size) if i not in seen)
+
+        return np.array(order, dtype=np.int64)
+
+    def _transitive_closure(self) -> np.ndarray:
+        """Row i is a packed bitset of every (transitive) prerequisite of skill i"""
+        closure = np.zeros((self.size, (self.size + 7) // 8), dtype=np.uint8)
+        for i in self.topo_order:
+            prereqs = self.prerequisites(i)
+            if len(prereqs) == 0:
+                continue
+            row = np.bitwise_or.reduce(closure[prereqs], axis=0)
+            np.bitwise_or.at(row, prereqs >> 3, (128 >> (prereqs & 7)).astype(np.uint8))
+            closure[i] = row
+        return closure
+
+    def prerequisites(self, i: int) -> np.ndarray:
+        """Direct prerequisite indices of skill i"""
+        return self.prereq_indices[self.prereq_indptr[i]:self.prereq_indptr[i + 1]]
+
+    def unlocks(self, i: int) -> np.ndarray:
+        """Indices of skills that list skill i as a direct prerequisite"""
+        return self.unlock_indices[self.unlock_indptr[i]:self.unlock_indptr[i + 1]]
+
+    def ancestor_mask(self, i: int) -> np.ndarray:
+        """Boolean mask of all transitive prerequisites of skill i"""
+        return np.unpackbits(self.ancestors[i], count=self.size).astype(bool)
+
+    def unmet_prerequisite_counts(self, satisfied: np.ndarray) -> np.ndarray:
+        """
+        Number of direct prerequisites not yet satisfied, per skill.
+
+        Args:
+            satisfied: Boolean mask over skills (e.g. mastery level >= 3)
+        """
+        unmet = ~satisfied[self.prereq_indices]
+        return np.bincount(self.edge_rows[unmet], minlength=self.size)
+
+    def unlocked_mask(self, satisfied: np.ndarray) -> np.ndarray:
+        """A skill is unlocked when every direct prerequisite is satisfied"""
+        return self.unmet_prerequisite_counts(satisfied) == 0
+
+    def difficulty_weights(self, weights: Dict[str, float], default: float) -> np.ndarray:
+        """Per-skill weight looked up by difficulty, cached per mapping"""
+        key = (tuple(sorted(weights.items())), default)
+        if key not in self._difficulty_weights:
+            self._difficulty_weights[key] = np.array(
+                [weights.get(d, default) for d in self.difficulty], dtype=np.float64
+            )
+        return self._difficulty_weights[key]
+
+    def skill_dict(self, i: int, include_prerequisites: bool = False) -> Dict:
+        """Same shape as MasterySkill.to_dict(), without touching the database"""
+        data = dict(self._skill_dicts[i])
+        if include_prerequisites:
+            data["prerequisite_ids"] = self.ids[self.prerequisites(i)].tolist()
+        return data
+
+    def edges(self) -> List[Dict]:
+        """Prerequisite edges in the skill tree's node/edge format"""
+        return [
+            {"source": int(self.ids[p]), "target": int(self.ids[s]), "type": "prerequisite"}
+            for s, p in zip(self.edge_rows.tolist(), self.prereq_indices.tolist())
+        ]
+
+    @classmethod
+    def load(cls, db: Session, version: int = 0) -> "SkillGraph":
+        """Build a graph with two queries"""
+        skills = db.query(MasterySkill).all()
+        edges = db.query(
+            skill_prerequisites.c.skill_id,
+            skill_prerequisites.c.prerequisite_id
+        ).all()
+        return cls(skills, [tuple(e) for e in edges], version)
+
+
+_graph: Optional[SkillGraph] = None
+_version = 0
+_lock = threading.Lock()
+
+
+def get_skill_graph(db: Session) -> SkillGraph:
+    """Return the cached skill graph, loading it on first use or after invalidation"""
+    global _graph
+    graph = _graph
+    if graph is not None:
+        return graph
+
+    with _lock:
+        if _graph is None:
+            _graph = SkillGraph.load(db, _version)
+        return _graph
+
+
+def invalidate_skill_graph():
+    """Drop the cached graph; call after any change to skills or prerequisites"""
+    global _graph, _version
+    with _lock:
+        _graph = None
+        _version += 1
@@ -0,0 +1,66 @@
+"""
+Streak Service
+Current and longest daily streaks from the per-student activity bitmap.
+
+Every learning event marks its day in StudentActivity (one bit per day, see
+ActivityMaterializer in app.services.event_log). Streaks are then bit
+operations on the bitmap read as one integer, i.e. O(days / 64) word
+operations regardless of how many sessions or assessments a student has.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.models import StudentActivity
+from app.services.event_log import activity_materializer
+
+
+def streaks_from_bitmap(days: bytes, epoch: date, today: date) -> Dict:
+    """
+    Streaks for a bitmap whose bit 0 is `epoch`.
+
+    The current streak ends today, or yesterday when today has no activity
+    yet; it is 0 when neither day is active.
+    """
+    bits = int.from_bytes(days or b"", "little")
+    position = (today - epoch).days
+    if position < 0:
+        bits, position = 0, -1
+    else:
+        bits &= (1 << (position + 1)) - 1  # Ignore anything after today
+
+    current = 0
+    end = position if position >= 0 and bits >> position & 1 else position - 1
+    if end >= 0 and bits >> end & 1:
+        gaps = ~bits & ((1 << (end + 1)) - 1)
+        current = end + 1 if gaps == 0 else end - (gaps.bit_length() - 1)
+
+    longest = 0
+    runs = bits
+    while runs:
+        runs &= runs >> 1
+        longest += 1
+
+    last_active = epoch + timedelta(days=bits.bit_length() - 1) if bits else None
+    return {
+        "current_streak": current,
+        "longest_streak": longest,
+        "active_days": bits.bit_count(),
+        "last_active_date": last_active.isoformat() if last_active else None,
+    }
+
+
+def get_streaks(db: Session, student_id: int, today: Optional[date] = None) -> Dict:
+    """Bring the student's activity calendar up to date and compute streaks"""
+    activity_materializer.catch_up(db, student_id=student_id)
+    activity = db.get(StudentActivity, student_id)
+    today = today or datetime.now().date()
+    if activity is None:
+        return streaks_from_bitmap(b"", today, today)
+    return streaks_from_bitmap(activity.days, activity.epoch, today)
+
+
+def current_streak(db: Session, student_id: int) -> int:
+    """Consecutive active days ending today (or yesterday)"""
+    return get_streaks(db, student_id)["current_streak"]
@@ -6,6 +6,14 @@ from app.models.models import Student, StudentKnowledge, LearningSession
 from typing import Dict, Optional
 
 
+# Topics with a <topic>_score column on StudentKnowledge
+JEE_TOPICS = (
+    'mechanics', 'electromagnetism', 'optics', 'modern_physics',
+    'physical_chemistry', 'organic_chemistry', 'inorganic_chemistry',
+    'algebra', 'calculus', 'coordinate_geometry', 'trigonometry', 'vectors', 'probability'
+)
+
+
 class StudentModelService:
     """Service for managing student knowledge state and learning profile"""
     
@@ -21,7 +29,24 @@ class StudentModelService:
         Returns:
             StudentKnowledge object
         """
-        knowledge = StudentKnowledge(
+        knowledge = StudentModelService.new_knowledge(student_id)
+        db.add(knowledge)
+        db.commit()
+        db.refresh(knowledge)
+        return knowledge
+    
+    @staticmethod
+    def new_knowledge(student_id: int) -> StudentKnowledge:
+        """
+        Build an unsaved knowledge state with every field set to its default
+        
+        Args:
+            student_id: Student ID
+        
+        Returns:
+            Transient StudentKnowledge object
+        """
+        return StudentKnowledge(
             student_id=student_id,
             # Physics topics
             mechanics_score=0.5,
@@ -44,12 +69,9 @@ class StudentModelService:
             correct_answers=0,
             accuracy_rate=0.0,
             preferred_difficulty=2,
-            learning_style="balanced"
+            learning_style="balanced",
+            average_time=0.0
         )
-        db.add(knowledge)
-        db.commit()
-        db.refresh(knowledge)
-        return knowledge
     
     @staticmethod
     def get_knowledge_state(db: Session, student_id: int) -> Dict:
@@ -123,6 +145,35 @@ class StudentModelService:
         if not knowledge:
             knowledge = StudentModelService.initialize_knowledge(db, student_id)
         
+        StudentModelService.apply_answer(knowledge, topic, is_correct, difficulty, time_spent)
+        
+        db.commit()
+        db.refresh(knowledge)
+        
+        return knowledge
+    
+    @staticmethod
+    def apply_answer(knowledge: StudentKnowledge,
+                     topic: str,
+                     is_correct: bool,
+                     difficulty: int,
+                     time_spent: float) -> StudentKnowledge:
+        """
+        Fold one answer into a knowledge state in place (no database access)
+        
+        Shared by update_knowledge and the event log's knowledge materializer,
+        so live updates and replays produce identical state.
+        
+        Args:
+            knowledge: StudentKnowledge object to update
+            topic: Topic of content (algebra, calculus, etc.)
+            is_correct: Whether answer was correct
+            difficulty: Content difficulty (1-5)
+            time_spent: Time spent on content
+        
+        Returns:
+            The same StudentKnowledge object
+        """
         # Update attempt counters
         knowledge.total_attempts += 1
         if is_correct:
@@ -173,9 +224,6 @@ class StudentModelService:
         else:
             knowledge.average_time = (knowledge.average_time * 0.9 + time_spent * 0.1)
         
-        db.commit()
-        db.refresh(knowledge)
-        
         return knowledge
     
     @staticmethod
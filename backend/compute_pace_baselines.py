@@ -0,0 +1,52 @@
+"""
+Nightly pace baseline job.
+
+    python compute_pace_baselines.py                  # recompute every concept's baseline
+    python compute_pace_baselines.py --catch-up       # fold pending answers into LearningPace first
+
+Reads one LearningPace row per student and replaces the pace_baselines table
+in a single transaction. API processes pick the new baselines up within
+BASELINE_CACHE_SECONDS.
+"""
+import argparse
+import os
+import sys
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal, init_db
+from app.services.event_log import pace_materializer
+from app.services.pace_baselines import compute_pace_baselines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute population pace baselines")
+    parser.add_argument("--catch-up", action="store_true", help="Catch up the learning_pace materializer first")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if args.catch_up:
+            applied = pace_materializer.catch_up(db, batch_size=args.batch_size)
+            print(f"learning_pace: applied {applied} events")
+
+        baselines = compute_pace_baselines(db, batch_size=args.batch_size)
+        db.commit()
+        for concept, values in sorted(baselines.items()):
+            print(
+                f"{concept}: median {values['median_seconds']}s, "
+                f"IQR {values['p25_seconds']}-{values['p75_seconds']}s ({values['student_count']} students)"
+            )
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Shared pytest fixtures for service-level tests.
+Each test gets a fresh in-memory SQLite database with every model's table.
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import Base
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.models.models import Student
+from app.services.pace_baselines import invalidate_pace_baselines
+from app.services.response_cache import invalidate_response_cache
+from app.services.review_queue import invalidate_review_queue
+from app.services.skill_graph import invalidate_skill_graph
+
+
+def answer(topic="algebra", is_correct=True, difficulty=2, time_spent=30.0):
+    """Payload of an answer event"""
+    return {"content_id": 1, "topic": topic, "is_correct": is_correct,
+            "difficulty": difficulty, "time_spent": time_spent}
+
+
+@pytest.fixture
+def db():
+    """Fresh in-memory database session"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    # Process-wide caches must not leak between test databases
+    invalidate_skill_graph()
+    invalidate_review_queue()
+    invalidate_response_cache()
+    invalidate_pace_baselines()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def query_counter(db):
+    """Counts SQL statements executed on the test database"""
+    counter = {"count": 0}
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counter["count"] += 1
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+
+@pytest.fixture
+def student(db):
+    """A persisted student"""
+    student = Student(email="student@example.com", username="student", hashed_password="x")
+    db.add(student)
+    db.commit()
+    db.refresh(student)
+    return student
@@ -0,0 +1,61 @@
+"""
+FSRS parameter fitting.
+
+    python fit_fsrs.py                    # fit global weights from every student's reviews
+    python fit_fsrs.py --student 42       # fit weights for one student
+    python fit_fsrs.py --reschedule       # then reschedule the affected FSRS decks
+
+Weights are fitted to the flashcard review events in the learning event log.
+Each command runs in a single transaction.
+"""
+import argparse
+import os
+import sys
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal, init_db
+from app.models.smart_recommendations import FlashCard
+from app.services.fsrs import fit_parameters, reschedule_deck
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FSRS parameter fitting")
+    parser.add_argument("--student", type=int, help="Fit one student's weights (default: global)")
+    parser.add_argument("--reschedule", action="store_true", help="Reschedule FSRS decks with the new weights")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        result = fit_parameters(db, args.student)
+        db.flush()
+        print(
+            f"Fitted {result['review_count']} reviews over {result['card_count']} cards: "
+            f"log-loss {result['baseline_log_loss']} -> {result['log_loss']}"
+        )
+
+        if args.reschedule:
+            if args.student is not None:
+                student_ids = [args.student]
+            else:
+                student_ids = [
+                    row[0] for row in db.query(FlashCard.student_id).filter(
+                        FlashCard.scheduler == "fsrs"
+                    ).distinct()
+                ]
+            cards = sum(reschedule_deck(db, student_id) for student_id in student_ids)
+            print(f"Rescheduled {cards} cards for {len(student_ids)} students")
+
+        db.commit()
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
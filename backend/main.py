@@ -7,7 +7,7 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, SessionLocal
 from app.api import (
     auth, session, analytics, learning_style, students, 
     recommendations, skill_gaps, learning_pace, smart_recommendations, mastery,
@@ -59,9 +59,53 @@ def startup_event():
     """Initialize database on startup"""
     init_db()
     print("[+] Database initialized")
+    seed_event_log()
+    migrate_study_plan_tasks()
+    migrate_flashcards()
     print(f"[+] Server starting on {settings.API_V1_STR}")
 
 
+def seed_event_log():
+    """Backfill the learning event log from existing tables the first time it is empty"""
+    from app.services.event_log import backfill_events, head_offset
+    
+    db = SessionLocal()
+    try:
+        if head_offset(db) == 0:
+            counts = backfill_events(db)
+            db.commit()
+            if any(counts.values()):
+                print(f"[+] Event log backfilled: {counts}")
+    finally:
+        db.close()
+
+
+def migrate_study_plan_tasks():
+    """Move study plan schedules still stored as JSON into study_plan_tasks"""
+    from app.services.mastery_service import StudyPlanService
+    
+    db = SessionLocal()
+    try:
+        migrated = StudyPlanService(db).backfill_tasks()
+        if migrated:
+            print(f"[+] Migrated {migrated} study plan schedules to study_plan_tasks")
+    finally:
+        db.close()
+
+
+def migrate_flashcards():
+    """Bring a flashcards table created before the FSRS scheduler up to the current schema"""
+    from app.services.flashcard_service import upgrade_flashcards_table
+    
+    db = SessionLocal()
+    try:
+        changes = upgrade_flashcards_table(db)
+        if changes:
+            print(f"[+] Migrated flashcards table: {', '.join(changes)}")
+    finally:
+        db.close()
+
+
 @app.get("/")
 def root():
     """Root endpoint"""
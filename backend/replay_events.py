@@ -0,0 +1,75 @@
+"""
+Learning event log maintenance.
+
+    python replay_events.py backfill                       # seed an empty log from existing tables
+    python replay_events.py catch-up [-m student_mastery]  # apply events not yet materialized
+    python replay_events.py rebuild -m student_knowledge   # rebuild a view from offset 0
+    python replay_events.py rollup --workers 8             # backfill daily performance rollups in parallel
+
+Each command except rollup runs in a single transaction, so a rebuild only
+becomes visible to live traffic when it commits. rollup commits student by
+student; a rerun keeps every student already committed and applies only the
+events not yet rolled up.
+"""
+import argparse
+import os
+import sys
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal, init_db
+from app.services.event_log import MATERIALIZERS, backfill_events, head_offset
+from app.services.performance_rollup import backfill_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learning event log maintenance")
+    parser.add_argument("command", choices=["backfill", "catch-up", "rebuild", "rollup"])
+    parser.add_argument(
+        "-m", "--materializer",
+        choices=sorted(MATERIALIZERS.keys()),
+        help="Materializer to run (default: all)"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4, help="Threads for rollup")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Students per rollup chunk")
+    args = parser.parse_args()
+
+    init_db()
+    if args.command == "rollup":
+        counts = backfill_rollups(
+            SessionLocal, workers=args.workers, chunk_size=args.chunk_size, batch_size=args.batch_size
+        )
+        print(f"Rolled up {counts['events']} events for {counts['students']} students in {counts['chunks']} chunks")
+        return
+
+    db = SessionLocal()
+    try:
+        if args.command == "backfill":
+            counts = backfill_events(db, chunk_size=args.batch_size)
+            db.commit()
+            print(f"Backfilled events: {counts}")
+            return
+
+        names = [args.materializer] if args.materializer else sorted(MATERIALIZERS.keys())
+        for name in names:
+            materializer = MATERIALIZERS[name]
+            if args.command == "rebuild":
+                applied = materializer.rebuild(db, batch_size=args.batch_size)
+            else:
+                applied = materializer.catch_up(db, batch_size=args.batch_size)
+            print(f"{name}: applied {applied} events")
+
+        db.commit()
+        print(f"Log head offset: {head_offset(db)}")
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Unit Tests for the Badge Engine
+Tests criteria compilation, incremental counters and stat-indexed awarding
+"""
+from datetime import datetime
+
+import pytest
+
+from app.api.mastery import BadgeCreate, create_badge
+from app.models.mastery import Badge, MasterySkill, StudentBadge, StudentMastery, StudentStats
+from app.services.badge_engine import (
+    compile_criteria, get_badge_rules, invalidate_badge_rules, load_student_stats,
+    record_assessment, record_session
+)
+from app.services.mastery_service import BadgeService, MasteryService
+
+
+@pytest.fixture(autouse=True)
+def fresh_rules():
+    invalidate_badge_rules()
+    yield
+    invalidate_badge_rules()
+
+
+@pytest.fixture
+def badges(db):
+    badges = [
+        Badge(name="First Steps", criteria={"total_attempts": 10}),
+        Badge(name="Sharpshooter", criteria={"accuracy": 90, "total_attempts": 20}),
+        Badge(name="Algebra Ace", criteria={"mastered_skills": 1, "category": "Algebra"}),
+        Badge(name="Regular", criteria={"current_streak": 3}),
+        Badge(name="Exact", criteria={"total_sessions": {"==": 2}}),
+        Badge(name="Retired", criteria={"total_attempts": 1}, is_active=False),
+    ]
+    db.add_all(badges)
+    db.commit()
+    return {b.name: b for b in badges}
+
+
+class TestBadgeRules:
+    """Test suite for compiled criteria"""
+
+    def test_compile_criteria(self):
+        clauses = compile_criteria({"mastered_skills": 10, "category": "Algebra", "accuracy": {">": 80}})
+        assert [(key, threshold) for key, _, threshold in clauses] == [
+            ("mastered_skills.Algebra", 10), ("accuracy", 80)
+        ]
+        assert compile_criteria(None) == ()
+
+    def test_rules_are_indexed_by_stat(self, db, badges):
+        rules = get_badge_rules(db)
+        assert [c.badge["name"] for c in rules.candidates(["total_attempts"])] == ["First Steps", "Sharpshooter"]
+        assert [c.badge["name"] for c in rules.candidates(["accuracy"])] == ["Sharpshooter"]
+        assert rules.candidates(["unknown"]) == []
+        assert "Retired" not in [c.badge["name"] for c in rules.badges]
+
+
+class TestStudentStats:
+    """Test suite for incrementally maintained counters"""
+
+    def test_initialized_from_existing_history(self, db, student):
+        skill = MasterySkill(name="Fractions", category="Algebra")
+        db.add(skill)
+        db.flush()
+        db.add(StudentMastery(student_id=student.id, skill_id=skill.id, mastery_level=5,
+                              total_attempts=25, correct_attempts=24, last_assessed_at=datetime.now()))
+        db.commit()
+
+        stats = load_student_stats(db, student.id)
+        assert (stats.total_skills, stats.total_attempts, stats.correct_attempts) == (1, 25, 24)
+        assert stats.mastered_by_category == {"Algebra": 1}
+
+    def test_assessment_tracks_changed_keys(self, db, student):
+        stats = load_student_stats(db, student.id)
+        record_assessment(stats, correct=True, old_level=4, new_level=5, is_new_skill=False, category="Algebra")
+        assert stats.mastered_skills == 1
+        assert set(stats.pending_stats) >= {"total_attempts", "mastered_skills.Algebra", "correct_attempts"}
+
+
+class TestAwarding:
+    """Test suite for BadgeService awarding"""
+
+    def test_assessments_award_dependent_badges_once(self, db, student, badges):
+        skill = MasterySkill(name="Fractions", category="Algebra")
+        db.add(skill)
+        db.commit()
+        mastery = MasteryService(db)
+        badge_service = BadgeService(db)
+
+        earned = []
+        for _ in range(20):
+            mastery.assess_skill(student.id, skill.id, True)
+            earned += [b["name"] for b in badge_service.check_and_award_badges(student.id)]
+
+        assert earned == ["First Steps", "Sharpshooter", "Algebra Ace"]
+        assert db.query(StudentBadge).filter_by(student_id=student.id).count() == 3
+        assert db.get(StudentStats, student.id).pending_stats == []
+
+    def test_only_badges_for_changed_stats_are_checked(self, db, student, badges):
+        stats = load_student_stats(db, student.id)
+        stats.total_attempts = 50
+        stats.correct_attempts = 50
+        db.commit()
+
+        # Counters changed without recording an event: nothing is re-evaluated
+        assert BadgeService(db).check_and_award_badges(student.id) == []
+
+        names = [b["name"] for b in BadgeService(db).check_and_award_badges(student.id, full=True)]
+        assert names == ["First Steps", "Sharpshooter"]
+
+    def test_evidence_is_recorded(self, db, student, badges):
+        stats = load_student_stats(db, student.id)
+        record_session(stats)
+        record_session(stats)
+        db.commit()
+
+        assert [b["name"] for b in BadgeService(db).check_and_award_badges(student.id)] == ["Exact"]
+        awarded = db.query(StudentBadge).filter_by(student_id=student.id).one()
+        assert awarded.evidence["total_sessions"] == 2
+        assert len(awarded.verification_code) == 12
+
+    def test_created_badge_can_be_earned(self, db, student, badges):
+        stats = load_student_stats(db, student.id)
+        stats.total_attempts = 5
+        db.commit()
+        assert BadgeService(db).check_and_award_badges(student.id, full=True) == []  # Rules are now cached
+
+        create_badge(BadgeCreate(name="Warm Up", criteria={"total_attempts": 5}), db=db, current_student=student)
+        names = [b["name"] for b in BadgeService(db).check_and_award_badges(student.id, full=True)]
+        assert names == ["Warm Up"]
+
+        # Updating a badge also reaches the cached rules
+        retired = badges["Retired"]
+        retired.is_active = True
+        db.commit()
+        assert "Retired" in [b.badge["name"] for b in get_badge_rules(db).badges]
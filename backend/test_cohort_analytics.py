@@ -0,0 +1,153 @@
+"""
+Unit Tests for Cohort Analytics
+Tests vectorized cohort summaries over knowledge rows and daily rollups, and
+the streaming Arrow IPC / Parquet export
+"""
+import io
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from conftest import answer
+from app.api import analytics
+from app.api.deps import get_current_student
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.models import Student, StudentKnowledge
+from app.services import cohort_analytics
+from app.services.cohort_analytics import cohort_summary, export_cohort
+from app.services.event_log import append_event, publish_event, EVENT_ANSWER
+
+
+START = datetime(2025, 5, 5, 10, 0)
+
+
+@pytest.fixture
+def cohort(db):
+    students = [Student(email=f"c{i}@example.com", username=f"c{i}", hashed_password="x") for i in range(3)]
+    db.add_all(students)
+    db.commit()
+    # Day 0: everyone answers once; day 2: the first student answers twice
+    for s in students:
+        publish_event(db, s.id, EVENT_ANSWER, answer(is_correct=s is students[0], time_spent=120.0), created_at=START)
+    for correct in (True, False):
+        publish_event(db, students[0].id, EVENT_ANSWER, answer(is_correct=correct, time_spent=60.0),
+                      created_at=START + timedelta(days=2))
+    db.commit()
+    for knowledge, algebra in zip(db.query(StudentKnowledge).order_by(StudentKnowledge.student_id), (0.9, 0.5, 0.1)):
+        knowledge.algebra_score = algebra
+    db.commit()
+    return students
+
+
+class TestCohortSummary:
+    """Test suite for cohort aggregates"""
+
+    def test_summary(self, db, cohort):
+        summary = cohort_summary(db, [s.id for s in cohort], START.date(), START.date() + timedelta(days=3))
+
+        assert (summary["student_count"], summary["students_with_knowledge"]) == (3, 3)
+        assert (summary["attempts"], summary["accuracy"], summary["minutes"]) == (5, 0.4, 8.0)
+
+        algebra = summary["topic_mastery"]["algebra"]
+        assert (algebra["median"], algebra["mastered_students"]) == (0.5, 1)
+        assert algebra["histogram"] == [1, 0, 1, 0, 1]
+
+        assert [d["active_students"] for d in summary["daily"]] == [3, 0, 1, 0]
+        assert [d["attempts"] for d in summary["daily"]] == [3, 0, 2, 0]
+        assert summary["daily"][0]["accuracy"] == pytest.approx(0.333)
+        assert summary["daily"][0]["minutes_per_active_student"] == 2.0
+
+        first = summary["students"][0]
+        assert (first["active_days"], first["attempts"], first["accuracy"], first["minutes"]) == (2, 3, 0.667, 4.0)
+
+    def test_unmaterialized_events_are_rolled_up(self, db, cohort):
+        # Logged without updating the rollups (e.g. backfilled history)
+        append_event(db, cohort[1].id, EVENT_ANSWER, answer(time_spent=120.0), created_at=START + timedelta(days=1))
+        db.commit()
+
+        summary = cohort_summary(db, [s.id for s in cohort], START.date(), START.date() + timedelta(days=3))
+        assert summary["attempts"] == 6
+        assert [d["attempts"] for d in summary["daily"]] == [3, 1, 2, 0]
+
+    def test_cohort_limits(self, db):
+        with pytest.raises(ValueError):
+            cohort_summary(db, [], START.date(), START.date())
+        with pytest.raises(ValueError):
+            cohort_summary(db, [1], START.date(), START.date() - timedelta(days=1))
+
+
+class TestCohortEndpoints:
+    """Test suite for access to the cohort endpoints"""
+
+    def test_staff_only(self, db, cohort, monkeypatch):
+        app = FastAPI()
+        app.include_router(analytics.router)
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_student] = lambda: cohort[0]
+        client = TestClient(app)
+        params = {"student_ids": [s.id for s in cohort], "days": 3}
+
+        assert client.get("/analytics/cohort", params=params).status_code == 403
+        assert client.get("/analytics/cohort/export", params=params).status_code == 403
+
+        monkeypatch.setattr(settings, "STAFF_USERNAMES", [cohort[0].username])
+        response = client.get("/analytics/cohort", params=params)
+        assert response.status_code == 200
+        assert response.json()["student_count"] == 3
+
+
+class TestCohortExport:
+    """Test suite for the columnar export"""
+
+    @pytest.fixture
+    def session_factory(self, db):
+        return sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+
+    def test_arrow_stream_in_batches(self, db, cohort, session_factory, monkeypatch):
+        pa = pytest.importorskip("pyarrow")
+        monkeypatch.setattr(cohort_analytics, "BATCH_ROWS", 2)
+        chunks = list(export_cohort(session_factory, [s.id for s in cohort], START.date(), START.date() + timedelta(days=3)))
+
+        reader = pa.ipc.open_stream(b"".join(chunks))
+        batches = list(reader)
+        table = pa.Table.from_batches(batches)
+        assert [batch.num_rows for batch in batches] == [2, 2]
+        assert table.column("questions_attempted").to_pylist() == [1, 2, 1, 1]
+        assert table.column("date").to_pylist()[:2] == [START.date(), START.date() + timedelta(days=2)]
+        assert table.column("minutes").to_pylist()[1] == pytest.approx(2.0)
+
+    def test_export_rolls_up_pending_events(self, db, cohort, session_factory):
+        pa = pytest.importorskip("pyarrow")
+        append_event(db, cohort[2].id, EVENT_ANSWER, answer(time_spent=120.0), created_at=START + timedelta(days=1))
+        db.commit()
+
+        chunks = export_cohort(session_factory, [cohort[2].id], START.date(), START.date() + timedelta(days=3))
+        table = pa.ipc.open_stream(b"".join(chunks)).read_all()
+        assert table.column("questions_attempted").to_pylist() == [1, 1]
+
+    def test_parquet_knowledge_export(self, db, cohort, session_factory):
+        pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+
+        data = b"".join(export_cohort(
+            session_factory, [s.id for s in cohort], START.date(), START.date(), fmt="parquet", table="knowledge"
+        ))
+        table = pq.read_table(io.BytesIO(data))
+        assert table.num_rows == 3
+        assert table.column("algebra_score").to_pylist() == [0.9, 0.5, 0.1]
+        assert "probability_score" in table.column_names
+
+    def test_invalid_exports(self, db, cohort, session_factory, monkeypatch):
+        ids = [s.id for s in cohort]
+        if cohort_analytics.pa is not None:
+            with pytest.raises(ValueError):
+                export_cohort(session_factory, ids, START.date(), START.date(), fmt="xlsx")
+            with pytest.raises(ValueError):
+                export_cohort(session_factory, ids, START.date(), START.date(), table="sessions")
+        monkeypatch.setattr(cohort_analytics, "pa", None)
+        with pytest.raises(RuntimeError):
+            export_cohort(session_factory, ids, START.date(), START.date())
@@ -0,0 +1,116 @@
+"""
+Unit Tests for the Learning Event Log
+Tests live materialization, offset checkpoints, rebuilds and backfill
+"""
+import pytest
+
+from conftest import answer
+from app.models.events import LearningEvent, MaterializerOffset
+from app.models.mastery import MasterySkill, StudentMastery
+from app.models.models import Content, LearningSession, StudentKnowledge
+from app.models.smart_recommendations import UserInteraction
+from app.services.event_log import (
+    publish_event, append_event, backfill_events, head_offset,
+    knowledge_materializer, mastery_materializer, InteractionMatrixMaterializer,
+    EVENT_ANSWER, EVENT_SKILL_ASSESSMENT, EVENT_INTERACTION
+)
+from app.services.student_model import StudentModelService
+
+
+@pytest.fixture
+def skill(db):
+    skill = MasterySkill(name="Linear Equations", difficulty="beginner")
+    db.add(skill)
+    db.commit()
+    return skill
+
+
+class TestEventLog:
+    """Test suite for the append-only log and its materializers"""
+
+    def test_offsets_are_monotonic(self, db, student):
+        first = append_event(db, student.id, EVENT_ANSWER, answer())
+        second = append_event(db, student.id, EVENT_ANSWER, answer())
+        assert second.id > first.id
+        assert head_offset(db) == second.id
+
+    def test_publish_matches_direct_update(self, db, student):
+        expected = StudentModelService.new_knowledge(student.id)
+        for correct in [True, True, False, True]:
+            StudentModelService.apply_answer(expected, "calculus", correct, 2, 20.0)
+            publish_event(db, student.id, EVENT_ANSWER, answer("calculus", correct, 2, 20.0))
+        db.commit()
+
+        knowledge = db.query(StudentKnowledge).filter_by(student_id=student.id).one()
+        assert knowledge.total_attempts == 4
+        assert knowledge.correct_answers == 3
+        assert knowledge.calculus_score == pytest.approx(expected.calculus_score)
+        assert knowledge.average_time == pytest.approx(expected.average_time)
+
+    def test_catch_up_is_idempotent(self, db, student):
+        publish_event(db, student.id, EVENT_ANSWER, answer())
+        db.commit()
+        assert knowledge_materializer.catch_up(db, student_id=student.id) == 0
+        assert knowledge_materializer.catch_up(db) == 0
+        assert db.query(StudentKnowledge).filter_by(student_id=student.id).one().total_attempts == 1
+
+    def test_rebuild_reproduces_live_state(self, db, student):
+        for correct in [True, False, True]:
+            publish_event(db, student.id, EVENT_ANSWER, answer("optics", correct))
+        db.commit()
+        live_score = db.query(StudentKnowledge).filter_by(student_id=student.id).one().optics_score
+
+        assert knowledge_materializer.rebuild(db) == 3
+        db.commit()
+        db.expire_all()
+
+        knowledge = db.query(StudentKnowledge).filter_by(student_id=student.id).one()
+        assert knowledge.total_attempts == 3
+        assert knowledge.optics_score == pytest.approx(live_score)
+
+    def test_mastery_materializer_creates_record(self, db, student, skill):
+        for _ in range(10):
+            publish_event(db, student.id, EVENT_SKILL_ASSESSMENT,
+                          {"skill_id": skill.id, "correct": True, "time_spent": 5})
+        db.commit()
+
+        mastery = db.query(StudentMastery).filter_by(student_id=student.id, skill_id=skill.id).one()
+        assert mastery.total_attempts == 10
+        assert mastery.mastery_level == 3
+        assert mastery.total_practice_time == 50
+
+    def test_interaction_matrix_refreshes_incrementally(self, db, student):
+        matrix = InteractionMatrixMaterializer()
+        publish_event(db, student.id, EVENT_INTERACTION, {"content_id": 7, "rating": 4.0})
+        db.commit()
+        assert matrix.refresh(db) == {student.id: {7: 4.0}}
+
+        publish_event(db, student.id, EVENT_INTERACTION, {"content_id": 7, "rating": None, "implicit_rating": 2.0})
+        db.commit()
+        assert matrix.catch_up(db) == 1
+        assert matrix.matrix[student.id][7] == 2.0
+
+    def test_backfill_seeds_log_and_marks_views_current(self, db, student, skill):
+        content = Content(title="q", topic="algebra", difficulty=2, correct_answer="4")
+        db.add(content)
+        db.flush()
+        db.add(LearningSession(student_id=student.id, content_id=content.id, is_correct=True, time_spent=12.0))
+        db.add(StudentMastery(student_id=student.id, skill_id=skill.id, total_attempts=4,
+                              correct_attempts=3, total_practice_time=8, mastery_level=1))
+        db.add(UserInteraction(student_id=student.id, content_id=content.id, rating=5.0))
+        db.commit()
+
+        counts = backfill_events(db)
+        db.commit()
+
+        assert counts == {EVENT_ANSWER: 1, EVENT_SKILL_ASSESSMENT: 4, EVENT_INTERACTION: 1}
+        assert db.query(LearningEvent).count() == 6
+        watermark = db.query(MaterializerOffset).filter_by(
+            materializer=mastery_materializer.name, student_id=0
+        ).one()
+        assert watermark.last_offset == head_offset(db)
+        # Existing rows already reflect the backfilled events
+        assert mastery_materializer.catch_up(db) == 0
+
+        with pytest.raises(ValueError):
+            backfill_events(db)
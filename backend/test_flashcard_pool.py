@@ -0,0 +1,131 @@
+"""
+Unit Tests for the Flashcard Pool
+Tests topic normalization, shared pools with per-student SRS state and
+coalescing of identical concurrent generations
+"""
+import threading
+import time
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.models import Student
+from app.models.smart_recommendations import FlashCard, FlashCardPool, PooledFlashCard
+from app.services.flashcard_pool import add_pool_to_deck, get_or_create_pool, normalize_topic
+
+
+class FakeGenerator:
+    """Stands in for the LLM; counts calls"""
+
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    def __call__(self, topic, count):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [
+            {"concept_name": f"{topic} {i}", "question": f"Q{i}?", "answer": f"A{i}", "difficulty": 2}
+            for i in range(count)
+        ]
+
+
+@pytest.fixture
+def other(db):
+    other = Student(email="other@example.com", username="other", hashed_password="x")
+    db.add(other)
+    db.commit()
+    return other
+
+
+class TestFlashcardPool:
+    """Test suite for the shared generation cache"""
+
+    def test_normalize_topic(self):
+        assert normalize_topic("  Newton's  LAWS ") == normalize_topic("newton s laws") == "newton s laws"
+        assert normalize_topic("Ｃａｌｃｕｌｕｓ") == "calculus"
+
+    def test_same_topic_is_generated_once(self, db, student, other):
+        generate = FakeGenerator()
+        pool, hit = get_or_create_pool(db, "Photosynthesis", 3, generate)
+        again, hit_again = get_or_create_pool(db, "  photosynthesis!", 3, generate)
+        other_count, _ = get_or_create_pool(db, "Photosynthesis", 4, generate)
+
+        assert (hit, hit_again) == (False, True)
+        assert again.id == pool.id != other_count.id
+        assert generate.calls == 2
+        db.refresh(pool)
+        assert pool.hit_count == 1
+        assert db.query(PooledFlashCard).count() == 7
+
+    def test_decks_share_content_but_not_srs_state(self, db, student, other):
+        pool, _ = get_or_create_pool(db, "Optics", 2, FakeGenerator())
+        mine = add_pool_to_deck(db, student.id, pool, tags=["Optics"])
+        theirs = add_pool_to_deck(db, other.id, pool, tags=["Optics"])
+
+        assert [c["question"] for c in mine] == [c["question"] for c in theirs] == ["Q0?", "Q1?"]
+        assert {c["id"] for c in mine}.isdisjoint(c["id"] for c in theirs)
+
+        card = db.get(FlashCard, mine[0]["id"])
+        assert card.question_text is None and card.question == "Q0?" and card.answer == "A0"
+        card.calculate_sm2_next_review(5)
+        db.commit()
+        assert db.get(FlashCard, theirs[0]["id"]).total_reviews == 0
+
+        # The same pool adds nothing new to the deck
+        assert add_pool_to_deck(db, student.id, pool, tags=["Optics"]) == []
+        assert db.query(FlashCard).filter(FlashCard.student_id == student.id).count() == 2
+
+    def test_repeat_request_serves_next_variant(self, db, student, other):
+        generate = FakeGenerator()
+        first, _ = get_or_create_pool(db, "Optics", 2, generate, student.id)
+        add_pool_to_deck(db, student.id, first, tags=["Optics"])
+
+        second, hit = get_or_create_pool(db, "Optics", 2, generate, student.id)
+        assert (second.variant, hit, generate.calls) == (1, False, 2)
+        assert len(add_pool_to_deck(db, student.id, second, tags=["Optics"])) == 2
+
+        # Others still start from the first variant; the second is reused
+        assert get_or_create_pool(db, "Optics", 2, generate, other.id)[0].id == first.id
+        add_pool_to_deck(db, other.id, first, tags=["Optics"])
+        assert get_or_create_pool(db, "Optics", 2, generate, other.id) == (second, True)
+        assert generate.calls == 2
+
+    def test_own_cards_keep_their_content(self, db, student):
+        card = FlashCard(student_id=student.id, concept_name="c", question="mine?", answer="yes")
+        db.add(card)
+        db.commit()
+        db.expire_all()
+        assert (card.question, card.answer, card.pooled_card_id) == ("mine?", "yes", None)
+
+    def test_concurrent_identical_requests_generate_once(self, db):
+        generate = FakeGenerator(delay=0.05)
+        make_session = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+        pool_ids, errors = [], []
+
+        def request():
+            session = make_session()
+            try:
+                pool, _ = get_or_create_pool(session, "Thermodynamics", 5, generate)
+                pool_ids.append(pool.id)
+            except Exception as e:  # pragma: no cover - surfaced below
+                errors.append(e)
+            finally:
+                session.close()
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert generate.calls == 1
+        assert len(set(pool_ids)) == 1 and len(pool_ids) == 8
+        assert db.query(FlashCardPool).count() == 1
+
+    def test_invalid_requests(self, db):
+        with pytest.raises(ValueError):
+            get_or_create_pool(db, "Optics", 0, FakeGenerator())
+        with pytest.raises(ValueError):
+            get_or_create_pool(db, " !! ", 3, FakeGenerator())
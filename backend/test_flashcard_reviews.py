@@ -0,0 +1,175 @@
+"""
+Unit Tests for Batch Flashcard Review
+Tests that a review session is applied like individual reviews, recorded as
+one ReviewSession and written with a constant number of statements
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.events import LearningEvent
+from app.models.models import Student
+from app.models.smart_recommendations import FlashCard, ReviewSession
+from app.services.flashcard_service import submit_reviews, upgrade_flashcards_table
+
+
+START = datetime(2025, 2, 1, 18, 0)
+
+
+def make_cards(db, student, count, **fields):
+    cards = [
+        FlashCard(student_id=student.id, concept_name=f"c{i}", question="q", answer="a",
+                  next_review_date=START, **fields)
+        for i in range(count)
+    ]
+    db.add_all(cards)
+    db.commit()
+    return cards
+
+
+@pytest.fixture
+def other_card(db):
+    other = Student(email="other@example.com", username="other", hashed_password="x")
+    db.add(other)
+    db.commit()
+    card = FlashCard(student_id=other.id, concept_name="c", question="q", answer="a")
+    db.add(card)
+    db.commit()
+    return card
+
+
+@pytest.fixture
+def india_time(monkeypatch):
+    """Run with the process's local time zone at UTC+5:30"""
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+class TestBatchReview:
+    """Test suite for submit_reviews"""
+
+    def test_matches_individual_reviews(self, db, student):
+        cards = make_cards(db, student, 3)
+        expected = [
+            FlashCard(interval=1, repetitions=0, ease_factor=2.5, streak=0,
+                      total_reviews=0, correct_reviews=0)
+            for _ in cards
+        ]
+        answers = [(0, 5, 0), (1, 2, 10), (2, 4, 20), (0, 4, 30)]
+        for i, quality, seconds in answers:
+            expected[i].calculate_sm2_next_review(quality, reviewed_at=START + timedelta(seconds=seconds))
+
+        result = submit_reviews(db, student.id, [
+            (cards[i].id, quality, START + timedelta(seconds=seconds)) for i, quality, seconds in answers
+        ])
+
+        db.expire_all()
+        for card, reference in zip(cards, expected):
+            assert (card.interval, card.repetitions, card.ease_factor, card.next_review_date) == (
+                reference.interval, reference.repetitions, reference.ease_factor, reference.next_review_date
+            )
+        assert [r["flashcard_id"] for r in result["flashcards"]] == [c.id for c in cards]
+
+        session = db.query(ReviewSession).one()
+        assert (session.cards_reviewed, session.cards_correct) == (4, 3)
+        assert session.average_quality == pytest.approx(3.75)
+        assert session.accuracy_rate == pytest.approx(75.0)
+        assert session.session_duration_seconds == 30
+        assert result["session"]["id"] == session.id
+        assert db.query(LearningEvent).filter(LearningEvent.event_type == "flashcard_review").count() == 4
+
+    def test_events_are_stamped_in_local_time(self, db, student, india_time):
+        cards = make_cards(db, student, 2)
+        submit_reviews(db, student.id, [
+            (cards[0].id, 4, START),
+            (cards[1].id, 4, (START + timedelta(hours=1)).replace(tzinfo=timezone.utc)),
+        ])
+
+        db.expire_all()
+        assert cards[0].last_reviewed == START  # Cards stay in UTC
+        stamps = [event.created_at for event in db.query(LearningEvent).order_by(LearningEvent.id)]
+        assert stamps == [START + timedelta(hours=5, minutes=30), START + timedelta(hours=6, minutes=30)]
+
+    def test_statement_count_does_not_grow_with_batch_size(self, db, student, query_counter):
+        warm_up = make_cards(db, student, 1)
+        small = make_cards(db, student, 5)
+        large = make_cards(db, student, 40)
+        student_id = student.id
+        small_ids = [c.id for c in small]
+        large_ids = [c.id for c in large]
+        submit_reviews(db, student_id, [(warm_up[0].id, 4, None)])  # Creates offsets and activity rows
+
+        query_counter["count"] = 0
+        submit_reviews(db, student_id, [(card_id, 4, None) for card_id in small_ids])
+        small_count = query_counter["count"]
+
+        query_counter["count"] = 0
+        submit_reviews(db, student_id, [(card_id, 4, None) for card_id in large_ids])
+        assert query_counter["count"] == small_count
+
+    def test_fsrs_cards_are_scheduled_with_fsrs(self, db, student):
+        cards = make_cards(db, student, 2, scheduler="fsrs")
+        result = submit_reviews(db, student.id, [(cards[0].id, 5, START), (cards[1].id, 1, START)])
+
+        db.expire_all()
+        assert cards[0].stability > cards[1].stability
+        assert all(r["scheduler"] == "fsrs" for r in result["flashcards"])
+
+    def test_invalid_submissions_change_nothing(self, db, student, other_card):
+        cards = make_cards(db, student, 1)
+        with pytest.raises(ValueError):
+            submit_reviews(db, student.id, [])
+        with pytest.raises(ValueError):
+            submit_reviews(db, student.id, [(cards[0].id, 6, None)])
+        with pytest.raises(ValueError):
+            submit_reviews(db, student.id, [(cards[0].id, 4, None), (other_card.id, 4, None)])
+
+        db.rollback()
+        assert db.get(FlashCard, cards[0].id).total_reviews == 0
+        assert db.query(ReviewSession).count() == 0
+
+
+
+class TestTableUpgrade:
+    """Test suite for upgrading a flashcards table that predates FSRS"""
+
+    def test_upgrade_keeps_rows(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE flashcards (id INTEGER PRIMARY KEY, student_id INTEGER NOT NULL, "
+                "concept_id INTEGER, concept_name VARCHAR(200) NOT NULL, question TEXT NOT NULL, "
+                "answer TEXT NOT NULL, interval INTEGER, repetitions INTEGER, ease_factor FLOAT, "
+                "next_review_date DATETIME, last_reviewed DATETIME, total_reviews INTEGER, "
+                "correct_reviews INTEGER, streak INTEGER, difficulty INTEGER, tags JSON, created_at DATETIME)"
+            ))
+            connection.execute(text("CREATE INDEX ix_flashcards_id ON flashcards (id)"))
+            connection.execute(text(
+                "INSERT INTO flashcards (id, student_id, concept_name, question, answer, interval) "
+                "VALUES (7, 1, 'c', 'q', 'a', 6)"
+            ))
+
+        db = sessionmaker(bind=engine)()
+        changes = upgrade_flashcards_table(db)
+        assert changes == [
+            "added scheduler", "added stability", "added memory_difficulty", "added pooled_card_id",
+            "made question nullable", "made answer nullable"
+        ]
+        columns = {column["name"]: column for column in inspect(engine).get_columns("flashcards")}
+        assert columns["question"]["nullable"] and columns["answer"]["nullable"]
+        indexes = {index["name"] for index in inspect(engine).get_indexes("flashcards")}
+        assert {"ix_flashcards_pooled_card_id", "ix_flashcards_student_next_review"} <= indexes
+
+        card = db.get(FlashCard, 7)
+        assert (card.question_text, card.interval, card.scheduler, card.stability) == ("q", 6, "sm2", None)
+        db.add(FlashCard(student_id=1, concept_name="pooled"))
+        db.commit()
+
+        assert upgrade_flashcards_table(db) == []
+        db.close()
@@ -0,0 +1,200 @@
+"""
+Unit Tests for the FSRS Scheduler
+Tests the memory model, batch replay against per-card scheduling, weight
+fitting and one-pass deck rescheduling
+"""
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.smart_recommendations import FlashCard, SRSParameters
+from app.services import fsrs
+from app.services.event_log import append_event, EVENT_FLASHCARD_REVIEW
+
+
+START = datetime(2025, 1, 1, 9, 0)
+
+
+def simulate(n_cards, reviews, w, seed=0):
+    """Review sequences of cards whose recall follows the model with weights w"""
+    rng = np.random.default_rng(seed)
+    sequences = {}
+    for card_id in range(1, n_cards + 1):
+        when = START
+        s, d = np.array([np.nan]), np.array([np.nan])
+        rating = np.array([rng.integers(1, 5)])
+        history = []
+        for _ in range(reviews):
+            history.append((when, int(rating[0])))
+            s, d = fsrs.next_state(s, d, np.array([0.0]) if len(history) == 1 else elapsed, rating, w)
+            elapsed = np.array([max(0.5, fsrs.next_interval(s)[0] * rng.uniform(0.3, 2.0))])
+            when = when + timedelta(days=float(elapsed[0]))
+            recalled = rng.random() < fsrs.retrievability(elapsed, s)[0]
+            rating = np.array([rng.choice([2, 3, 3, 3, 4]) if recalled else 1])
+        sequences[card_id] = history
+    return sequences
+
+
+class TestMemoryModel:
+    """Test suite for the FSRS update rules"""
+
+    def test_quality_maps_to_ratings(self):
+        assert fsrs.quality_to_rating([0, 1, 2, 3, 4, 5]).tolist() == [1, 1, 1, 2, 3, 4]
+
+    def test_first_review_uses_initial_stability(self):
+        s, d = fsrs.next_state(np.full(4, np.nan), np.full(4, np.nan), np.zeros(4), np.arange(1, 5))
+        assert np.allclose(s, fsrs.DEFAULT_WEIGHTS[:4])
+        assert np.all(np.diff(d) <= 0) and d[0] > d[3]  # Easier first answers mean lower difficulty
+
+    def test_initial_difficulty_follows_fsrs_4_5(self):
+        d0 = fsrs.initial_difficulty(np.arange(1, 5), fsrs.DEFAULT_WEIGHTS)
+        assert d0 == pytest.approx([7.62, 6.39, 5.16, 3.93], abs=0.01)
+
+    def test_interval_matches_desired_retention(self):
+        stability = np.array([3.0, 10.0, 50.0])
+        assert fsrs.next_interval(stability).tolist() == [3, 10, 50]
+        assert np.allclose(fsrs.retrievability(stability, stability), 0.9)
+
+    def test_recall_grows_and_lapse_shrinks_stability(self):
+        s, d = np.array([10.0, 10.0]), np.array([5.0, 5.0])
+        new_s, new_d = fsrs.next_state(s, d, np.array([10.0, 10.0]), np.array([3, 1]))
+        assert new_s[0] > 10.0 > new_s[1]
+        assert new_d[1] > new_d[0]
+
+    def test_replay_matches_sequential_scheduling(self):
+        sequences = simulate(40, 6, fsrs.DEFAULT_WEIGHTS, seed=1)
+        history = fsrs.ReviewHistory(sequences)
+        stability, difficulty, _ = fsrs.replay(history)
+
+        for row, card_id in enumerate(history.card_ids):
+            s, d, previous = np.array([np.nan]), np.array([np.nan]), None
+            for when, rating in sequences[card_id]:
+                elapsed = 0.0 if previous is None else (when - previous).total_seconds() / 86400
+                s, d = fsrs.next_state(s, d, np.array([elapsed]), np.array([rating]))
+                previous = when
+            assert stability[row] == pytest.approx(s[0])
+            assert difficulty[row] == pytest.approx(d[0])
+
+
+class TestFitting:
+    """Test suite for weight fitting"""
+
+    def test_fit_lowers_log_loss(self):
+        true_weights = fsrs.DEFAULT_WEIGHTS.copy()
+        true_weights[8] = 0.8   # Stability grows much more slowly than the defaults assume
+        true_weights[11] = 0.8
+        history = fsrs.ReviewHistory(simulate(150, 8, true_weights, seed=2))
+
+        baseline = fsrs.log_loss(history)
+        fitted = fsrs.fit_weights(history, max_iter=15)
+        assert fsrs.log_loss(history, fitted) < baseline
+        assert all(low <= x <= high for x, (low, high) in zip(fitted, fsrs.WEIGHT_BOUNDS))
+
+    def test_fit_parameters_needs_history(self, db, student):
+        with pytest.raises(ValueError):
+            fsrs.fit_parameters(db, student.id)
+
+    def test_fitted_weights_are_stored_and_preferred(self, db, student):
+        for card_id, history in simulate(12, 6, fsrs.DEFAULT_WEIGHTS, seed=3).items():
+            for when, rating in history:
+                append_event(db, student.id, EVENT_FLASHCARD_REVIEW,
+                             {"flashcard_id": card_id, "quality": rating + 1}, created_at=when)
+        db.add(SRSParameters(student_id=None, weights=[1.0] * 17))
+        db.commit()
+
+        result = fsrs.fit_parameters(db, student.id)
+        db.commit()
+
+        assert result["review_count"] == 72
+        assert result["log_loss"] <= result["baseline_log_loss"]
+        assert fsrs.get_weights(db, student.id).tolist() == pytest.approx(result["weights"])
+        assert fsrs.get_weights(db, student.id + 1).tolist() == [1.0] * 17
+
+
+class TestScheduling:
+    """Test suite for single-card and whole-deck scheduling"""
+
+    def card(self, student, **fields):
+        defaults = dict(student_id=student.id, concept_name="c", question="q", answer="a",
+                        scheduler="fsrs", interval=1, ease_factor=2.5, repetitions=0,
+                        total_reviews=0, correct_reviews=0, streak=0)
+        return FlashCard(**{**defaults, **fields})
+
+    def test_review_card_spaces_out_successful_reviews(self, student):
+        card = self.card(student)
+        now = START
+        intervals = []
+        for quality in [4, 4, 5, 4]:
+            fsrs.review_card(card, quality, now)
+            intervals.append(card.interval)
+            now = card.next_review_date
+
+        assert intervals == sorted(intervals) and intervals[-1] > intervals[0]
+        assert card.total_reviews == card.correct_reviews == card.streak == 4
+
+        fsrs.review_card(card, 1, now)
+        assert card.interval < intervals[-1]
+        assert card.streak == 0
+
+    def test_sm2_cards_are_seeded_from_their_interval(self, student):
+        card = self.card(student, last_reviewed=START, interval=20, ease_factor=2.5)
+        fsrs.review_card(card, 4, START + timedelta(days=20))
+        assert card.interval > 20
+
+    def test_reschedule_deck_in_one_pass(self, db, student):
+        sequences = simulate(5, 4, fsrs.DEFAULT_WEIGHTS, seed=4)
+        cards = [self.card(student, last_reviewed=sequences[i][-1][0]) for i in range(1, 6)]
+        legacy = self.card(student, last_reviewed=START, interval=12, ease_factor=2.5)
+        db.add_all(cards + [legacy])
+        db.commit()
+        for card, history in zip(cards, sequences.values()):
+            for when, rating in history:
+                append_event(db, student.id, EVENT_FLASHCARD_REVIEW,
+                             {"flashcard_id": card.id, "quality": rating + 1}, created_at=when)
+        db.commit()
+
+        assert fsrs.reschedule_deck(db, student.id) == 6
+        db.commit()
+        db.expire_all()
+
+        stability, _, _ = fsrs.replay(fsrs.ReviewHistory(sequences))
+        for card, s in zip(cards, stability):
+            assert card.stability == pytest.approx(s)
+            assert card.next_review_date == card.last_reviewed + timedelta(days=card.interval)
+        assert legacy.stability == 12.0 and legacy.interval == 12
+
+    def test_reschedule_deck_seeds_pre_log_history(self, db, student):
+        # Reviewed three times under SM-2 before the log, then once logged
+        card = self.card(student, last_reviewed=START + timedelta(days=12), interval=12, total_reviews=4)
+        twin = self.card(student, last_reviewed=START, interval=12)
+        db.add_all([card, twin])
+        db.commit()
+        append_event(db, student.id, EVENT_FLASHCARD_REVIEW,
+                     {"flashcard_id": card.id, "quality": 4}, created_at=START + timedelta(days=12))
+        db.commit()
+
+        fsrs.reschedule_deck(db, student.id)
+        db.commit()
+        db.expire_all()
+
+        # Same result as reviewing the SM-2 card on time with review_card
+        fsrs.review_card(twin, 4, START + timedelta(days=12))
+        assert card.stability == pytest.approx(twin.stability)
+        assert card.memory_difficulty == pytest.approx(twin.memory_difficulty)
+        assert card.interval == twin.interval > 12
+
+    def test_benchmark_replay_10k_cards(self):
+        rng = np.random.default_rng(5)
+        history = fsrs.ReviewHistory({})
+        history.ratings = rng.integers(1, 5, size=(10_000, 20))
+        history.elapsed = rng.uniform(0.5, 30, size=(10_000, 20))
+
+        start = time.perf_counter()
+        stability, _, _ = fsrs.replay(history)
+        elapsed = time.perf_counter() - start
+
+        print(f"\nFSRS replay 10k cards x 20 reviews: {elapsed * 1000:.1f} ms")
+        assert np.all(np.isfinite(stability))
+        assert elapsed < 1.0
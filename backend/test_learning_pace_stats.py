@@ -0,0 +1,77 @@
+"""
+Unit Tests for Running Learning Pace Statistics
+Tests Welford time-on-task statistics folded from answer events and pace
+analysis over them
+"""
+import statistics
+
+import pytest
+
+from conftest import answer
+from app.api.learning_pace import calculate_pace_metrics
+from app.models.learning_pace import LearningPace
+from app.services.event_log import publish_event, pace_materializer, EVENT_ANSWER
+
+
+class TestRunningStatistics:
+    """Test suite for per-concept running statistics"""
+
+    def test_welford_matches_batch_statistics(self):
+        times = [95.0, 180.0, 240.5, 60.0, 133.0]
+        pace = LearningPace(student_id=1, time_on_task_data={})
+        for seconds in times:
+            pace.record_time_on_task("algebra", seconds, seconds < 200)
+
+        stats = pace.concept_stats()["algebra"]
+        assert (stats["count"], stats["correct"]) == (5, 4)
+        assert stats["mean"] == pytest.approx(statistics.mean(times))
+        assert stats["variance"] == pytest.approx(statistics.variance(times))
+        assert pace.time_by_concept() == {"algebra": round(statistics.mean(times), 1)}
+
+    def test_answers_are_folded_as_they_arrive(self, db, student):
+        for topic, seconds, correct in [("algebra", 120, True), ("algebra", 240, False), ("calculus", 120, True)]:
+            publish_event(db, student.id, EVENT_ANSWER, answer(topic, correct, time_spent=seconds))
+        publish_event(db, student.id, EVENT_ANSWER, answer("calculus", time_spent=0))  # Untimed
+        db.commit()
+
+        pace = db.query(LearningPace).filter(LearningPace.student_id == student.id).one()
+        assert pace.time_by_concept() == {"algebra": 180.0, "calculus": 120.0}
+
+        metrics = calculate_pace_metrics(student.id, db)
+        assert metrics["total_concepts"] == 3
+        assert metrics["completion_rate"] == pytest.approx(66.7)
+        assert metrics["avg_time_per_concept"] == 160.0
+        assert metrics["avg_speed"] == 1.5  # Mean of 180/180 (algebra) and 240/120 (calculus)
+
+    def test_analysis_cost_does_not_grow_with_history(self, db, student, query_counter):
+        student_id = student.id  # Not re-read from the expired instance after each commit
+        publish_event(db, student_id, EVENT_ANSWER, answer("algebra", time_spent=100))
+        db.commit()
+        calculate_pace_metrics(student_id, db)  # Warm the baseline cache
+        query_counter["count"] = 0
+        calculate_pace_metrics(student_id, db)
+        queries = query_counter["count"]
+
+        for i in range(50):
+            publish_event(db, student_id, EVENT_ANSWER, answer("algebra", time_spent=100 + i))
+        db.commit()
+        query_counter["count"] = 0
+        metrics = calculate_pace_metrics(student_id, db)
+        assert query_counter["count"] == queries
+        assert metrics["total_concepts"] == 51
+
+    def test_rebuild_keeps_preferences(self, db, student):
+        for seconds in (90, 150):
+            publish_event(db, student.id, EVENT_ANSWER, answer("geometry", time_spent=seconds))
+        db.commit()
+        pace = db.query(LearningPace).filter(LearningPace.student_id == student.id).one()
+        pace.fast_track_mode = True
+        pace.time_on_task_data = {"geometry": 999}  # Legacy {concept: avg_time} format
+        db.commit()
+
+        pace_materializer.rebuild(db)
+        db.commit()
+        db.refresh(pace)
+        assert pace.fast_track_mode
+        assert pace.concept_stats()["geometry"]["count"] == 2
+        assert pace.time_by_concept() == {"geometry": 120.0}
@@ -0,0 +1,112 @@
+"""
+Unit Tests for the Learning Path Planner
+Tests the required set, shortest-time ordering, stages and memoization
+"""
+import time
+
+import pytest
+
+from app.models.mastery import MasterySkill, StudentMastery
+from app.services.learning_path import plan_path, get_path_plan, clear_path_plans
+from app.services.mastery_service import MasteryService
+from app.services.mastery_snapshot import get_mastery_snapshot
+from app.services.skill_graph import get_skill_graph
+
+
+@pytest.fixture(autouse=True)
+def fresh_plans():
+    clear_path_plans()
+    yield
+    clear_path_plans()
+
+
+@pytest.fixture
+def tree(db):
+    """
+    basics(1h) -> long_branch(5h) --\\
+    basics(1h) -> short_branch(1h) --> target(2h)
+    unrelated(1h)
+    """
+    skills = {
+        "basics": MasterySkill(name="basics", estimated_hours=1.0),
+        "long_branch": MasterySkill(name="long_branch", estimated_hours=5.0),
+        "short_branch": MasterySkill(name="short_branch", estimated_hours=1.0),
+        "target": MasterySkill(name="target", estimated_hours=2.0),
+        "unrelated": MasterySkill(name="unrelated", estimated_hours=1.0),
+    }
+    skills["long_branch"].prerequisites = [skills["basics"]]
+    skills["short_branch"].prerequisites = [skills["basics"]]
+    skills["target"].prerequisites = [skills["long_branch"], skills["short_branch"]]
+    db.add_all(skills.values())
+    db.commit()
+    return skills
+
+
+class TestLearningPath:
+    """Test suite for the learning path planner"""
+
+    def test_orders_quickest_ready_skill_first(self, db, tree, student):
+        result = MasteryService(db).get_learning_path(student.id, tree["target"].id)
+
+        names = [item["skill"]["name"] for item in result["path"]]
+        assert names == ["basics", "short_branch", "long_branch", "target"]
+        assert [item["stage"] for item in result["path"]] == [0, 1, 1, 2]
+        assert [item["cumulative_hours"] for item in result["path"]] == [1.0, 2.0, 7.0, 9.0]
+        assert result["estimated_hours"] == 9.0
+        assert result["critical_path_hours"] == 8.0
+        assert result["stages"] == 3
+
+    def test_skips_mastered_prerequisites(self, db, tree, student):
+        db.add(StudentMastery(student_id=student.id, skill_id=tree["basics"].id, mastery_level=3))
+        db.add(StudentMastery(student_id=student.id, skill_id=tree["short_branch"].id, mastery_level=2))
+        db.commit()
+
+        result = MasteryService(db).get_learning_path(student.id, tree["target"].id)
+
+        path = {item["skill"]["name"]: item for item in result["path"]}
+        assert list(path) == ["short_branch", "long_branch", "target"]
+        assert path["short_branch"]["mastery_level"] == 2
+        assert path["short_branch"]["is_unlocked"] and not path["target"]["is_unlocked"]
+
+    def test_mastered_target_has_empty_path(self, db, tree, student):
+        for name in ["basics", "long_branch", "short_branch", "target"]:
+            db.add(StudentMastery(student_id=student.id, skill_id=tree[name].id, mastery_level=4))
+        db.commit()
+
+        result = MasteryService(db).get_learning_path(student.id, tree["target"].id)
+        assert result["path"] == [] and result["estimated_hours"] == 0.0
+
+    def test_unknown_target(self, db, tree, student):
+        with pytest.raises(ValueError):
+            MasteryService(db).get_learning_path(student.id, 999)
+
+    def test_plans_are_memoized_per_state(self, db, tree, student):
+        graph = get_skill_graph(db)
+        snapshot = get_mastery_snapshot(db, student.id)
+        target = graph.index[tree["target"].id]
+
+        plan = get_path_plan(graph, snapshot, target)
+        assert get_path_plan(graph, snapshot, target) is plan
+
+        satisfied = snapshot.satisfied.copy()
+        satisfied[graph.index[tree["basics"].id]] = True
+        assert len(plan_path(graph, satisfied, target).order) == 3
+
+    def test_deep_tree_is_sub_millisecond(self, db, student):
+        skills = [MasterySkill(name=f"skill {i}", estimated_hours=float(i % 4 + 1)) for i in range(1000)]
+        for i in range(1, 1000):
+            skills[i].prerequisites = [skills[i - 1]] + ([skills[i - 2]] if i > 1 else [])
+        db.add_all(skills)
+        db.commit()
+
+        graph = get_skill_graph(db)
+        target = graph.index[skills[-1].id]
+        snapshot = get_mastery_snapshot(db, student.id)
+        snapshot.level[:500] = 3
+
+        assert len(get_path_plan(graph, snapshot, target).order) == 500
+
+        start = time.perf_counter()
+        for _ in range(100):
+            get_path_plan(graph, snapshot, target)
+        assert (time.perf_counter() - start) / 100 < 0.001
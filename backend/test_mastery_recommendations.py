@@ -0,0 +1,106 @@
+"""
+Unit Tests for Next-Skill Recommendations
+Checks the vectorized scorer against the original per-skill loop and
+benchmarks both on a 1,500-skill tree
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.mastery import MasterySkill, StudentMastery
+from app.services.mastery_service import MasteryService
+from app.services.mastery_snapshot import invalidate_mastery_snapshot
+
+
+DIFFICULTIES = ["beginner", "intermediate", "advanced", "expert", None]
+
+
+def legacy_recommendations(db, student_id, limit=5):
+    """The pre-vectorization implementation: per-skill queries and a Python sort"""
+    recommendations = []
+    for skill in db.query(MasterySkill).order_by(MasterySkill.id).all():
+        if not skill.is_unlocked_for_student(student_id, db):
+            continue
+        mastery = db.query(StudentMastery).filter(
+            StudentMastery.student_id == student_id,
+            StudentMastery.skill_id == skill.id
+        ).first()
+        if mastery and mastery.mastery_level >= 5:
+            continue
+
+        priority_score = 0
+        if mastery:
+            priority_score += mastery.progress_percentage / 100.0 * 30
+        unlocks_count = len(skill.unlocks)
+        priority_score += min(unlocks_count * 10, 30)
+        difficulty_map = {"beginner": 20, "intermediate": 10, "advanced": 5, "expert": 2}
+        priority_score += difficulty_map.get(skill.difficulty, 10)
+        if mastery and mastery.last_assessed_at:
+            hours_since = (datetime.now() - mastery.last_assessed_at).total_seconds() / 3600
+            if hours_since < 24:
+                priority_score -= 20
+
+        recommendations.append((skill.id, priority_score, unlocks_count))
+    recommendations.sort(key=lambda x: x[1], reverse=True)
+    return recommendations[:limit]
+
+
+def build_tree(db, student, size, seed=7):
+    rng = random.Random(seed)
+    skills = [MasterySkill(name=f"skill {i}", difficulty=rng.choice(DIFFICULTIES), estimated_hours=1.0)
+              for i in range(size)]
+    for i in range(1, size):
+        skills[i].prerequisites = rng.sample(skills[max(0, i - 30):i], k=min(i, rng.randint(0, 2)))
+    db.add_all(skills)
+    db.flush()
+
+    now = datetime.now()
+    for skill in rng.sample(skills, k=size // 2):
+        level = rng.choice([1, 2, 3, 3, 4, 5])
+        db.add(StudentMastery(
+            student_id=student.id, skill_id=skill.id, mastery_level=level,
+            progress_percentage=level * 20.0,
+            last_assessed_at=now - timedelta(hours=rng.choice([1, 12, 30, 200])) if rng.random() < 0.8 else None
+        ))
+    db.commit()
+    return skills
+
+
+class TestRecommendations:
+    """Test suite for get_recommended_next_skills"""
+
+    @pytest.mark.parametrize("limit", [1, 5, 40])
+    def test_matches_legacy_ordering(self, db, student, limit):
+        build_tree(db, student, 300)
+        expected = legacy_recommendations(db, student.id, limit)
+
+        result = MasteryService(db).get_recommended_next_skills(student.id, limit)
+
+        assert [(r["skill"]["id"], r["priority_score"], r["unlocks_count"]) for r in result] == expected
+        assert [type(r["priority_score"]) for r in result] == [type(e[1]) for e in expected]
+
+    def test_no_candidates(self, db, student):
+        assert MasteryService(db).get_recommended_next_skills(student.id) == []
+
+    def test_benchmark_1500_skills(self, db, student):
+        build_tree(db, student, 1500)
+        service = MasteryService(db)
+
+        start = time.perf_counter()
+        expected = legacy_recommendations(db, student.id, 10)
+        legacy_seconds = time.perf_counter() - start
+
+        service.get_recommended_next_skills(student.id, 10)  # Load graph and snapshot
+        runs = 20
+        start = time.perf_counter()
+        for _ in range(runs):
+            invalidate_mastery_snapshot(db, student.id)
+            result = service.get_recommended_next_skills(student.id, 10)
+        vectorized_seconds = (time.perf_counter() - start) / runs
+
+        print(f"\nrecommendations @1500 skills: legacy {legacy_seconds * 1000:.1f} ms, "
+              f"vectorized {vectorized_seconds * 1000:.2f} ms")
+        assert [(r["skill"]["id"], r["priority_score"]) for r in result] == [e[:2] for e in expected]
+        assert vectorized_seconds < legacy_seconds
@@ -0,0 +1,151 @@
+"""
+Unit Tests for the Mastery Snapshot
+Tests array layout, per-session caching and O(1) queries in mastery endpoints
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from app.models.mastery import MasterySkill, StudentMastery, StudyPlan
+from app.services.event_log import publish_event, EVENT_SKILL_ASSESSMENT
+from app.services.mastery_service import MasteryService
+from app.services.mastery_snapshot import MasterySnapshot, get_mastery_snapshot
+
+
+@pytest.fixture
+def chain(db):
+    """200 skills, each requiring the previous one"""
+    skills = [MasterySkill(name=f"skill {i}", difficulty="beginner", estimated_hours=1.0) for i in range(200)]
+    for i in range(1, 200):
+        skills[i].prerequisites = [skills[i - 1]]
+    db.add_all(skills)
+    db.commit()
+    return skills
+
+
+def add_mastery(db, student, skill, level, assessed_at=None):
+    db.add(StudentMastery(student_id=student.id, skill_id=skill.id, mastery_level=level,
+                          progress_percentage=level * 20.0, last_assessed_at=assessed_at))
+    db.commit()
+
+
+class TestMasterySnapshot:
+    """Test suite for MasterySnapshot"""
+
+    def test_arrays_align_with_graph(self, db, chain, student):
+        assessed = datetime.now() - timedelta(hours=2)
+        add_mastery(db, student, chain[0], 4, assessed)
+        add_mastery(db, student, chain[1], 2)
+
+        snapshot = get_mastery_snapshot(db, student.id)
+        i0, i1 = snapshot.graph.index[chain[0].id], snapshot.graph.index[chain[1].id]
+
+        assert snapshot.level[i0] == 4 and snapshot.level[i1] == 2
+        assert snapshot.progress[i0] == 80.0
+        assert snapshot.hours_since_assessed()[i0] == pytest.approx(2, abs=0.01)
+        assert np.isnan(snapshot.hours_since_assessed()[i1])
+        assert snapshot.unlocked.sum() == 2
+        assert snapshot.record(chain[2].id) is None
+
+    def test_snapshot_is_cached_and_kept_current(self, db, chain, student):
+        snapshot = get_mastery_snapshot(db, student.id)
+        assert get_mastery_snapshot(db, student.id) is snapshot
+
+        publish_event(db, student.id, EVENT_SKILL_ASSESSMENT,
+                      {"skill_id": chain[0].id, "correct": True, "time_spent": 1})
+        db.commit()
+
+        assert get_mastery_snapshot(db, student.id) is snapshot
+        assert snapshot.level[snapshot.graph.index[chain[0].id]] == 1
+        assert snapshot.record(chain[0].id)["total_attempts"] == 1
+
+    def test_mastery_endpoints_issue_constant_queries(self, db, chain, student, query_counter):
+        for skill in chain[:50]:
+            db.add(StudentMastery(student_id=student.id, skill_id=skill.id, mastery_level=3,
+                                  progress_percentage=60.0))
+        plan = StudyPlan(student_id=student.id, title="plan", target_skills=[s.id for s in chain[:100]])
+        db.add(plan)
+        db.commit()
+
+        service = MasteryService(db)
+        get_mastery_snapshot(db, student.id)  # Warm the graph and snapshot
+        db.refresh(plan)
+        query_counter["count"] = 0
+
+        tree = service.get_skill_tree(student.id)
+        recommendations = service.get_recommended_next_skills(student.id)
+        path = service.get_learning_path(student.id, chain[-1].id)
+        progress = plan.calculate_progress(db)
+
+        assert query_counter["count"] == 0
+        assert sum(node["is_unlocked"] for node in tree["nodes"]) == 51
+        assert [r["skill"]["id"] for r in recommendations] == [s.id for s in chain[:5]]
+        assert path["total_skills"] == 150
+        assert progress == pytest.approx(30.0)
+
+
+class TestUnlockPropagation:
+    """Test suite for unlock discovery in assess_skill"""
+
+    @pytest.fixture
+    def diamond(self, db):
+        """a -> c, b -> c, a -> d"""
+        skills = {name: MasterySkill(name=name, difficulty="beginner") for name in "abcd"}
+        skills["c"].prerequisites = [skills["a"], skills["b"]]
+        skills["d"].prerequisites = [skills["a"]]
+        db.add_all(skills.values())
+        db.commit()
+        return skills
+
+    def assess_to_proficient(self, service, student, skill):
+        results = [service.assess_skill(student.id, skill.id, True) for _ in range(10)]
+        return results[-1]
+
+    def test_level_up_unlocks_dependents_with_nothing_left_unmet(self, db, diamond, student):
+        service = MasteryService(db)
+
+        result = self.assess_to_proficient(service, student, diamond["a"])
+        assert [s["name"] for s in result["newly_unlocked_skills"]] == ["d"]
+
+        result = self.assess_to_proficient(service, student, diamond["b"])
+        assert [s["name"] for s in result["newly_unlocked_skills"]] == ["c"]
+
+        snapshot = get_mastery_snapshot(db, student.id)
+        assert snapshot.unmet.tolist() == [0, 0, 0, 0]
+
+    def test_counters_match_a_fresh_load(self, db, diamond, student):
+        service = MasteryService(db)
+        self.assess_to_proficient(service, student, diamond["a"])
+        cached = get_mastery_snapshot(db, student.id)
+
+        fresh = MasterySnapshot.load(db, student.id)
+        assert cached.unmet.tolist() == fresh.unmet.tolist()
+        assert cached.level.tolist() == fresh.level.tolist()
+
+    def test_locked_skill_is_rejected(self, db, diamond, student):
+        with pytest.raises(ValueError):
+            MasteryService(db).assess_skill(student.id, diamond["c"].id, True)
+
+    def test_level_up_does_not_scan_skills(self, db, diamond, student):
+        service = MasteryService(db)
+        student_id, skill_id = student.id, diamond["a"].id
+        for _ in range(9):
+            service.assess_skill(student_id, skill_id, True)
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            result = service.assess_skill(student_id, skill_id, True)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert result["new_level"] == 3
+        assert not any("FROM mastery_skills" in s for s in statements)
+        assert not any("skill_prerequisites" in s for s in statements)
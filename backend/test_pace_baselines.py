@@ -0,0 +1,120 @@
+"""
+Unit Tests for Pace Baselines
+Tests the quantile sketch, baselines computed from students' running
+time-on-task statistics, and their use in pace analysis
+"""
+import random
+import warnings
+
+import numpy as np
+import pytest
+from sqlalchemy.exc import SAWarning
+
+from app.api.learning_pace import calculate_pace_metrics
+from app.models.learning_pace import LearningPace, PaceBaseline
+from app.models.models import Student
+from app.services import pace_baselines
+from app.services.pace_baselines import (
+    QuantileSketch, baseline_seconds, compute_pace_baselines, get_pace_baselines
+)
+
+
+def add_students(db, means, concept="algebra", count=5):
+    students = [Student(email=f"p{i}@example.com", username=f"p{i}", hashed_password="x") for i in range(len(means))]
+    db.add_all(students)
+    db.commit()
+    db.add_all(
+        LearningPace(student_id=s.id, time_on_task_data={concept: {"count": count, "correct": 3, "mean": mean, "m2": 0.0}})
+        for s, mean in zip(students, means)
+    )
+    db.commit()
+    return students
+
+
+class TestQuantileSketch:
+    """Test suite for the log-bucketed quantile sketch"""
+
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(0)
+        values = [rng.lognormvariate(5, 0.6) for _ in range(20_000)]
+        sketch, other = QuantileSketch(), QuantileSketch()
+        for value in values[:10_000]:
+            sketch.add(value)
+        for value in values[10_000:]:
+            other.add(value)
+        sketch.merge(other)
+
+        assert sketch.count == 20_000
+        assert len(sketch.buckets) < 500  # Bounded by the value range, not the count
+        for q in (0.25, 0.5, 0.75):
+            assert sketch.quantile(q) == pytest.approx(np.quantile(values, q), rel=0.02)
+        assert QuantileSketch().quantile(0.5) is None
+
+
+class TestPaceBaselines:
+    """Test suite for computing and using population baselines"""
+
+    def test_compute_baselines(self, db):
+        add_students(db, [100, 110, 120, 130, 140])
+        rare = Student(email="r@example.com", username="r", hashed_password="x")
+        db.add(rare)
+        db.commit()
+        # Too few answers to count, and a concept with too few students
+        db.add(LearningPace(student_id=rare.id, time_on_task_data={
+            "algebra": {"count": 2, "correct": 1, "mean": 900.0, "m2": 0.0},
+            "optics": {"count": 9, "correct": 9, "mean": 60.0, "m2": 0.0},
+        }))
+        db.commit()
+
+        baselines = compute_pace_baselines(db)
+        db.commit()
+        assert set(baselines) == {"algebra", "default"}
+        algebra = baselines["algebra"]
+        assert algebra["median_seconds"] == pytest.approx(120, rel=0.01)
+        assert algebra["p25_seconds"] == pytest.approx(110, rel=0.01)
+        assert algebra["p75_seconds"] == pytest.approx(130, rel=0.01)
+        assert (algebra["student_count"], algebra["answer_count"]) == (5, 25)
+        assert baselines["default"]["student_count"] == 6
+
+        row = db.query(PaceBaseline).filter(PaceBaseline.concept_name == "algebra").one()
+        assert row.iqr_seconds == pytest.approx(20, rel=0.05)
+
+        # Recomputing updates the rows in place and drops lost baselines
+        default = db.query(PaceBaseline).filter(PaceBaseline.concept_name == "default").one()
+        db.delete(db.query(LearningPace).filter(LearningPace.student_id != rare.id).first())
+        db.commit()
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", SAWarning)
+            compute_pace_baselines(db)
+            db.commit()
+        assert db.query(PaceBaseline).one() is default
+        assert default.student_count == 5
+
+    def test_fallbacks(self):
+        assert baseline_seconds({}, "calculus") == 240
+        assert baseline_seconds({}, "optics") == 200
+        assert baseline_seconds({"default": 150.0}, "calculus") == 150.0
+        assert baseline_seconds({"calculus": 90.0, "default": 150.0}, "calculus") == 90.0
+
+    def test_pace_is_compared_with_the_population(self, db):
+        students = add_students(db, [200, 220, 240, 260, 280])
+        # Cold start: the fastest student is compared with 180s
+        assert calculate_pace_metrics(students[0].id, db)["avg_speed"] == 0.9
+
+        compute_pace_baselines(db)
+        db.commit()
+        assert calculate_pace_metrics(students[0].id, db)["avg_speed"] == pytest.approx(1.2, abs=0.02)
+
+    def test_baselines_are_cached(self, db, query_counter, monkeypatch):
+        add_students(db, [100, 110, 120, 130, 140])
+        compute_pace_baselines(db)
+        db.commit()
+
+        assert get_pace_baselines(db)["algebra"] == pytest.approx(120, rel=0.01)
+        query_counter["count"] = 0
+        get_pace_baselines(db)
+        assert query_counter["count"] == 0
+
+        monkeypatch.setattr(pace_baselines, "BASELINE_CACHE_SECONDS", 0)
+        get_pace_baselines(db)
+        assert query_counter["count"] == 1
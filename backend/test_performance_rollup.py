@@ -0,0 +1,110 @@
+"""
+Unit Tests for the Performance Rollups
+Tests live per-day upserts, streaks, rebuilds, the parallel backfill and the
+rollup-backed chart endpoint
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from conftest import answer
+from app.api.analytics import get_performance_chart
+from app.core.database import Base
+from app.models.events import LearningEvent
+from app.models.models import PerformanceMetrics, Student
+from app.services.event_log import publish_event, append_event, performance_materializer, EVENT_ANSWER
+from app.services.performance_rollup import backfill_rollups, daily_rollups
+
+
+def rows(db, student_id):
+    return db.query(PerformanceMetrics).filter_by(student_id=student_id).order_by(PerformanceMetrics.date).all()
+
+
+class TestPerformanceRollup:
+    """Test suite for the daily PerformanceMetrics rollups"""
+
+    def test_answers_upsert_one_row_per_day(self, db, student):
+        today = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        yesterday = today - timedelta(days=1)
+        publish_event(db, student.id, EVENT_ANSWER, answer("algebra", True, 2, 60.0), created_at=yesterday)
+        publish_event(db, student.id, EVENT_ANSWER, answer("algebra", True, 2, 30.0), created_at=today)
+        publish_event(db, student.id, EVENT_ANSWER, answer("calculus", False, 4, 90.0), created_at=today)
+        db.commit()
+
+        first, second = rows(db, student.id)
+        assert first.date.date() == yesterday.date()
+        assert (first.questions_attempted, first.questions_correct, first.streak_days) == (1, 1, 1)
+        assert (second.questions_attempted, second.questions_correct) == (2, 1)
+        assert second.average_difficulty == pytest.approx(3.0)
+        assert second.total_time_spent == pytest.approx(2.0)
+        assert second.topics_covered == ["algebra", "calculus"]
+        assert second.streak_days == 2
+
+    def test_rebuild_reproduces_live_rollups(self, db, student):
+        start = datetime(2025, 1, 6, 9, 0)
+        for i in range(9):
+            publish_event(db, student.id, EVENT_ANSWER, answer(is_correct=i % 3 > 0, difficulty=i % 5 + 1),
+                          created_at=start + timedelta(hours=10 * i))
+        db.commit()
+        live = [(r.date, r.questions_attempted, r.questions_correct, r.average_difficulty, r.streak_days)
+                for r in rows(db, student.id)]
+
+        performance_materializer.rebuild(db)
+        db.commit()
+        db.expire_all()
+        rebuilt = [(r.date, r.questions_attempted, r.questions_correct, r.average_difficulty, r.streak_days)
+                   for r in rows(db, student.id)]
+        assert rebuilt == live
+        assert [r[4] for r in live] == [1, 2, 3, 4]
+
+    def test_parallel_backfill_is_resumable(self, tmp_path):
+        # A file-backed database, so every worker gets its own connection and
+        # the workers really contend for SQLite's single write lock. The short
+        # busy timeout makes long write transactions fail fast instead of only
+        # on slow disks.
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'rollups.db'}",
+            connect_args={"check_same_thread": False, "timeout": 0.1}
+        )
+        Base.metadata.create_all(bind=engine)
+        make_session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        db = make_session()
+        try:
+            db.execute(insert(Student), [
+                {"id": i, "email": f"s{i}@example.com", "username": f"s{i}", "hashed_password": "x"}
+                for i in range(1, 401)
+            ])
+            when = datetime(2025, 2, 1, 10, 0)
+            db.execute(insert(LearningEvent), [
+                {"student_id": i, "event_type": EVENT_ANSWER, "payload": answer(),
+                 "created_at": when + timedelta(days=day)}
+                for i in range(1, 401) for day in range(3)
+            ])
+            db.commit()
+
+            counts = backfill_rollups(make_session, workers=4, chunk_size=100)
+            assert counts == {"students": 400, "chunks": 4, "events": 1200}
+            assert backfill_rollups(make_session, workers=4, chunk_size=100)["events"] == 0
+
+            assert db.query(PerformanceMetrics).count() == 1200
+            assert [r.streak_days for r in rows(db, 400)] == [1, 2, 3]
+        finally:
+            db.close()
+            engine.dispose()
+
+    def test_reads_cover_only_the_requested_days(self, db, student):
+        today = datetime.now()
+        for days_ago in (0, 3, 10):
+            append_event(db, student.id, EVENT_ANSWER, answer(), created_at=today - timedelta(days=days_ago))
+        db.commit()
+
+        recent = daily_rollups(db, student.id, (today - timedelta(days=7)).date(), today.date())
+        assert len(recent) == 2
+
+        chart = get_performance_chart(student.username, days=7, db=db)
+        assert [point["attempts"] for point in chart] == [1, 1]
+        assert chart[-1]["date"] == today.date().isoformat()
+        assert chart[-1]["total_time"] == pytest.approx(0.5)
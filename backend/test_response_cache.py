@@ -0,0 +1,126 @@
+"""
+Unit Tests for the Response Cache
+Tests per-student state versions, version-keyed caching with an LRU bound,
+ETag revalidation and a cached dashboard endpoint
+"""
+import pytest
+from fastapi import Request, Response
+
+from app.api.mastery import BadgeCreate, SkillCreate, create_badge, create_skill, get_mastery_stats
+from app.models.models import LearningSession, Student
+from app.services import response_cache
+from app.services.event_log import publish_events, EVENT_FLASHCARD_REVIEW
+from app.services.response_cache import cached_response, state_version
+
+
+def request(etag=None):
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "headers": headers})
+
+
+class Compute:
+    """Counts how often a response is computed"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"calls": self.calls}
+
+
+class TestStateVersions:
+    """Test suite for per-student state versions"""
+
+    def test_writes_bump_on_commit_only(self, db, student):
+        version = state_version(student.id)
+        db.add(LearningSession(student_id=student.id, is_correct=True, time_spent=10.0))
+        db.flush()
+        assert state_version(student.id) == version
+        db.commit()
+        assert state_version(student.id) == version + 1
+
+        db.add(LearningSession(student_id=student.id, is_correct=False, time_spent=10.0))
+        db.flush()
+        db.rollback()
+        db.commit()
+        assert state_version(student.id) == version + 1
+
+    def test_bulk_writes_and_other_students(self, db, student):
+        other = Student(email="o@example.com", username="o", hashed_password="x")
+        db.add(other)
+        db.commit()
+        mine, theirs = state_version(student.id), state_version(other.id)
+
+        publish_events(db, student.id, EVENT_FLASHCARD_REVIEW, [({"flashcard_id": 1, "quality": 4}, None)])
+        db.commit()
+        assert state_version(student.id) > mine
+        assert state_version(other.id) == theirs
+
+
+class TestCachedResponse:
+    """Test suite for the version-keyed response cache"""
+
+    def test_served_from_cache_until_state_changes(self, db, student):
+        compute = Compute()
+        first = cached_response(request(), Response(), "test", student.id, compute)
+        again = cached_response(request(), Response(), "test", student.id, compute)
+        assert first == again == {"calls": 1}
+
+        db.add(LearningSession(student_id=student.id, is_correct=True, time_spent=10.0))
+        db.commit()
+        assert cached_response(request(), Response(), "test", student.id, compute) == {"calls": 2}
+
+        # Scopes (e.g. the day) are cached separately
+        assert cached_response(request(), Response(), "test", student.id, compute, scope="tomorrow") == {"calls": 3}
+
+    def test_etag_revalidation(self, student):
+        response = Response()
+        cached_response(request(), response, "test", student.id, Compute())
+        etag = response.headers["etag"]
+
+        not_modified = cached_response(request(etag), Response(), "test", student.id, Compute())
+        assert not_modified.status_code == 304
+        assert not_modified.headers["etag"] == etag
+        assert cached_response(request('"other"'), Response(), "test", student.id, Compute()) == {"calls": 1}
+
+    def test_cache_is_bounded(self, db, student, monkeypatch):
+        monkeypatch.setattr(response_cache, "RESPONSE_CACHE_SIZE", 3)
+        for endpoint in ["a", "b", "c", "d"]:
+            cached_response(request(), Response(), endpoint, student.id, Compute())
+        assert len(response_cache._responses) == 3
+
+        # A newer version replaces the endpoint's older entry
+        db.add(LearningSession(student_id=student.id, is_correct=True, time_spent=10.0))
+        db.commit()
+        cached_response(request(), Response(), "d", student.id, Compute())
+        assert len(response_cache._responses) == 3
+        assert [key[0] for key in response_cache._responses] == ["b", "c", "d"]
+
+    def test_write_during_compute_is_not_cached(self, db, student):
+        def compute():
+            db.add(LearningSession(student_id=student.id, is_correct=True, time_spent=10.0))
+            db.commit()
+            return {"stale": True}
+
+        assert cached_response(request(), Response(), "test", student.id, compute) == {"stale": True}
+        assert response_cache._responses == {}
+
+    def test_repeat_dashboard_load_skips_the_database(self, db, student, query_counter):
+        first = get_mastery_stats(request(), Response(), db=db, current_student=student)
+
+        query_counter["count"] = 0
+        again = get_mastery_stats(request(), Response(), db=db, current_student=student)
+        assert query_counter["count"] == 0
+        assert again == first
+
+    def test_new_skills_and_badges_reach_cached_dashboards(self, db, student):
+        first = get_mastery_stats(request(), Response(), db=db, current_student=student)
+        create_skill(SkillCreate(name="optics_basics", category="physics"), db=db, current_student=student)
+        after_skill = get_mastery_stats(request(), Response(), db=db, current_student=student)
+        assert after_skill["mastery"]["total_skills"] == first["mastery"]["total_skills"] + 1
+
+        compute = Compute()
+        cached_response(request(), Response(), "test", student.id, compute)
+        create_badge(BadgeCreate(name="Newcomer", criteria={}), db=db, current_student=student)
+        assert cached_response(request(), Response(), "test", student.id, compute) == {"calls": 2}
@@ -0,0 +1,136 @@
+"""
+Unit Tests for the Retention Forecast
+Tests the day-step deck simulation, load shedding under a daily cap and
+booking of projected review load in study plans
+"""
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.mastery import MasterySkill
+from app.models.smart_recommendations import FlashCard
+from app.services.mastery_service import StudyPlanService
+from app.services.retention_forecast import Deck, forecast, review_minutes_by_day, simulate
+
+
+NOW = datetime(2025, 3, 1, 12, 0)
+
+
+def card(student, **fields):
+    defaults = dict(student_id=student.id, concept_name="c", question="q", answer="a",
+                    scheduler="sm2", interval=1, ease_factor=2.5, repetitions=0,
+                    total_reviews=0, correct_reviews=0, streak=0, next_review_date=NOW)
+    return FlashCard(**{**defaults, **fields})
+
+
+class TestSimulation:
+    """Test suite for the vectorized deck simulation"""
+
+    def test_empty_deck(self, db, student):
+        result = forecast(db, student.id, days=7, now=NOW)
+        assert result["total_cards"] == 0
+        assert result["total_expected_reviews"] == 0
+        assert result["average_retention"] is None
+        assert [day["date"] for day in result["daily"]][:2] == ["2025-03-01", "2025-03-02"]
+
+    def test_new_sm2_cards_follow_the_sm2_ladder(self, db, student):
+        db.add_all([card(student) for _ in range(4)])
+        db.commit()
+
+        reviews = [day["expected_reviews"] for day in forecast(db, student.id, days=7, now=NOW)["daily"]]
+        # First review today, second after 1 day, third after 6 days unless forgotten
+        assert reviews[0] == reviews[1] == 4
+        assert max(reviews[2:7]) < 1
+
+    def test_retention_decays_without_reviews(self, db, student):
+        db.add_all([
+            card(student, scheduler="fsrs", stability=30.0, memory_difficulty=5.0, interval=30,
+                 last_reviewed=NOW - timedelta(days=1), next_review_date=NOW + timedelta(days=29)),
+            card(student, interval=40, repetitions=3,
+                 last_reviewed=NOW - timedelta(days=2), next_review_date=NOW + timedelta(days=38))
+        ])
+        db.commit()
+
+        result = forecast(db, student.id, days=20, now=NOW)
+        retention = [day["expected_retention"] for day in result["daily"]]
+        assert result["total_expected_reviews"] == 0
+        assert all(a > b for a, b in zip(retention, retention[1:]))
+        assert 0.9 < retention[-1] < 1.0
+
+    def test_cap_sheds_the_best_remembered_cards(self, db, student):
+        fresh = card(student, scheduler="fsrs", stability=50.0, memory_difficulty=5.0,
+                     last_reviewed=NOW - timedelta(days=1), next_review_date=NOW)
+        stale = card(student, scheduler="fsrs", stability=2.0, memory_difficulty=5.0,
+                     last_reviewed=NOW - timedelta(days=20), next_review_date=NOW)
+        db.add_all([fresh, stale] + [card(student) for _ in range(3)])
+        db.commit()
+
+        deck = Deck.load(db, student.id, NOW)
+        assert np.isnan(deck.stability).sum() == 3
+        result = simulate(deck, 3, max_reviews_per_day=1)
+        assert result["reviews"].tolist() == [1, 1, 1]
+        assert result["backlog"][:2].tolist() == [4, 3]
+        uncapped = simulate(deck, 1)
+        assert uncapped["reviews"][0] == 5
+
+    def test_invalid_requests(self, db, student):
+        with pytest.raises(ValueError):
+            forecast(db, student.id, days=0)
+        with pytest.raises(ValueError):
+            forecast(db, student.id, days=7, max_reviews_per_day=-1)
+
+    def test_benchmark_5k_cards_90_days(self):
+        rng = np.random.default_rng(0)
+        cards = [
+            type("Row", (), dict(
+                scheduler="fsrs" if i % 2 else "sm2", interval=int(rng.integers(1, 60)),
+                repetitions=3, ease_factor=2.5, stability=float(rng.uniform(1, 60)),
+                memory_difficulty=5.0, next_review_date=NOW + timedelta(days=float(rng.uniform(0, 30))),
+                last_reviewed=NOW - timedelta(days=float(rng.uniform(0, 30)))
+            ))
+            for i in range(5000)
+        ]
+        deck = Deck(cards, NOW)
+
+        start = time.perf_counter()
+        result = simulate(deck, 90)
+        elapsed = time.perf_counter() - start
+
+        print(f"\nForecast 5k cards x 90 days x 20 runs: {elapsed * 1000:.1f} ms")
+        assert result["reviews"].sum() > 0
+        assert elapsed < 5.0
+
+
+class TestPlanLoad:
+    """Test suite for projected review load in study plans"""
+
+    def test_review_minutes_by_day(self, db, student):
+        assert review_minutes_by_day(db, student.id, 3) == [0, 0, 0]
+        db.add_all([card(student, next_review_date=datetime.utcnow()) for _ in range(30)])
+        db.commit()
+        # 30 new cards at 20 seconds each, today and again tomorrow, then only lapses
+        today, tomorrow, after = review_minutes_by_day(db, student.id, 3)
+        assert today == tomorrow == 10 and after <= 1
+
+    def test_plans_leave_room_for_flashcards(self, db, student):
+        skill = MasterySkill(name="skill", estimated_hours=1.0)
+        db.add(skill)
+        db.add_all([card(student, next_review_date=datetime.utcnow()) for _ in range(45)])
+        db.commit()
+
+        result = StudyPlanService(db).generate_plan(
+            student_id=student.id,
+            goal_type="skill_mastery",
+            target_skills=[skill.id],
+            target_date=datetime.now() + timedelta(days=30, hours=1),
+            daily_minutes=30
+        )
+        schedule = result["plan"]["schedule"]
+        learn_days = [t["day"] for t in schedule["daily_tasks"] if t["task_type"] == "learn"]
+
+        assert schedule["flashcard_review_minutes"] >= 30
+        # 15 minutes of flashcards today and tomorrow leave no room for a learn chunk
+        assert min(learn_days) == 2
+        assert schedule["max_daily_minutes"] <= 30
@@ -0,0 +1,115 @@
+"""
+Unit Tests for the Review Queue
+Tests heap ordering with lazy deletion, keyset pagination of due cards,
+queue updates on review and the upcoming-reviews aggregate
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.smart_recommendations import FlashCard
+from app.services.review_queue import (
+    ReviewQueue, count_due, due_cards, schedule_card, unschedule_card, upcoming_counts
+)
+
+
+NOW = datetime(2025, 3, 10, 12, 0)
+
+
+@pytest.fixture
+def cards(db, student):
+    # Five overdue (two sharing a review time), three upcoming
+    offsets = [-50, -30, -30, -10, -1, 5, 30, 60]
+    cards = [
+        FlashCard(student_id=student.id, concept_name=f"c{i}", question="q", answer="a",
+                  next_review_date=NOW + timedelta(hours=hours))
+        for i, hours in enumerate(offsets)
+    ]
+    db.add_all(cards)
+    db.commit()
+    return cards
+
+
+def review(db, card, when):
+    card.next_review_date = when
+    db.commit()
+    schedule_card(card)
+
+
+class TestReviewQueue:
+    """Test suite for the in-memory heap"""
+
+    def test_next_due_skips_superseded_entries(self):
+        queue = ReviewQueue(1, [(1, NOW - timedelta(days=2)), (2, NOW - timedelta(days=1)), (3, NOW)])
+        queue.push(1, NOW + timedelta(days=3))
+        queue.remove(2)
+
+        assert queue.next_due(NOW, 10) == [(NOW, 3)]
+        assert queue.next_due(NOW + timedelta(days=3), 10) == [(NOW, 3), (NOW + timedelta(days=3), 1)]
+        # Peeking leaves the queue intact
+        assert queue.next_due(NOW, 10) == [(NOW, 3)]
+
+    def test_stale_entries_are_compacted(self):
+        queue = ReviewQueue(1, [(1, NOW)])
+        for hours in range(200):
+            queue.push(1, NOW + timedelta(hours=hours))
+        assert len(queue.heap) <= 2 * len(queue.due_at) + 64
+
+
+class TestDueCards:
+    """Test suite for due-card queries"""
+
+    def test_pages_follow_review_order(self, db, student, cards):
+        seen, cursor = [], None
+        while True:
+            page, cursor = due_cards(db, student.id, NOW, limit=2, cursor=cursor)
+            seen.extend(card.id for card in page)
+            if cursor is None:
+                break
+
+        expected = [c.id for c in sorted(cards[:5], key=lambda c: (c.next_review_date, c.id))]
+        assert seen == expected
+        assert count_due(db, student.id, NOW) == 5
+
+    def test_first_page_comes_from_the_queue(self, db, student, cards, query_counter):
+        student_id = student.id
+        due_cards(db, student_id, NOW, limit=3)
+
+        query_counter["count"] = 0
+        page, cursor = due_cards(db, student_id, NOW, limit=3)
+        assert query_counter["count"] == 1
+        assert [c.id for c in page] == [cards[0].id, cards[1].id, cards[2].id]
+        assert cursor is not None
+
+    def test_review_and_delete_update_the_queue(self, db, student, cards):
+        due_cards(db, student.id, NOW, limit=10)
+
+        review(db, cards[0], NOW + timedelta(days=6))
+        review(db, cards[5], NOW - timedelta(hours=100))
+        db.delete(cards[3])
+        db.commit()
+        unschedule_card(student.id, cards[3].id)
+
+        page, _ = due_cards(db, student.id, NOW, limit=10)
+        assert [c.id for c in page] == [cards[5].id, cards[1].id, cards[2].id, cards[4].id]
+
+    def test_stale_queue_falls_back_to_sql(self, db, student, cards):
+        due_cards(db, student.id, NOW, limit=10)
+
+        # Changed behind the queue's back (e.g. by another worker)
+        cards[0].next_review_date = NOW + timedelta(days=1)
+        db.commit()
+
+        page, _ = due_cards(db, student.id, NOW, limit=10)
+        assert cards[0].id not in [c.id for c in page]
+        assert len(page) == 4
+
+    def test_invalid_arguments(self, db, student, cards):
+        with pytest.raises(ValueError):
+            due_cards(db, student.id, NOW, limit=0)
+        with pytest.raises(ValueError):
+            due_cards(db, student.id, NOW, cursor="not-a-cursor")
+
+    def test_upcoming_counts_per_day(self, db, student, cards):
+        counts = upcoming_counts(db, student.id, NOW, NOW + timedelta(days=7))
+        assert counts == {"2025-03-10": 1, "2025-03-11": 1, "2025-03-13": 1}
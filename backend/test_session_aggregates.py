@@ -0,0 +1,151 @@
+"""
+Unit Tests for Session Aggregates
+Tests GROUP BY day/hour/topic/concept/difficulty pushdown, window and cohort
+filters, and the dashboard's use of SQL totals
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.api.analytics import build_dashboard
+from app.api.learning_pace import get_time_analytics
+from app.models.models import Content, LearningSession, Student
+from app.services.session_aggregates import aggregate_sessions, session_totals
+
+
+START = datetime(2025, 4, 1)
+
+
+@pytest.fixture
+def contents(db):
+    contents = [
+        Content(title="Kinematics", topic="mechanics", difficulty=2, content_type="question"),
+        Content(title="Limits", topic="calculus", difficulty=4, content_type="question"),
+    ]
+    db.add_all(contents)
+    db.commit()
+    return contents
+
+
+def add_session(db, student, content, when, is_correct=True, time_spent=60.0, concept=None):
+    db.add(LearningSession(
+        student_id=student.id, content_id=content.id, is_correct=is_correct,
+        time_spent=time_spent, time_spent_seconds=int(time_spent), concept_name=concept, timestamp=when
+    ))
+
+
+class TestSessionAggregates:
+    """Test suite for database-side session aggregation"""
+
+    @pytest.fixture
+    def sessions(self, db, student, contents):
+        mechanics, calculus = contents
+        add_session(db, student, mechanics, START + timedelta(hours=9), True, 60.0, "vectors")
+        add_session(db, student, mechanics, START + timedelta(hours=9, minutes=30), False, 30.0, "vectors")
+        add_session(db, student, calculus, START + timedelta(hours=18), True, 120.0, "limits")
+        add_session(db, student, calculus, START + timedelta(days=1, hours=9), True, 90.0, "limits")
+        db.commit()
+
+    def test_totals(self, db, student, sessions):
+        assert session_totals(db, student.id) == {
+            "attempts": 4, "timed_attempts": 4, "correct": 3, "time_spent": 300.0, "time_spent_seconds": 300
+        }
+        assert session_totals(db, student.id, start=START + timedelta(days=1))["attempts"] == 1
+        assert session_totals(db, student.id, end=START + timedelta(days=1))["attempts"] == 3
+        assert session_totals(db, student.id + 1)["attempts"] == 0
+
+    def test_groupings(self, db, student, sessions):
+        by_day = aggregate_sessions(db, student.id, by="day")
+        assert [(r["bucket"], r["attempts"], r["correct"]) for r in by_day] == [
+            ("2025-04-01", 3, 2), ("2025-04-02", 1, 1)
+        ]
+        by_hour = aggregate_sessions(db, student.id, by="hour")
+        assert [(r["bucket"], r["attempts"]) for r in by_hour] == [(9, 3), (18, 1)]
+        by_topic = aggregate_sessions(db, student.id, by="topic")
+        assert [(r["bucket"], r["time_spent"]) for r in by_topic] == [("calculus", 210.0), ("mechanics", 90.0)]
+        by_difficulty = aggregate_sessions(db, student.id, by="difficulty")
+        assert [(r["bucket"], r["attempts"]) for r in by_difficulty] == [(2, 2), (4, 2)]
+        by_concept = aggregate_sessions(db, student.id, by="concept")
+        assert [(r["bucket"], r["time_spent_seconds"]) for r in by_concept] == [("limits", 210), ("vectors", 90)]
+
+    def test_cohort_and_invalid_grouping(self, db, student, contents, sessions):
+        other = Student(email="o@example.com", username="o", hashed_password="x")
+        db.add(other)
+        db.commit()
+        add_session(db, other, contents[0], START)
+        db.commit()
+
+        assert session_totals(db, [student.id, other.id])["attempts"] == 5
+        with pytest.raises(ValueError):
+            aggregate_sessions(db, student.id, by="week")
+
+    def test_dashboard_sums_today_in_sql(self, db, student, contents):
+        now = datetime.now()
+        add_session(db, student, contents[0], now, time_spent=90.0)
+        add_session(db, student, contents[0], now - timedelta(days=2), time_spent=600.0)
+        db.commit()
+
+        dashboard = build_dashboard(db, student)
+        assert dashboard["progress"]["time_spent_today"] == pytest.approx(1.5)
+        assert len(dashboard["recent_sessions"]) == 2
+
+    def test_time_analytics_query_count_is_flat(self, db, student, contents, query_counter):
+        mechanics, calculus = contents
+        recent = datetime.utcnow().replace(hour=9, minute=0) - timedelta(days=1)
+        add_session(db, student, mechanics, recent, time_spent=60.0, concept="vectors")
+        add_session(db, student, calculus, recent + timedelta(hours=9), time_spent=120.0)
+        db.add(LearningSession(student_id=student.id, is_correct=True, time_spent=30.0, timestamp=recent))  # Untimed
+        db.commit()
+
+        query_counter["count"] = 0
+        analytics = asyncio.run(get_time_analytics(current_student=student, db=db, days=7))
+        queries = query_counter["count"]
+        assert analytics["total_time_seconds"] == 180
+        assert analytics["time_by_concept"]["general"]["seconds"] == 120
+        assert analytics["time_by_difficulty"] == {
+            "2": {"seconds": 60, "minutes": 1.0}, "4": {"seconds": 120, "minutes": 2.0}
+        }
+        assert analytics["peak_learning_hours"] == ["09:00", "18:00"]
+
+        # More sessions must not mean more queries (no per-session content loads)
+        for i in range(20):
+            add_session(db, student, contents[i % 2], recent + timedelta(minutes=i), concept="vectors")
+        db.commit()
+        query_counter["count"] = 0
+        analytics = asyncio.run(get_time_analytics(current_student=student, db=db, days=7))
+        assert query_counter["count"] == queries
+        assert analytics["peak_learning_hours"][0] == "09:00"
+
+    def test_benchmark_200k_sessions(self, db, contents):
+        students = [Student(email=f"b{i}@example.com", username=f"b{i}", hashed_password="x") for i in range(50)]
+        db.add_all(students)
+        db.commit()
+        rng = random.Random(0)
+        rows = [
+            {
+                "student_id": students[i % 50].id,
+                "content_id": contents[i % 2].id,
+                "is_correct": rng.random() < 0.7,
+                "time_spent": rng.uniform(10, 300),
+                "time_spent_seconds": rng.randint(10, 300),
+                "timestamp": START + timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+            }
+            for i in range(200_000)
+        ]
+        db.execute(insert(LearningSession), rows)
+        db.commit()
+        cohort = [s.id for s in students]
+
+        start = time.perf_counter()
+        by_day = aggregate_sessions(db, cohort, START, START + timedelta(days=30), by="day")
+        by_topic = aggregate_sessions(db, cohort, by="topic")
+        elapsed = time.perf_counter() - start
+
+        print(f"\nAggregate 200k sessions by day and topic: {elapsed * 1000:.1f} ms")
+        assert len(by_day) == 30
+        assert sum(r["attempts"] for r in by_topic) == 200_000
+        assert elapsed < 5.0
@@ -0,0 +1,135 @@
+"""
+Unit Tests for the Session Export
+Tests keyset-paged NDJSON/CSV streaming, filters, flattened state columns
+and gzip output
+"""
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException, Request
+from sqlalchemy.orm import sessionmaker
+
+from app.api import analytics
+from app.core.config import settings
+from app.models.models import Content, LearningSession, Student
+from app.services import session_export
+from app.services.session_export import EXPORT_COLUMNS, export_sessions
+
+
+def request(accept_encoding=None):
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    return Request({"type": "http", "headers": headers})
+
+
+@pytest.fixture
+def session_factory(db):
+    return sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+
+
+@pytest.fixture
+def sessions(db, student):
+    other = Student(email="o@example.com", username="o", hashed_password="x")
+    algebra = Content(title="Quadratics", topic="algebra", difficulty=2, content_type="question")
+    optics = Content(title="Lenses", topic="optics", difficulty=4, content_type="question")
+    db.add_all([other, algebra, optics])
+    db.commit()
+    for day in range(1, 6):
+        db.add(LearningSession(
+            student_id=student.id, content_id=(algebra if day % 2 else optics).id, is_correct=day != 3,
+            time_spent=30.0 * day, time_spent_seconds=30 * day, reward=0.5, timestamp=datetime(2025, 6, day, 12),
+            state_before={"algebra_score": 0.5, "accuracy_rate": 0.4, "learning_style": "visual"},
+            state_after={"algebra_score": 0.55, "total_attempts": day},
+            action_taken={"content_id": algebra.id, "difficulty": 2}
+        ))
+    db.add(LearningSession(student_id=other.id, content_id=algebra.id, is_correct=True, timestamp=datetime(2025, 6, 2)))
+    db.commit()
+    return student, other
+
+
+class TestSessionExport:
+    """Test suite for streaming exports"""
+
+    def test_ndjson_across_keyset_pages(self, db, sessions, session_factory, query_counter):
+        query_counter["count"] = 0
+        chunks = list(export_sessions(session_factory, page_size=2))
+        records = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+
+        assert len(chunks) == 3  # Pages of 2, 2 and 2 rows
+        assert query_counter["count"] == 4  # One query per page, plus the empty one that ends the stream
+        assert [r["id"] for r in records] == sorted(r["id"] for r in records)
+        assert len(records) == 6
+
+        first = records[0]
+        assert set(first) == set(EXPORT_COLUMNS)
+        assert (first["topic"], first["difficulty"], first["is_correct"]) == ("algebra", 2, True)
+        assert (first["before_algebra_score"], first["before_accuracy_rate"]) == (0.5, 0.4)
+        assert (first["after_algebra_score"], first["after_total_attempts"]) == (0.55, 1)
+        assert first["before_optics_score"] is None
+        assert records[-1]["before_algebra_score"] is None  # No state recorded
+
+    def test_filters(self, db, sessions, session_factory):
+        student, other = sessions
+
+        def ids(**filters):
+            lines = b"".join(export_sessions(session_factory, **filters)).decode().splitlines()
+            return [json.loads(line)["timestamp"][:10] for line in lines]
+
+        assert ids(student_ids=[other.id]) == ["2025-06-02"]
+        assert ids(student_ids=[student.id], start=date(2025, 6, 2), end=date(2025, 6, 3)) == ["2025-06-02", "2025-06-03"]
+        assert ids(student_ids=[student.id], topic="optics") == ["2025-06-02", "2025-06-04"]
+        assert ids(topic="chemistry") == []
+
+    def test_gzipped_csv(self, db, sessions, session_factory):
+        student, _ = sessions
+        data = b"".join(export_sessions(session_factory, [student.id], fmt="csv", gzip=True, page_size=2))
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(data).decode())))
+
+        assert len(rows) == 5
+        assert rows[2]["is_correct"] == "False"
+        assert rows[0]["after_algebra_score"] == "0.55"
+        assert rows[0]["before_trigonometry_score"] == ""
+
+        empty = b"".join(export_sessions(session_factory, topic="chemistry", fmt="csv")).decode()
+        assert empty.strip() == ",".join(EXPORT_COLUMNS)
+
+    def test_invalid_exports(self, session_factory):
+        with pytest.raises(ValueError):
+            export_sessions(session_factory, fmt="xlsx")
+        with pytest.raises(ValueError):
+            export_sessions(session_factory, start=date(2025, 6, 2), end=date(2025, 6, 1))
+
+    def test_endpoint(self, sessions, session_factory, monkeypatch):
+        student, other = sessions
+        monkeypatch.setattr(analytics, "SessionLocal", session_factory)
+        exported = []
+        monkeypatch.setattr(session_export, "export_sessions", lambda factory, ids, *args, **kwargs: (
+            exported.append(ids) or export_sessions(factory, ids, *args, **kwargs)
+        ))
+
+        def export(accept_encoding=None, format="ndjson", student_ids=None, caller=student):
+            return analytics.export_learning_sessions(
+                request(accept_encoding), student_ids=student_ids, start=None, end=None, topic=None,
+                format=format, current_student=caller
+            )
+
+        response = export("gzip, deflate", format="csv")
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.media_type == "text/csv"
+        assert "content-encoding" not in export().headers
+
+        with pytest.raises(HTTPException) as error:
+            export(format="xml")
+        assert error.value.status_code == 400
+
+        # Students export only their own sessions; staff may export anyone's
+        with pytest.raises(HTTPException) as error:
+            export(student_ids=[other.id])
+        assert error.value.status_code == 403
+        monkeypatch.setattr(settings, "STAFF_USERNAMES", [student.username])
+        export(student_ids=[other.id])
+        export()
+        assert exported == [[student.id], [student.id], [student.id], [other.id], None]
@@ -0,0 +1,148 @@
+"""
+Unit Tests for the Skill Gap Service
+Tests vectorized gap classification over every JEE topic, bulk upserts of
+stored gaps, the analyze endpoint and chunked cohort mode
+"""
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import skill_gaps
+from app.api.deps import get_current_student
+from app.api.skill_gaps import analyze_skill_gaps
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.models import Student, StudentKnowledge
+from app.models.skill_gap import SkillGap
+from app.services.skill_gap_service import analyze_cohort_gaps, classify_scores, detect_gaps
+from app.services.student_model import JEE_TOPICS, StudentModelService
+
+
+def set_scores(db, student_id, **scores):
+    knowledge = db.query(StudentKnowledge).filter(StudentKnowledge.student_id == student_id).first()
+    if not knowledge:
+        knowledge = StudentModelService.new_knowledge(student_id)
+        db.add(knowledge)
+    for topic in JEE_TOPICS:
+        setattr(knowledge, f"{topic}_score", scores.get(topic, 0.9))
+    db.commit()
+
+
+class TestClassification:
+    """Test suite for vectorized severity, priority and time estimates"""
+
+    def test_matches_the_original_rules(self):
+        result = classify_scores(np.array([[0.1, 0.4, 0.6, 0.75, 0.95]]))
+        assert result["severity"].tolist() == [[0, 1, 2, 3, 3]]  # critical, high, medium, low
+        # Base priority plus int((0.8 - score) * 5), capped at 10
+        assert result["priority"].tolist() == [[10, 10, 6, 3, 3]]
+        assert result["hours"].tolist() == [[70.0, 40.0, 20.0, 5.0, 0.0]]
+
+
+class TestDetectGaps:
+    """Test suite for per-student detection and bulk upserts"""
+
+    def test_all_topics_are_checked(self, db, student):
+        set_scores(db, student.id, optics=0.2, vectors=0.55, probability=0.45)
+        gaps = detect_gaps(db, [student.id])[student.id]
+        db.commit()
+
+        assert [(g["topic"], g["severity"]) for g in gaps] == [
+            ("Optics", "critical"), ("Probability", "high"), ("Vectors", "medium")
+        ]
+        stored = {gap.topic: gap for gap in db.query(SkillGap).filter(SkillGap.student_id == student.id)}
+        assert set(stored) == {"optics", "vectors", "probability"}
+        assert stored["optics"].estimated_time_hours == 60.0
+        assert stored["optics"].assessment_method == "session_analysis"
+
+    def test_rerun_updates_in_bulk(self, db, student, query_counter):
+        set_scores(db, student.id, optics=0.2, vectors=0.55)
+        detect_gaps(db, [student.id])
+        db.commit()
+        set_scores(db, student.id, optics=0.75, vectors=0.35, algebra=0.6)
+
+        query_counter["count"] = 0
+        detect_gaps(db, [student.id])
+        db.commit()
+        # Scores, existing gaps, one UPDATE, one INSERT, one DELETE (plus the commit)
+        assert query_counter["count"] <= 6
+
+        stored = {gap.topic: gap for gap in db.query(SkillGap).filter(SkillGap.student_id == student.id)}
+        assert len(stored) == db.query(SkillGap).count() == 2
+        # Optics rose above the threshold, so its gap is closed
+        assert "optics" not in stored
+        assert stored["vectors"].gap_severity == "high"
+        assert stored["algebra"].gap_severity == "medium"
+
+    def test_legacy_topic_gaps_are_closed(self, db, student):
+        db.add_all([
+            SkillGap(student_id=student.id, topic="geometry", assessment_method="session_analysis"),
+            SkillGap(student_id=student.id, topic="statistics", assessment_method="pre_test"),
+        ])
+        db.commit()
+        detect_gaps(db, [student.id])
+        db.commit()
+
+        topics = {gap.topic for gap in db.query(SkillGap).filter(SkillGap.student_id == student.id)}
+        assert "geometry" not in topics and "statistics" in topics
+
+    def test_analyze_endpoint(self, db, student):
+        set_scores(db, student.id, calculus=0.1, organic_chemistry=0.65)
+        result = analyze_skill_gaps(current_student=student, db=db)
+
+        assert result["total_gaps_identified"] == 2
+        assert result["critical_gaps"] == 1
+        assert result["gaps"][0]["topic"] == "Calculus"
+        assert [g["topic"] for g in result["stored_gaps"]] == ["calculus", "organic_chemistry"]
+
+
+class TestCohortGaps:
+    """Test suite for chunked cohort analysis"""
+
+    def test_cohort_in_chunks(self, db, query_counter):
+        students = [Student(email=f"g{i}@example.com", username=f"g{i}", hashed_password="x") for i in range(7)]
+        db.add_all(students)
+        db.commit()
+        for i, s in enumerate(students):
+            set_scores(db, s.id, mechanics=0.1 * i)
+
+        query_counter["count"] = 0
+        report = analyze_cohort_gaps(db, chunk_size=3)
+        chunked_queries = query_counter["count"]
+
+        assert report["student_count"] == 7
+        mechanics = report["topics"]["mechanics"]
+        # Scores 0.0..0.6: three critical, two high, two medium
+        assert (mechanics["critical"], mechanics["high"], mechanics["medium"]) == (3, 2, 2)
+        assert mechanics["students_with_gap"] == 7
+        assert mechanics["mean_proficiency"] == pytest.approx(0.3)
+        assert report["topics"]["optics"]["students_with_gap"] == 0
+        assert db.query(SkillGap).count() == 7
+
+        # Queries grow with chunks, not students
+        assert chunked_queries <= 1 + 3 * 5
+
+        with pytest.raises(ValueError):
+            analyze_cohort_gaps(db, chunk_size=0)
+
+    def test_unknown_students_are_skipped(self, db, student):
+        set_scores(db, student.id, mechanics=0.1)
+        report = analyze_cohort_gaps(db, [424242, student.id])
+
+        assert (report["student_count"], report["unknown_student_ids"]) == (1, [424242])
+        assert db.query(SkillGap).filter(SkillGap.student_id == 424242).count() == 0
+        assert db.query(SkillGap).filter(SkillGap.student_id == student.id).count() > 0
+
+    def test_cohort_endpoint_is_staff_only(self, db, student, monkeypatch):
+        app = FastAPI()
+        app.include_router(skill_gaps.router)
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_student] = lambda: student
+        client = TestClient(app)
+
+        assert client.post("/skill-gaps/cohort/analyze").status_code == 403
+        monkeypatch.setattr(settings, "STAFF_USERNAMES", [student.username])
+        response = client.post("/skill-gaps/cohort/analyze", params={"student_ids": [student.id]})
+        assert response.status_code == 200
+        assert response.json()["student_count"] == 1
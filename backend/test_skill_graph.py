@@ -0,0 +1,105 @@
+"""
+Unit Tests for the Skill Graph
+Tests adjacency, topological order, closure bitsets and vectorized unlock checks
+"""
+import numpy as np
+import pytest
+
+from app.models.mastery import MasterySkill, StudentMastery
+from app.services.mastery_service import MasteryService
+from app.services.mastery_snapshot import invalidate_mastery_snapshot
+from app.services.skill_graph import get_skill_graph, invalidate_skill_graph
+
+
+@pytest.fixture
+def tree(db):
+    """
+    arithmetic -> variables -> linear -> quadratic
+                                      \\-> systems
+    fractions (independent)
+    """
+    skills = {name: MasterySkill(name=name, difficulty="beginner", estimated_hours=1.0)
+              for name in ["arithmetic", "variables", "linear", "quadratic", "systems", "fractions"]}
+    skills["variables"].prerequisites = [skills["arithmetic"]]
+    skills["linear"].prerequisites = [skills["variables"]]
+    skills["quadratic"].prerequisites = [skills["linear"]]
+    skills["systems"].prerequisites = [skills["linear"], skills["fractions"]]
+    db.add_all(skills.values())
+    db.commit()
+    return skills
+
+
+def master(db, student, skill, level=3):
+    db.add(StudentMastery(student_id=student.id, skill_id=skill.id, mastery_level=level,
+                          progress_percentage=level * 20.0))
+    db.commit()
+
+
+class TestSkillGraph:
+    """Test suite for SkillGraph"""
+
+    def test_adjacency_and_topological_order(self, db, tree):
+        graph = get_skill_graph(db)
+        idx = lambda name: graph.index[tree[name].id]
+
+        assert set(graph.prerequisites(idx("systems")).tolist()) == {idx("linear"), idx("fractions")}
+        assert set(graph.unlocks(idx("linear")).tolist()) == {idx("quadratic"), idx("systems")}
+
+        position = {int(i): p for p, i in enumerate(graph.topo_order)}
+        for s, p in zip(graph.edge_rows, graph.prereq_indices):
+            assert position[int(p)] < position[int(s)]
+
+    def test_transitive_closure(self, db, tree):
+        graph = get_skill_graph(db)
+        ancestors = graph.ancestor_mask(graph.index[tree["systems"].id])
+        names = {name for name, skill in tree.items() if ancestors[graph.index[skill.id]]}
+        assert names == {"arithmetic", "variables", "linear", "fractions"}
+
+    def test_graph_is_cached_until_invalidated(self, db, tree):
+        graph = get_skill_graph(db)
+        assert get_skill_graph(db) is graph
+
+        db.add(MasterySkill(name="calculus", difficulty="advanced"))
+        db.commit()
+        assert get_skill_graph(db).size == 6
+
+        invalidate_skill_graph()
+        assert get_skill_graph(db).size == 7
+
+    def test_tree_matches_per_skill_unlock_check(self, db, tree, student):
+        master(db, student, tree["arithmetic"])
+        master(db, student, tree["variables"], level=4)
+        master(db, student, tree["linear"], level=2)
+
+        result = MasteryService(db).get_skill_tree(student.id)
+        by_id = {node["id"]: node for node in result["nodes"]}
+
+        for skill in tree.values():
+            assert by_id[skill.id]["is_unlocked"] == skill.is_unlocked_for_student(student.id, db)
+        assert by_id[tree["linear"].id]["mastery_level"] == 2
+        assert len(result["edges"]) == 5
+
+    def test_tree_query_count_is_constant(self, db, student, query_counter):
+        skills = [MasterySkill(name=f"skill {i}", difficulty="beginner") for i in range(200)]
+        for i in range(1, 200):
+            skills[i].prerequisites = [skills[i - 1]]
+        db.add_all(skills)
+        db.commit()
+
+        service = MasteryService(db)
+        service.get_skill_tree(student.id)  # Loads the graph
+        invalidate_mastery_snapshot(db, student.id)
+        query_counter["count"] = 0
+        tree = service.get_skill_tree(student.id)
+
+        assert tree["total_skills"] == 200
+        assert query_counter["count"] == 1
+        assert sum(node["is_unlocked"] for node in tree["nodes"]) == 1
+
+    def test_vectorized_unlock_mask(self, db, tree):
+        graph = get_skill_graph(db)
+        satisfied = np.zeros(graph.size, dtype=bool)
+        satisfied[graph.index[tree["linear"].id]] = True
+        counts = graph.unmet_prerequisite_counts(satisfied)
+        assert counts[graph.index[tree["systems"].id]] == 1
+        assert counts[graph.index[tree["quadratic"].id]] == 0
@@ -0,0 +1,85 @@
+"""
+Unit Tests for the Streak Service
+Tests the activity bitmap, streak bit operations and event-driven updates
+"""
+from datetime import date, datetime, timedelta
+
+from app.models.models import StudentActivity
+from app.services.event_log import publish_event, activity_materializer, EVENT_INTERACTION
+from app.services.streak_service import get_streaks, streaks_from_bitmap
+
+
+def bitmap(epoch, active_days):
+    activity = StudentActivity(student_id=1, days=b"")
+    for day in active_days:
+        activity.mark(epoch + timedelta(days=day))
+    return activity
+
+
+class TestStreaks:
+    """Test suite for streak computation"""
+
+    epoch = date(2024, 1, 1)
+
+    def streaks(self, active_days, today):
+        activity = bitmap(self.epoch, active_days)
+        return streaks_from_bitmap(activity.days, activity.epoch, self.epoch + timedelta(days=today))
+
+    def test_current_streak_ends_today_or_yesterday(self):
+        assert self.streaks([3, 4, 5], today=5)["current_streak"] == 3
+        assert self.streaks([3, 4, 5], today=6)["current_streak"] == 3
+        assert self.streaks([3, 4, 5], today=7)["current_streak"] == 0
+
+    def test_gaps_break_the_streak(self):
+        result = self.streaks([0, 1, 2, 3, 10, 12, 13], today=13)
+        assert result["current_streak"] == 2
+        assert result["longest_streak"] == 4
+        assert result["active_days"] == 7
+        assert result["last_active_date"] == "2024-01-14"
+
+    def test_long_history_crosses_word_boundaries(self):
+        result = self.streaks(list(range(0, 70)) + list(range(100, 300)), today=299)
+        assert result["current_streak"] == 200
+        assert result["longest_streak"] == 200
+
+    def test_empty_and_future_activity(self):
+        assert streaks_from_bitmap(b"", self.epoch, self.epoch)["current_streak"] == 0
+        assert self.streaks([5, 6], today=3) == {
+            "current_streak": 0, "longest_streak": 0, "active_days": 0, "last_active_date": None
+        }
+
+    def test_marking_before_epoch_rebases(self):
+        activity = bitmap(self.epoch, [2])
+        activity.mark(self.epoch - timedelta(days=3))
+        assert activity.epoch == self.epoch - timedelta(days=3)
+        result = streaks_from_bitmap(activity.days, activity.epoch, self.epoch + timedelta(days=2))
+        assert (result["active_days"], result["current_streak"]) == (2, 1)
+        assert len(activity.days) == 1
+
+
+class TestActivityCalendar:
+    """Test suite for the event-driven activity calendar"""
+
+    def test_events_mark_days(self, db, student):
+        now = datetime.now()
+        for days_ago in [0, 1, 2, 4]:
+            publish_event(db, student.id, EVENT_INTERACTION, {"content_id": 1, "rating": 3.0},
+                          created_at=now - timedelta(days=days_ago))
+        db.commit()
+
+        result = get_streaks(db, student.id)
+        assert result["current_streak"] == 3
+        assert result["active_days"] == 4
+
+    def test_rebuild_reproduces_calendar(self, db, student):
+        publish_event(db, student.id, EVENT_INTERACTION, {"content_id": 1, "rating": 3.0})
+        db.commit()
+        before = db.get(StudentActivity, student.id).days
+
+        activity_materializer.rebuild(db)
+        db.commit()
+        db.expire_all()
+        assert db.get(StudentActivity, student.id).days == before
+
+    def test_student_without_activity(self, db, student):
+        assert get_streaks(db, student.id)["current_streak"] == 0
@@ -0,0 +1,256 @@
+"""
+Unit Tests for Study Plans
+Tests task materialization, date-range queries, per-task completion,
+migration of JSON schedules, the capacity-aware scheduler and incremental
+re-planning
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.mastery import MasterySkill, StudentMastery, StudyPlan, StudyPlanTask
+from app.services.mastery_service import MasteryService, StudyPlanService
+from app.services.mastery_snapshot import invalidate_mastery_snapshot
+from app.services.plan_scheduler import dependent_closure, schedule_skills
+from app.services.skill_graph import get_skill_graph
+
+
+@pytest.fixture
+def skills(db):
+    skills = [MasterySkill(name=f"skill {i}", estimated_hours=1.0) for i in range(3)]
+    skills[1].prerequisites = [skills[0]]
+    db.add_all(skills)
+    db.commit()
+    return skills
+
+
+def generate(db, student, skills, days=30, daily_minutes=30):
+    return StudyPlanService(db).generate_plan(
+        student_id=student.id,
+        goal_type="skill_mastery",
+        target_skills=[s.id for s in skills],
+        target_date=datetime.now() + timedelta(days=days, hours=1),
+        daily_minutes=daily_minutes
+    )
+
+
+class TestPlanTasks:
+    """Test suite for the study_plan_tasks store"""
+
+    def test_generate_materializes_tasks(self, db, student, skills):
+        result = generate(db, student, skills)
+        plan = db.get(StudyPlan, result["plan"]["id"])
+
+        assert plan.total_tasks == len(plan.tasks) > 0
+        assert "daily_tasks" not in plan.schedule
+        assert result["plan"]["schedule"]["daily_tasks"] == [t.to_dict() for t in plan.tasks]
+        today = datetime.now().date()
+        assert all(t.due_date == today + timedelta(days=t.day) for t in plan.tasks)
+
+    def test_today_and_week_are_range_queries(self, db, student, skills, query_counter):
+        generate(db, student, skills)
+        service = StudyPlanService(db)
+        today = datetime.now().date()
+        student_id = student.id
+
+        query_counter["count"] = 0
+        today_tasks = service.get_today_tasks(student_id)
+        assert query_counter["count"] == 1
+        assert today_tasks["total_tasks"] > 0
+        assert all(t["date"] == today.isoformat() for t in today_tasks["tasks"])
+        assert today_tasks["tasks"][0]["plan_title"] == "Skill Mastery Study Plan"
+
+        week = service.get_tasks_between(student.id, today, today + timedelta(days=6))
+        expected = db.query(StudyPlanTask).filter(StudyPlanTask.day <= 6).count()
+        assert week["total_tasks"] == expected
+
+    def test_inactive_plans_are_excluded(self, db, student, skills):
+        result = generate(db, student, skills)
+        db.get(StudyPlan, result["plan"]["id"]).is_active = False
+        db.commit()
+        assert StudyPlanService(db).get_today_tasks(student.id)["total_tasks"] == 0
+
+    def test_complete_task_updates_one_row(self, db, student, skills):
+        result = generate(db, student, skills)
+        service = StudyPlanService(db)
+        task_id = service.get_today_tasks(student.id)["tasks"][0]["id"]
+
+        completed = service.complete_task(student.id, task_id)
+        service.complete_task(student.id, task_id)  # Idempotent
+
+        assert completed["is_completed"]
+        db.expire_all()
+        assert db.get(StudyPlan, result["plan"]["id"]).completed_tasks == 1
+        assert service.get_today_tasks(student.id)["completed_tasks"] == 1
+
+        with pytest.raises(ValueError):
+            service.complete_task(student.id + 1, task_id)
+
+    def test_backfill_moves_json_schedules(self, db, student, skills):
+        plan = StudyPlan(student_id=student.id, title="legacy", created_at=datetime(2024, 5, 1),
+                         schedule={"total_days": 10, "daily_tasks": [
+                             {"day": 0, "skill_id": skills[0].id, "skill_name": "skill 0",
+                              "minutes": 30, "task_type": "learn"},
+                             {"day": 2, "skill_id": skills[0].id, "skill_name": "skill 0",
+                              "minutes": 15, "task_type": "review"},
+                         ]})
+        db.add(plan)
+        db.commit()
+
+        assert StudyPlanService(db).backfill_tasks() == 1
+        assert StudyPlanService(db).backfill_tasks() == 0
+
+        db.refresh(plan)
+        assert plan.schedule == {"total_days": 10}
+        assert [t.due_date.isoformat() for t in plan.tasks] == ["2024-05-01", "2024-05-03"]
+
+
+class TestScheduler:
+    """Test suite for the capacity-aware scheduler"""
+
+    def build_graph(self, db, size, seed=3):
+        rng = random.Random(seed)
+        skills = [MasterySkill(name=f"s{i}", estimated_hours=rng.choice([0.5, 1.0, 2.0, 3.0]))
+                  for i in range(size)]
+        for i in range(1, size):
+            skills[i].prerequisites = rng.sample(skills[max(0, i - 20):i], k=min(i, rng.randint(0, 2)))
+        db.add_all(skills)
+        db.commit()
+        return get_skill_graph(db), skills
+
+    def check_schedule(self, graph, result, days, daily_minutes):
+        load = [0] * days
+        learn_days = {}
+        for task in result["daily_tasks"]:
+            load[task["day"]] += task["minutes"]
+            if task["task_type"] == "learn":
+                learn_days.setdefault(graph.index[task["skill_id"]], []).append(task["day"])
+
+        assert max(load) <= daily_minutes
+        for i, skill_days in learn_days.items():
+            for p in np.flatnonzero(graph.ancestor_mask(i)).tolist():
+                if p in learn_days:
+                    assert max(learn_days[p]) < min(skill_days)
+
+    def test_respects_capacity_and_prerequisites(self, db):
+        graph, skills = self.build_graph(db, 60)
+        result = schedule_skills(graph, list(range(graph.size)), 365, 45)
+
+        self.check_schedule(graph, result, 365, 45)
+        assert result["unscheduled_minutes"] == 0
+        learned = sum(t["minutes"] for t in result["daily_tasks"] if t["task_type"] == "learn")
+        assert learned == sum(round(s.estimated_hours * 60) for s in skills)
+
+    def test_reviews_follow_learning_at_spaced_intervals(self, db, skills):
+        graph = get_skill_graph(db)
+        result = schedule_skills(graph, [graph.index[skills[2].id]], 60, 120)
+
+        tasks = result["daily_tasks"]
+        assert [t["task_type"] for t in tasks] == ["learn"] + ["review"] * 5
+        assert [t["day"] for t in tasks] == [0, 1, 3, 7, 14, 30]
+
+    def test_generate_plan_never_overbooks(self, db, student):
+        many = [MasterySkill(name=f"topic {i}", estimated_hours=1.0) for i in range(40)]
+        db.add_all(many)
+        db.commit()
+
+        result = generate(db, student, many, days=60, daily_minutes=60)
+        schedule = result["plan"]["schedule"]
+
+        per_day = {}
+        for task in schedule["daily_tasks"]:
+            per_day[task["day"]] = per_day.get(task["day"], 0) + task["minutes"]
+        assert max(per_day.values()) <= 60
+        assert schedule["max_daily_minutes"] <= 60
+
+    def test_benchmark_500_skills_365_days(self, db):
+        graph, _ = self.build_graph(db, 500)
+
+        start = time.perf_counter()
+        result = schedule_skills(graph, list(range(graph.size)), 365, 240)
+        elapsed = time.perf_counter() - start
+
+        print(f"\nschedule 500 skills x 365 days: {elapsed * 1000:.1f} ms, "
+              f"{len(result['daily_tasks'])} tasks, {result['unscheduled_minutes']} min unscheduled, "
+              f"{result['dropped_reviews']} reviews dropped")
+        self.check_schedule(graph, result, 365, 240)
+        assert elapsed < 0.5
+
+
+class TestReplanning:
+    """Test suite for incremental re-planning of a plan's suffix"""
+
+    def tasks_by_id(self, db, plan_id):
+        db.expire_all()
+        return {t.id: t.to_dict() for t in db.query(StudyPlanTask).filter(StudyPlanTask.plan_id == plan_id)}
+
+    def master(self, db, student, skill, level=3):
+        db.add(StudentMastery(student_id=student.id, skill_id=skill.id, mastery_level=level,
+                              last_assessed_at=datetime.now()))
+        db.commit()
+        invalidate_mastery_snapshot(db)
+
+    def test_dependent_closure(self, db, skills):
+        graph = get_skill_graph(db)
+        members = [graph.index[s.id] for s in skills]
+        closure = dependent_closure(graph, [graph.index[skills[0].id]], members)
+        assert graph.ids[closure].tolist() == [skills[0].id, skills[1].id]
+        assert dependent_closure(graph, [], members) == []
+
+    def test_only_future_tasks_of_affected_skills_change(self, db, student, skills):
+        plan_id = generate(db, student, skills, days=30, daily_minutes=30)["plan"]["id"]
+        service = StudyPlanService(db)
+        later = next(t for t in self.tasks_by_id(db, plan_id).values()
+                     if t["skill_id"] == skills[1].id and t["day"] > 0)
+        service.complete_task(student.id, later["id"])
+        before = self.tasks_by_id(db, plan_id)
+
+        self.master(db, student, skills[0])
+        result = service.replan(db.get(StudyPlan, plan_id), [skills[0].id])
+        db.commit()
+        after = self.tasks_by_id(db, plan_id)
+
+        assert result["replanned_skills"] == [skills[0].id, skills[1].id]
+        kept = {i: t for i, t in before.items()
+                if t["day"] == 0 or t["is_completed"] or t["skill_id"] == skills[2].id}
+        assert all(after[i] == t for i, t in kept.items())
+        assert len(before) - result["removed_tasks"] == len(kept)
+
+        # Skill 0 is proficient: reviews only from tomorrow on
+        new = [t for i, t in after.items() if i not in before]
+        assert {t["task_type"] for t in new if t["skill_id"] == skills[0].id} == {"review"}
+        assert min(t["day"] for t in new) >= 1
+
+        per_day = {}
+        for task in after.values():
+            per_day[task["day"]] = per_day.get(task["day"], 0) + task["minutes"]
+        assert max(per_day.values()) <= 30
+        assert db.get(StudyPlan, plan_id).total_tasks == len(after)
+
+    def test_adjust_replans_skills_assessed_since_last_adjustment(self, db, student, skills):
+        plan_id = generate(db, student, skills)["plan"]["id"]
+        service = StudyPlanService(db)
+
+        self.master(db, student, skills[2])
+        first = service.adjust_plan(plan_id, {})
+        second = service.adjust_plan(plan_id, {})
+
+        assert first["replanned"]["replanned_skills"] == [skills[2].id]
+        assert second["replanned"]["replanned_skills"] == []
+
+    def test_level_change_on_assessment_replans(self, db, student, skills):
+        plan_id = generate(db, student, skills)["plan"]["id"]
+        before = self.tasks_by_id(db, plan_id)
+        service = MasteryService(db)
+
+        result = service.assess_skill(student.id, skills[2].id, correct=True)
+        while not result["level_up"]:
+            result = service.assess_skill(student.id, skills[2].id, correct=True)
+
+        after = self.tasks_by_id(db, plan_id)
+        future = lambda tasks: {i for i, t in tasks.items() if t["skill_id"] == skills[2].id and t["day"] > 0}
+        assert future(before) and not future(before) & future(after)
+        assert {i for i, t in before.items() if t["skill_id"] != skills[2].id} <= set(after)